@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+browser_worker.py
+
+Python client for the long-lived Puppeteer worker.
+
+``node puppeteer_scraper.js --worker`` launches Chromium once and then takes
+scrape jobs as JSON lines on stdin, answering each on stdout with the page's
+Markdown and links. BrowserWorker owns that process: jobs are submitted from
+any thread and come back as futures, so the caller keeps the frontier,
+retries and proxy rotation while browser startup is paid only once.
+"""
+
+import itertools
+import json
+import subprocess
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+SCRIPT_PATH = Path(__file__).parent / "puppeteer_scraper.js"
+
+
+class BrowserWorkerError(Exception):
+    """Raised when the worker process cannot be started, dies mid-job, or a job times out."""
+
+
+class BrowserWorker:
+    """A single ``puppeteer_scraper.js --worker`` process.
+
+    ``extra_args`` are passed to the script as-is (readiness flags and the
+    like). The process is started lazily and restarted if it exits. A job
+    that gets no reply within its navigation timeout plus ``job_grace``
+    seconds fails with BrowserWorkerError, so one stuck page cannot hang a
+    crawl.
+    """
+
+    def __init__(self, headless=True, extra_args=None, node="node", script=SCRIPT_PATH,
+                 startup_timeout=60, job_grace=60):
+        self.headless = headless
+        self.extra_args = list(extra_args or [])
+        self.node = node
+        self.script = str(script)
+        self.startup_timeout = startup_timeout
+        self.job_grace = job_grace
+        self._proc = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self.starts = 0
+        self.jobs = 0
+
+    def _command(self):
+        args = [self.node, self.script, "--worker"]
+        if not self.headless:
+            args.append("--headless=false")
+        return args + self.extra_args
+
+    def _start(self):
+        try:
+            proc = subprocess.Popen(
+                self._command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+            )
+        except OSError as e:
+            raise BrowserWorkerError(f"Cannot run {self.node}: {e}")
+        ready = Future()
+        reader = threading.Thread(target=self._read, args=(proc, ready), daemon=True)
+        reader.start()
+        try:
+            ready.result(timeout=self.startup_timeout)
+        except Exception as e:
+            proc.kill()
+            raise BrowserWorkerError(f"Browser worker failed to start: {e}")
+        self._proc = proc
+        self.starts += 1
+
+    def _read(self, proc, ready):
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("ready"):
+                ready.set_result(True)
+                continue
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+            if future is not None:
+                future.timer.cancel()
+                future.set_result(message)
+
+        proc.wait()
+        if not ready.done():
+            ready.set_exception(BrowserWorkerError(f"exited with code {proc.returncode}"))
+        # Fail whatever was still in flight on this process.
+        with self._lock:
+            orphaned = [f for f in self._pending.values() if getattr(f, "proc", None) is proc]
+            for future in orphaned:
+                self._pending.pop(future.job_id, None)
+        for future in orphaned:
+            future.timer.cancel()
+            future.set_exception(BrowserWorkerError("Browser worker exited mid-job"))
+
+    def _expire(self, future, seconds):
+        with self._lock:
+            if self._pending.pop(future.job_id, None) is None:
+                return
+        future.set_exception(BrowserWorkerError(f"No reply from the browser worker after {seconds:.0f}s"))
+
+    def submit(self, url, base_url=None, proxy=None, proxy_type="http", timeout=60000):
+        """Queue a scrape of ``url`` and return a Future for the worker's reply.
+
+        The reply is a dict with ``ok`` and either ``markdown``, ``links`` and
+        ``readyMs``, or ``error``.
+        """
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            job_id = next(self._ids)
+            self.jobs += 1
+            future = Future()
+            future.job_id = job_id
+            future.proc = self._proc
+            deadline = timeout / 1000 + self.job_grace
+            future.timer = threading.Timer(deadline, self._expire, args=(future, deadline))
+            future.timer.daemon = True
+            self._pending[job_id] = future
+            job = {"id": job_id, "url": url, "baseUrl": base_url or url, "proxy": proxy,
+                   "proxyType": proxy_type, "timeout": timeout}
+            try:
+                self._proc.stdin.write(json.dumps(job) + "\n")
+                self._proc.stdin.flush()
+            except OSError as e:
+                self._pending.pop(job_id, None)
+                future.set_exception(BrowserWorkerError(f"Browser worker is gone: {e}"))
+            else:
+                future.timer.start()
+        return future
+
+    def close(self, timeout=30):
+        """Let in-flight jobs finish, then shut the browser down."""
+        proc = self._proc
+        self._proc = None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
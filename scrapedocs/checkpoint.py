@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+"""
+checkpoint.py
+
+Persistent crawl state for scrape-docs.
+
+The frontier, visited set, per-URL status and failure counts are written to a
+SQLite file inside the output directory as the crawl progresses, so a run that
+dies (proxy outage, OOM, Ctrl-C) can be picked up again with --resume. The
+crawler reads its frontier straight from this table rather than keeping it in
+memory, so large sites cost disk, not RAM.
+"""
+
+import sqlite3
+import time
+
+CHECKPOINT_FILENAME = ".scrape-state.sqlite"
+
+QUEUED = "queued"
+FETCHING = "fetching"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_status ON pages (status);
+CREATE INDEX IF NOT EXISTS pages_queue ON pages (status, depth, updated_at);
+"""
+
+
+class CrawlCheckpoint:
+    """SQLite-backed record of every URL a crawl has queued, fetched or failed.
+
+    Only the thread driving the crawl may call its methods, one call at a
+    time (that thread may change, e.g. under async iteration). Writes are
+    batched and flushed with ``commit()``.
+    """
+
+    def __init__(self, path, max_failures=3):
+        self.path = str(path)
+        self.max_failures = max_failures
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    # ------------------ Run Metadata ------------------ #
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def reset(self, base_url):
+        """Forget any previous run and start a fresh checkpoint for ``base_url``."""
+        self.conn.execute("DELETE FROM pages")
+        self.conn.execute("DELETE FROM meta")
+        self.set_meta("base_url", base_url)
+        self.set_meta("started_at", time.time())
+        self.commit()
+
+    # ------------------ Page State ------------------ #
+    def enqueue(self, url, depth):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO pages (url, depth, status, updated_at) VALUES (?, ?, ?, ?)",
+            (url, depth, QUEUED, time.time()),
+        )
+
+    def enqueue_many(self, urls, depth):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO pages (url, depth, status, updated_at) VALUES (?, ?, ?, ?)",
+            ((url, depth, QUEUED, now) for url in urls),
+        )
+
+    def next_queued(self, limit):
+        """Return up to ``limit`` queued ``(url, depth)`` pairs, shallowest and oldest first."""
+        return self.conn.execute(
+            "SELECT url, depth FROM pages WHERE status = ? ORDER BY depth, updated_at, rowid LIMIT ?",
+            (QUEUED, limit),
+        ).fetchall()
+
+    def _set_status(self, url, depth, status):
+        self.conn.execute(
+            "INSERT INTO pages (url, depth, status, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+            (url, depth, status, time.time()),
+        )
+
+    def requeue(self, url, depth):
+        self._set_status(url, depth, QUEUED)
+
+    def mark_fetching(self, url, depth):
+        self._set_status(url, depth, FETCHING)
+
+    def mark_done(self, url, depth):
+        self._set_status(url, depth, DONE)
+
+    def mark_skipped(self, url, depth):
+        self._set_status(url, depth, SKIPPED)
+
+    def mark_failed(self, url, depth):
+        self._set_status(url, depth, FAILED)
+        self.conn.execute("UPDATE pages SET failures = failures + 1 WHERE url = ?", (url,))
+
+    def urls(self, status):
+        """Yield every URL that currently has ``status``."""
+        for (url,) in self.conn.execute("SELECT url FROM pages WHERE status = ?", (status,)).fetchall():
+            yield url
+
+    def status(self, url):
+        row = self.conn.execute("SELECT status FROM pages WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def resume(self):
+        """Prepare stored state for resuming a crawl; returns ``(finished, queued)``.
+
+        Pages that were in flight when the run stopped, and failed pages that
+        still have retries left, go back to the queue. ``finished`` counts the
+        pages that are done for good.
+        """
+        self.conn.execute(
+            "UPDATE pages SET status = ? WHERE status = ? OR (status = ? AND failures < ?)",
+            (QUEUED, FETCHING, FAILED, self.max_failures),
+        )
+        counts = self.counts()
+        queued = counts.pop(QUEUED, 0)
+        return sum(counts.values()), queued
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM pages GROUP BY status"))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
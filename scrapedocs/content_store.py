@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+content_store.py
+
+Content-hash manifest for scraped Markdown.
+
+Tracks a SHA-256 of every file scrape-docs writes so unchanged pages are
+never rewritten (mtimes stay stable for downstream sync), and detects pages
+served under several URLs (trailing slash, /index, localized aliases) so
+their Markdown is stored once. Duplicate URLs are recorded in an alias map
+pointing at the file that holds their content.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_FILENAME = ".content-manifest.json"
+
+
+def sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ContentStore:
+    """Per-output-directory manifest of file hashes and URL aliases.
+
+    ``files`` maps a Markdown filename to the hash of the full file and of the
+    converted page body (without the per-URL title line); ``aliases`` maps a
+    duplicate page URL to the filename its content is stored under.
+    """
+
+    def __init__(self, output_dir, dedup=True):
+        self.output_dir = output_dir
+        self.dedup = dedup
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.files = {}
+        self.aliases = {}
+        self.stats = {"written": 0, "unchanged": 0, "duplicates": 0}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.aliases = data.get("aliases", {})
+        except (OSError, ValueError):
+            pass
+        self._by_body = {entry["body"]: name for name, entry in self.files.items()}
+
+    def _exists(self, filename):
+        return os.path.exists(os.path.join(self.output_dir, filename))
+
+    def canonical_for(self, url, filename, body):
+        """Return the filename already holding ``body`` for another URL, or None."""
+        if not self.dedup:
+            return None
+        canonical = self._by_body.get(sha256(body))
+        if canonical and canonical != filename and self._exists(canonical):
+            return canonical
+        return None
+
+    def _forget(self, filename):
+        entry = self.files.pop(filename, None)
+        if entry and self._by_body.get(entry["body"]) == filename:
+            del self._by_body[entry["body"]]
+        return entry
+
+    def add_alias(self, url, filename, canonical):
+        self.aliases[url] = canonical
+        self.stats["duplicates"] += 1
+        # Drop a copy an earlier run wrote before the duplicate was known.
+        entry = self._forget(filename)
+        if entry and entry["body"] == self.files[canonical]["body"] and self._exists(filename):
+            os.remove(os.path.join(self.output_dir, filename))
+
+    def is_unchanged(self, filename, text):
+        """True when ``filename`` on disk already holds exactly ``text``."""
+        digest = sha256(text)
+        entry = self.files.get(filename)
+        if entry and entry["sha256"] == digest and self._exists(filename):
+            return True
+        filepath = os.path.join(self.output_dir, filename)
+        if entry is None and os.path.exists(filepath):
+            with open(filepath, "r", encoding="utf-8") as f:
+                return sha256(f.read()) == digest
+        return False
+
+    def record(self, url, filename, text, body, written):
+        body_hash = sha256(body)
+        self._forget(filename)
+        self.files[filename] = {"sha256": sha256(text), "body": body_hash}
+        self._by_body.setdefault(body_hash, filename)
+        self.aliases.pop(url, None)
+        self.stats["written" if written else "unchanged"] += 1
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files, "aliases": self.aliases}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
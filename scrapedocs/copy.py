@@ -5,12 +5,16 @@ import shutil
 import argparse
 from pathlib import Path
 
+from scrapedocs.corpus import Corpus, find_corpus, topic_name
+
 def copy_docs(topics, source_dir, target_dir, verbose=False, skip_existing=False):
     for topic in topics:
         src_path = Path(source_dir) / topic
-        dst_path = Path(target_dir) / topic
+        # A packed corpus (<topic>.corpus) is exported, since editors need real files.
+        corpus_path = None if src_path.is_dir() else find_corpus(source_dir, topic)
+        dst_path = Path(target_dir) / topic_name(topic)
 
-        if not src_path.exists():
+        if corpus_path is None and not src_path.exists():
             print(f"❌ Source not found: {src_path}")
             continue
 
@@ -22,7 +26,21 @@ def copy_docs(topics, source_dir, target_dir, verbose=False, skip_existing=False
             if response != 'y':
                 print(f"🚫 Skipped: {dst_path}")
                 continue
-            shutil.rmtree(dst_path)
+            if dst_path.is_symlink():
+                dst_path.unlink()
+            else:
+                shutil.rmtree(dst_path)
+
+        if corpus_path is not None:
+            try:
+                with Corpus(corpus_path, readonly=True) as corpus:
+                    written, _, _ = corpus.export(dst_path)
+            except ValueError as e:
+                print(f"❌ Skipping {topic}: {e}")
+                continue
+            if verbose:
+                print(f"📦 Exported {written} file(s) from {corpus_path} to {dst_path}")
+            continue
 
         dst_path.symlink_to(src_path, target_is_directory=True)
         # shutil.copytree(src_path, dst_path)
@@ -31,7 +49,7 @@ def copy_docs(topics, source_dir, target_dir, verbose=False, skip_existing=False
 
 def main():
     parser = argparse.ArgumentParser(description="Copy scraped docs into your project for AI code editor context")
-    parser.add_argument("topics", nargs="+", help="Names of the doc folders to copy (e.g., shadcn tailwind prisma)")
+    parser.add_argument("topics", nargs="+", help="Names of the doc folders or .corpus files to copy (e.g., shadcn tailwind prisma)")
     parser.add_argument("--from", dest="source_dir", required=True, help="Centralized docs location")
     parser.add_argument("--to", dest="target_dir", required=True, help="Destination project's /docs directory")
     parser.add_argument("--verbose", action="store_true", help="Print each copy step")
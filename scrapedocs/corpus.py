@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+"""
+corpus.py
+
+Packed single-file corpus of scraped docs.
+
+A scraped site is thousands of small Markdown files, and copying,
+symlinking or scanning them is dominated by per-file syscalls, especially
+on network filesystems. A corpus packs the whole folder into one SQLite file
+(``<topic>.corpus``): a listing of documents (name, source URL, size, hash,
+mtime) indexed by name and URL, and the zlib-compressed bodies in a separate
+table keyed by hash, so identical pages are stored once. Listing and lookups
+never touch page data; a body is only read and decompressed when asked for.
+A corpus can be exported back to a directory tree at any time.
+
+Usage:
+    docs-corpus pack ~/Documentation/docs-central/shadcn
+    docs-corpus ls ~/Documentation/docs-central/shadcn.corpus
+    docs-corpus cat ~/Documentation/docs-central/shadcn.corpus https://ui.shadcn.com/docs/cli
+    docs-corpus export ~/Documentation/docs-central/shadcn.corpus ./shadcn
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from pathlib import Path
+
+CORPUS_SUFFIX = ".corpus"
+SQLITE_HEADER = b"SQLite format 3\x00"
+ZLIB_LEVEL = 6
+# Written by ``Corpus.export`` into the target folder: the names it exported,
+# so a later export knows which files it may delete.
+EXPORT_MANIFEST = ".corpus-export"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS docs (
+    name TEXT PRIMARY KEY,
+    url TEXT,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS docs_url ON docs (url);
+CREATE INDEX IF NOT EXISTS docs_sha256 ON docs (sha256);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+"""
+
+
+def is_corpus(path):
+    """True when ``path`` is a corpus file."""
+    path = str(path)
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+            return False
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'docs'"
+            ).fetchone() is not None
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def find_corpus(root, topic):
+    """Return the corpus for ``topic`` under ``root`` (``<topic>.corpus``), or None."""
+    for candidate in (Path(root) / topic, Path(root) / (topic + CORPUS_SUFFIX)):
+        if is_corpus(candidate):
+            return candidate
+    return None
+
+
+def corpus_state_dir(path):
+    """Hidden directory next to a corpus where scrape-docs keeps its crawl state
+    (``docs/.shadcn.corpus.state`` for ``docs/shadcn.corpus``).
+    """
+    path = os.path.abspath(str(path))
+    return os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".state")
+
+
+def topic_name(topic):
+    """``shadcn.corpus`` -> ``shadcn``; other names are returned unchanged."""
+    return topic[:-len(CORPUS_SUFFIX)] if topic.endswith(CORPUS_SUFFIX) else topic
+
+
+def _check_name(name):
+    parts = name.split("/")
+    if (not name or name.startswith("/") or "\\" in name or "\x00" in name
+            or any(part in ("", ".", "..") for part in parts)):
+        raise ValueError(f"Invalid document name: {name!r}")
+    return name
+
+
+def _export_path(root, name):
+    """Where document ``name`` goes under ``root`` (a resolved path).
+
+    Names come from the corpus file, which may not be trustworthy, so any
+    name that would land outside ``root`` raises ValueError.
+    """
+    path = os.path.realpath(os.path.join(root, *_check_name(name).split("/")))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Document {name!r} would be written outside {root}")
+    return path
+
+
+class Corpus:
+    """Markdown documents packed into one SQLite file.
+
+    Documents are keyed by ``name``, their path relative to the docs folder
+    ("/"-separated, e.g. ``docs_cli.md``), and optionally by the URL they
+    were scraped from. Like CrawlCheckpoint, one thread at a time may use it;
+    writes are batched and flushed with ``commit()``.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = str(path)
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    # ------------------ Run Metadata ------------------ #
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    # ------------------ Reading ------------------ #
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def __contains__(self, name):
+        return self.conn.execute("SELECT 1 FROM docs WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        return (row[0] for row in self.conn.execute("SELECT name FROM docs ORDER BY name"))
+
+    def entries(self):
+        """Yield ``(name, url, size, sha256, mtime)`` for every document, by name."""
+        return iter(self.conn.execute("SELECT name, url, size, sha256, mtime FROM docs ORDER BY name").fetchall())
+
+    def lookup(self, url):
+        """Return the name of the document scraped from ``url``, or None."""
+        row = self.conn.execute("SELECT name FROM docs WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def read_bytes(self, name):
+        row = self.conn.execute(
+            "SELECT blobs.data FROM docs JOIN blobs ON blobs.sha256 = docs.sha256 WHERE docs.name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return zlib.decompress(row[0])
+
+    def read(self, name):
+        """Return one document's text. Raises KeyError if there is no such document."""
+        return self.read_bytes(name).decode("utf-8")
+
+    def read_url(self, url):
+        name = self.lookup(url)
+        if name is None:
+            raise KeyError(url)
+        return self.read(name)
+
+    # ------------------ Writing ------------------ #
+    def add(self, name, text, url=None, mtime=None):
+        """Store ``text`` as ``name``; returns False when it was already stored unchanged.
+
+        ``url`` moves to this document if another one held it. Without a
+        ``url``, the document keeps the one it had.
+        """
+        _check_name(name)
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        row = self.conn.execute("SELECT sha256, url, mtime FROM docs WHERE name = ?", (name,)).fetchone()
+        if row and row[0] == digest:
+            if url is None or row[1] == url:
+                return False
+            mtime = row[2]
+        if url is not None:
+            self.conn.execute("UPDATE docs SET url = NULL WHERE url = ? AND name != ?", (url, name))
+        elif row:
+            url = row[1]
+        self.conn.execute(
+            "INSERT OR IGNORE INTO blobs (sha256, data) VALUES (?, ?)",
+            (digest, zlib.compress(data, ZLIB_LEVEL)),
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO docs (name, url, size, sha256, mtime) VALUES (?, ?, ?, ?, ?)",
+            (name, url, len(data), digest, time.time() if mtime is None else mtime),
+        )
+        if row and row[0] != digest:
+            self._drop_blob(row[0])
+        return True
+
+    def remove(self, name):
+        row = self.conn.execute("SELECT sha256 FROM docs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        self.conn.execute("DELETE FROM docs WHERE name = ?", (name,))
+        self._drop_blob(row[0])
+
+    def _drop_blob(self, digest):
+        self.conn.execute(
+            "DELETE FROM blobs WHERE sha256 = ? AND NOT EXISTS (SELECT 1 FROM docs WHERE sha256 = ?)",
+            (digest, digest),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        if not self.readonly:
+            # Fold the write-ahead log back in so the corpus is one file again.
+            self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------ Directories ------------------ #
+    def pack(self, directory):
+        """Add every .md file below ``directory`` and drop documents whose file is
+        gone; returns ``(added, unchanged, removed)``.
+        """
+        added = unchanged = 0
+        seen = set()
+        stack = [str(directory)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        name = os.path.relpath(entry.path, directory).replace(os.sep, "/")
+                        seen.add(name)
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            text = f.read()
+                        if self.add(name, text, mtime=entry.stat().st_mtime):
+                            added += 1
+                        else:
+                            unchanged += 1
+        stale = [name for name in self if name not in seen]
+        for name in stale:
+            self.remove(name)
+        self.commit()
+        return added, unchanged, len(stale)
+
+    def export(self, directory, names=None):
+        """Write documents (all, or those in ``names``) as files under ``directory``.
+
+        Files carry the document's mtime, so a file left by an earlier export
+        with the same size and mtime is not rewritten. The exported names are
+        listed in ``EXPORT_MANIFEST`` inside ``directory``; files an earlier
+        export wrote for documents no longer in the corpus are deleted, and
+        nothing else in the folder is touched. Every name is checked before
+        anything is written; one that would escape ``directory`` raises
+        ValueError. Returns ``(written, unchanged, removed)``.
+        """
+        root = os.path.realpath(str(directory))
+        targets = [(name, _export_path(root, name), size, mtime)
+                   for name, _, size, _, mtime in self.entries()
+                   if names is None or name in names]
+        written = unchanged = 0
+        made = set()
+        for name, path, size, mtime in targets:
+            try:
+                st = os.stat(path)
+                if st.st_size == size and abs(st.st_mtime - mtime) < 1e-3:
+                    unchanged += 1
+                    continue
+            except FileNotFoundError:
+                pass
+            parent = os.path.dirname(path)
+            if parent not in made:
+                os.makedirs(parent, exist_ok=True)
+                made.add(parent)
+            with open(path, "wb") as f:
+                f.write(self.read_bytes(name))
+            os.utime(path, (mtime, mtime))
+            written += 1
+
+        os.makedirs(root, exist_ok=True)
+        manifest = os.path.join(root, EXPORT_MANIFEST)
+        try:
+            with open(manifest, "r", encoding="utf-8") as f:
+                previous = set(f.read().splitlines())
+        except FileNotFoundError:
+            previous = set()
+        removed = 0
+        for name in previous:
+            if name in self:
+                continue
+            try:
+                path = _export_path(root, name)
+                os.remove(path)
+            except (ValueError, FileNotFoundError, IsADirectoryError):
+                continue
+            removed += 1
+            # Drop folders the export emptied, up to (not including) the root.
+            parent = os.path.dirname(path)
+            while parent != root:
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
+        exported = {name for name in previous if name in self}
+        exported.update(name for name, _, _, _ in targets)
+        with open(manifest + ".tmp", "w", encoding="utf-8") as f:
+            f.write("".join(name + "\n" for name in sorted(exported)))
+        os.replace(manifest + ".tmp", manifest)
+        return written, unchanged, removed
+
+
+# ------------------ Main CLI ------------------ #
+def main():
+    parser = argparse.ArgumentParser(description="Pack scraped docs into a single-file corpus, or read one back.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack = commands.add_parser("pack", help="Pack a folder of .md files into a corpus")
+    pack.add_argument("folder", help="Docs folder to pack")
+    pack.add_argument("--out", help=f"Corpus file to create or update (default: <folder>{CORPUS_SUFFIX})")
+    export = commands.add_parser("export", help="Write a corpus back out as a folder of .md files")
+    export.add_argument("corpus", help="Corpus file")
+    export.add_argument("folder", help="Folder to write the files to")
+    ls = commands.add_parser("ls", help="List the documents in a corpus")
+    ls.add_argument("corpus", help="Corpus file")
+    cat = commands.add_parser("cat", help="Print one document, by name or source URL")
+    cat.add_argument("corpus", help="Corpus file")
+    cat.add_argument("document", help="Document name (e.g. docs_cli.md) or the URL it was scraped from")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        folder = args.folder.rstrip("/" + os.sep)
+        out = args.out or folder + CORPUS_SUFFIX
+        with Corpus(out) as corpus:
+            added, unchanged, removed = corpus.pack(folder)
+            total = len(corpus)
+        print(f"📦 Packed {folder} into {out}: {added} added or updated, {unchanged} unchanged, "
+              f"{removed} removed, {total} total")
+        return
+
+    if not is_corpus(args.corpus):
+        print(f"🚫 Not a corpus file: {args.corpus}")
+        sys.exit(1)
+    try:
+        with Corpus(args.corpus, readonly=True) as corpus:
+            if args.command == "export":
+                written, unchanged, removed = corpus.export(args.folder)
+                print(f"📂 Exported {args.corpus} to {args.folder}: {written} written, {unchanged} unchanged, "
+                      f"{removed} removed")
+            elif args.command == "ls":
+                for name, url, size, _, _ in corpus.entries():
+                    print(f"{size:>9}  {name}  {url or ''}".rstrip())
+            else:
+                name = args.document if args.document in corpus else corpus.lookup(args.document)
+                if name is None:
+                    print(f"🚫 No document {args.document} in {args.corpus}")
+                    sys.exit(1)
+                sys.stdout.write(corpus.read(name))
+            sys.stdout.flush()
+    except ValueError as e:
+        print(f"🚫 {e}")
+        sys.exit(1)
+    except BrokenPipeError:
+        # The reader (e.g. ``| head``) went away; silence the flush at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+
+"""
+crawler.py
+
+Reusable crawl engine behind scrape-docs.
+
+A Crawler owns everything one crawl needs (frontier, per-host limits,
+throttle retries, counters), so several crawls can run side by side in one
+process. Iterating a crawler, or ``async for`` over it, yields a CrawledPage
+for every URL as soon as it is finished. The frontier and visited set live
+in the crawl's SQLite checkpoint (a temporary one if none is given), and the
+crawl only advances as pages are consumed, so memory stays flat however large
+the site is. Where pages end up is decided by sinks: DiskSink writes the
+usual Markdown files, CorpusSink packs them into one corpus file
+(corpus.py), StdoutSink and JsonlSink (jsonl_sink.py) emit JSON records and
+CallbackSink hands pages to a function.
+
+Usage:
+    from scrapedocs.crawler import Crawler, DiskSink
+
+    with Crawler("https://docs.example.com", sinks=[DiskSink("out")]) as crawler:
+        for page in crawler:
+            print(page.status, page.url, len(page.markdown or ""))
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urljoin, urlparse
+
+from scrapedocs.browser_worker import BrowserWorkerError
+from scrapedocs.checkpoint import CrawlCheckpoint, CHECKPOINT_FILENAME, DONE, SKIPPED, FAILED
+from scrapedocs.corpus import Corpus
+from scrapedocs.http_cache import conditional_headers
+from scrapedocs.jsonl_sink import page_record
+from scrapedocs.metrics import metrics as shared_metrics, timed
+from scrapedocs.rate_limit import THROTTLE_STATUSES
+from scrapedocs.scrape import (FetchError, fetch_page, markdown_document, markdown_path, rendered_result,
+                               save_markdown)
+
+# Times a page answered with 429 / 503 is requeued within one run.
+MAX_THROTTLE_RETRIES = 3
+# Seeds queued between checkpoint commits while streaming them in.
+SEED_COMMIT_EVERY = 1000
+
+NOT_MODIFIED = "not_modified"
+
+
+class CrawledPage:
+    """One finished URL, as yielded by Crawler.
+
+    ``status`` is "done" (``markdown`` holds the converted page),
+    "not_modified" (the server answered 304; ``links`` come from the response
+    cache), "skipped" (no <main>, or a dry run) or "failed" (``error`` says
+    why). ``html_bytes`` is the size of the response and ``timings`` maps
+    stage names to seconds, as in metrics.py.
+    """
+
+    __slots__ = ("url", "depth", "status", "markdown", "links", "html_bytes", "etag",
+                 "last_modified", "rendered", "timings", "error")
+
+    def __init__(self, url, depth, status, markdown=None, links=None, html_bytes=0, etag=None,
+                 last_modified=None, rendered=False, timings=None, error=None):
+        self.url = url
+        self.depth = depth
+        self.status = status
+        self.markdown = markdown
+        self.links = links if links is not None else []
+        self.html_bytes = html_bytes
+        self.etag = etag
+        self.last_modified = last_modified
+        self.rendered = rendered
+        self.timings = timings if timings is not None else {}
+        self.error = error
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"<CrawledPage {self.status} {self.url}>"
+
+
+# ------------------ Sinks ------------------ #
+# A sink is any object with ``write(page)`` and ``close()``. ``write`` gets
+# every page with status "done" and may return the number of bytes it
+# stored. A sink that can tell whether it already holds a page implements
+# ``has(url)``; only then are conditional (ETag / Last-Modified) requests
+# sent, since a 304 carries no Markdown to write.
+
+class DiskSink:
+    """Saves pages as Markdown files in ``output_dir`` (the scrape-docs layout)."""
+
+    def __init__(self, output_dir, skip_existing=False, content_store=None):
+        self.output_dir = output_dir
+        self.skip_existing = skip_existing
+        self.content_store = content_store
+
+    def has(self, url):
+        return os.path.exists(markdown_path(url, self.output_dir))
+
+    def write(self, page):
+        return save_markdown(None, page.url, page.markdown, self.output_dir,
+                             skip_existing=self.skip_existing, content_store=self.content_store)
+
+    def close(self):
+        if self.content_store is not None:
+            self.content_store.save()
+
+
+class CorpusSink:
+    """Saves pages into a packed corpus file, under the names DiskSink would use."""
+
+    def __init__(self, path):
+        self.corpus = Corpus(path)
+
+    def has(self, url):
+        return self.corpus.lookup(url) is not None
+
+    def write(self, page):
+        text = markdown_document(page.url, page.markdown)
+        if not self.corpus.add(markdown_path(page.url, ""), text, url=page.url):
+            return 0
+        self.corpus.commit()
+        return len(text.encode("utf-8"))
+
+    def close(self):
+        self.corpus.close()
+
+
+class StdoutSink:
+    """Prints every page as a JSON record (see jsonl_sink.py) to ``stream``
+    (default: stdout), one per line. JsonlSink adds files, rotation and gzip.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def write(self, page):
+        line = json.dumps(page_record(page), ensure_ascii=False) + "\n"
+        self.stream.write(line)
+        self.stream.flush()
+        return len(line.encode("utf-8"))
+
+    def close(self):
+        self.stream.flush()
+
+
+class CallbackSink:
+    """Calls ``callback(page)`` for every page."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, page):
+        self.callback(page)
+
+    def close(self):
+        pass
+
+
+# ------------------ Crawler ------------------ #
+class HostLimiter:
+    """Caps the number of in-flight requests per host across crawl workers."""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+
+class Crawler:
+    """Crawls a docs site from ``start_url`` with a bounded pool of fetch workers.
+
+    Pages are taken from the checkpoint's queue, shallowest first. Workers
+    only fetch and convert; the queue, sinks and caches are driven by the
+    thread iterating the crawler. When ``checkpoint`` holds state from an
+    earlier run, the crawl continues from it instead of ``start_url``. With a
+    ``response_cache``, pages the sinks already hold are re-requested
+    conditionally and unchanged pages keep their cached links. ``seeds``
+    (any iterable, e.g. a generator over a sitemap) are streamed into the
+    queue at depth 0 alongside ``start_url`` when a fresh crawl starts; seeds
+    in ``unchanged`` (a collection of URLs, or a predicate) are marked
+    skipped instead of fetched. With a ``renderer`` (a BrowserWorker),
+    pages whose static HTML is an empty app shell are re-fetched in the
+    browser; both kinds share the queue and sinks. If the browser cannot be
+    started, such pages are skipped for the rest of the crawl. With ``sanitize``, junk
+    lines are stripped on the fetch workers; ``pruner`` drops boilerplate
+    subtrees before conversion. Stage timings and counters go to ``metrics``
+    (default: the shared registry in metrics.py).
+
+    Breaking out of the iteration puts pages still in flight back in the
+    queue, so iterating again (or ``--resume``) carries on from there. Call
+    ``close()``, or use the crawler as a context manager, to flush the sinks
+    and drop the temporary checkpoint.
+    """
+
+    def __init__(self, base_url, start_url="/", sinks=None, base_netloc=None, headers=None,
+                 proxy_pool=None, limit=None, verbose=False, follow_links=True, rate_limiter=None,
+                 scraperapi_config=None, dry_run=False, max_depth=None, restrict_path=None,
+                 concurrency=8, per_host_concurrency=8, checkpoint=None, response_cache=None,
+                 parser="html.parser", main_only=False, seeds=None, unchanged=None, renderer=None,
+                 render_timeout=60000, sanitize=False, pruner=None, metrics=None):
+        self.base_url = base_url
+        self.start_url = start_url
+        self.sinks = list(sinks or [])
+        self.base_netloc = base_netloc or urlparse(base_url).netloc
+        self.headers = headers
+        self.proxy_pool = proxy_pool
+        self.limit = limit
+        self.verbose = verbose
+        self.follow_links = follow_links
+        self.rate_limiter = rate_limiter
+        self.scraperapi_config = scraperapi_config
+        self.dry_run = dry_run
+        self.max_depth = max_depth
+        self.restrict_path = restrict_path
+        self.concurrency = concurrency
+        self.response_cache = response_cache
+        self.parser = parser
+        self.main_only = main_only
+        self.seeds = seeds if seeds is not None else ()
+        self.unchanged = unchanged if callable(unchanged) else set(unchanged or ()).__contains__
+        self.renderer = renderer
+        # Set once the renderer fails to start; pages that need it are then skipped.
+        self.renderer_error = None
+        self.render_timeout = render_timeout
+        self.sanitize = sanitize
+        self.pruner = pruner
+        self.metrics = metrics if metrics is not None else shared_metrics
+
+        self._state_dir = None
+        if checkpoint is None:
+            self._state_dir = tempfile.mkdtemp(prefix="scrapedocs-crawl-")
+            checkpoint = CrawlCheckpoint(os.path.join(self._state_dir, CHECKPOINT_FILENAME))
+        self.checkpoint = checkpoint
+        self.host_limiter = HostLimiter(per_host_concurrency)
+        self.throttle_retries = {}
+        self.stats = {DONE: 0, NOT_MODIFIED: 0, SKIPPED: 0, FAILED: 0}
+        # Pages counted against ``limit``; None until the queue is seeded.
+        self._started = None
+        self._closed = False
+
+    # ------------------ Iteration ------------------ #
+    def __iter__(self):
+        return self.pages()
+
+    def pages(self):
+        """Yield a CrawledPage for every URL as it finishes."""
+        if self._started is None:
+            self._seed()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while True:
+                    self._submit(executor, pending)
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page = self._finish(future, pending)
+                        if page is not None:
+                            yield page
+                    self._commit()
+            finally:
+                # Pages not started yet go back to the queue and no longer count
+                # against ``limit``. Fetches and renders already running can't
+                # be stopped, so their results are recorded rather than
+                # fetched again on the next run.
+                for future, (full_url, depth, _, rendered) in list(pending.items()):
+                    if not rendered and future.cancel():
+                        del pending[future]
+                        self._started -= 1
+                        self.checkpoint.requeue(full_url, depth)
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish(future, pending, render=False)
+                self._commit()
+
+    async def __aiter__(self):
+        """Async iteration: the crawl is driven from a helper thread, one page per await."""
+        loop = asyncio.get_running_loop()
+        pages = self.pages()
+        end = object()
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            try:
+                while True:
+                    page = await loop.run_in_executor(runner, next, pages, end)
+                    if page is end:
+                        return
+                    yield page
+            finally:
+                await loop.run_in_executor(runner, pages.close)
+
+    def run(self):
+        """Crawl to the end, feeding every page to the sinks; returns ``stats``."""
+        for _ in self.pages():
+            pass
+        return self.stats
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for sink in self.sinks:
+            sink.close()
+        if self._state_dir is not None:
+            self.checkpoint.close()
+            shutil.rmtree(self._state_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------ Frontier ------------------ #
+    def _seed(self):
+        finished, queued = self.checkpoint.resume()
+        if finished or queued:
+            print(f"♻️  Resuming crawl: {finished} pages done, {queued} queued")
+        else:
+            self.checkpoint.enqueue(urljoin(self.base_url, self.start_url), 0)
+            for n, seed_url in enumerate(self.seeds, 1):
+                if self.unchanged(seed_url):
+                    self.checkpoint.mark_skipped(seed_url, 0)
+                else:
+                    self.checkpoint.enqueue(seed_url, 0)
+                if n % SEED_COMMIT_EVERY == 0:
+                    self._commit()
+            self._commit()
+        self._started = finished
+
+    def _submit(self, executor, pending):
+        """Start queued pages until ``concurrency`` are in flight or ``limit`` is reached."""
+        while len(pending) < self.concurrency:
+            batch = self.checkpoint.next_queued(self.concurrency - len(pending))
+            if not batch:
+                return
+            for full_url, depth in batch:
+                if self.limit is not None and self._started >= self.limit:
+                    return
+                if self.max_depth is not None and depth > self.max_depth:
+                    self.checkpoint.mark_skipped(full_url, depth)
+                    continue
+                self._started += 1
+                self.checkpoint.mark_fetching(full_url, depth)
+                cached = None
+                if self.response_cache is not None and self._stored(full_url):
+                    cached = self.response_cache.get(full_url)
+                cache_headers = conditional_headers(cached) if cached else None
+                future = executor.submit(self._work, full_url, cache_headers)
+                pending[future] = (full_url, depth, cached, False)
+
+    def _stored(self, full_url):
+        return bool(self.sinks) and all(hasattr(sink, "has") and sink.has(full_url) for sink in self.sinks)
+
+    def _work(self, full_url, cache_headers):
+        """Fetch and convert one page; runs on a worker thread."""
+        timings = {}
+        with self.host_limiter.slot(full_url), timed(timings, "page"):
+            return fetch_page(full_url, self.base_netloc, headers=self.headers,
+                              proxy_pool=self.proxy_pool, verbose=self.verbose,
+                              rate_limiter=self.rate_limiter,
+                              scraperapi_config=self.scraperapi_config, dry_run=self.dry_run,
+                              restrict_path=self.restrict_path, cache_headers=cache_headers,
+                              parser=self.parser, main_only=self.main_only,
+                              detect_spa=self.renderer is not None, sanitize=self.sanitize,
+                              pruner=self.pruner, timings=timings)
+
+    def _commit(self):
+        self.checkpoint.commit()
+        if self.response_cache is not None:
+            self.response_cache.commit()
+
+    # ------------------ Results ------------------ #
+    def _finish(self, future, pending, render=True):
+        """Record one completed fetch or render; returns its CrawledPage, or
+        None when the page went back to the queue or on to the browser.
+        Without ``render``, pages that need the browser go back to the queue.
+        """
+        full_url, depth, cached, rendered = pending.pop(future)
+        metrics = self.metrics
+        try:
+            result = future.result()
+            if rendered:
+                metrics.count("rendered")
+                result = rendered_result(result, full_url, self.base_netloc, self.restrict_path)
+        except FetchError as e:
+            if e.retries:
+                metrics.count("retries", e.retries)
+            if (e.status in THROTTLE_STATUSES
+                    and self.throttle_retries.get(full_url, 0) < MAX_THROTTLE_RETRIES):
+                # Throttled: the rate limiter has backed off, so try again later.
+                self.throttle_retries[full_url] = self.throttle_retries.get(full_url, 0) + 1
+                metrics.observe_timings(e.timings)
+                metrics.count("retries")
+                self._started -= 1
+                self.checkpoint.requeue(full_url, depth)
+                return None
+            error = f"HTTP {e.status}" if e.status else "fetch failed"
+            return self._failed(full_url, depth, error, e.timings)
+        except Exception as e:
+            print(f"⚠️ Error while crawling {full_url}: {e}")
+            return self._failed(full_url, depth, str(e))
+
+        if result is None:
+            self.checkpoint.mark_skipped(full_url, depth)
+            return self._record(CrawledPage(full_url, depth, SKIPPED))
+        if result["retries"]:
+            metrics.count("retries", result["retries"])
+        metrics.count("bytes_downloaded", result["bytes"])
+
+        if result.get("needs_render"):
+            metrics.observe_timings(result["timings"])
+            if not render:
+                self._started -= 1
+                self.checkpoint.requeue(full_url, depth)
+                return None
+            if self.renderer_error is None:
+                try:
+                    # Render through the proxy the static fetch used, so the browser
+                    # goes out the same way.
+                    proxy_type = self.proxy_pool.proxy_type if self.proxy_pool is not None else "http"
+                    render_future = self.renderer.submit(full_url, base_url=self.base_url,
+                                                         proxy=result.get("proxy"), proxy_type=proxy_type,
+                                                         timeout=self.render_timeout)
+                except BrowserWorkerError as e:
+                    # The worker could not start; don't retry it for every shell page.
+                    print(f"⚠️ Browser rendering is unavailable, skipping pages that need it: {e}")
+                    self.renderer_error = str(e)
+            if self.renderer_error is not None:
+                self.checkpoint.mark_skipped(full_url, depth)
+                return self._record(CrawledPage(full_url, depth, SKIPPED,
+                                                error=f"needs rendering: {self.renderer_error}"))
+            pending[render_future] = (full_url, depth, None, True)
+            return None
+
+        page = CrawledPage(full_url, depth, DONE, markdown=result["markdown"], links=result["links"],
+                           html_bytes=result["bytes"], etag=result["etag"],
+                           last_modified=result["last_modified"], rendered=rendered,
+                           timings=result["timings"])
+        if result["not_modified"]:
+            metrics.count("pages")
+            metrics.count("not_modified")
+            page.status = NOT_MODIFIED
+            page.links = cached["links"] if cached else []
+            if self.response_cache is not None:
+                self.response_cache.touch(full_url)
+        elif page.markdown is None:
+            # No <main> to convert.
+            page.status = SKIPPED
+            self.checkpoint.mark_skipped(full_url, depth)
+            return self._record(page)
+        else:
+            metrics.count("pages")
+            if self.sinks:
+                with timed(page.timings, "write"):
+                    for sink in self.sinks:
+                        written = sink.write(page)
+                        if written:
+                            metrics.count("bytes_written", written)
+            if self.response_cache is not None:
+                self.response_cache.put(full_url, page.etag, page.last_modified, page.links)
+        self.checkpoint.mark_done(full_url, depth)
+
+        if self.follow_links and (self.max_depth is None or depth < self.max_depth):
+            self.checkpoint.enqueue_many((urljoin(self.base_url, href) for href in page.links), depth + 1)
+        return self._record(page)
+
+    def _failed(self, full_url, depth, error, timings=None):
+        self.metrics.count("failed")
+        self.checkpoint.mark_failed(full_url, depth)
+        return self._record(CrawledPage(full_url, depth, FAILED, timings=timings, error=error))
+
+    def _record(self, page):
+        self.metrics.observe_timings(page.timings)
+        self.stats[page.status] += 1
+        if self.response_cache is not None and page.status != FAILED:
+            self.response_cache.confirm_lastmod(page.url)
+        return page
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+http_cache.py
+
+On-disk response metadata cache for incremental re-scrapes.
+
+For every page that was converted, the cache keeps the ETag / Last-Modified
+validators the server sent and the links extracted from the page. The next run
+sends them back as If-None-Match / If-Modified-Since; on a 304 the crawler
+reuses the stored links and leaves the Markdown on disk untouched. It also
+remembers each page's sitemap <lastmod> so --sitemap-lastmod can skip pages
+that have not changed since the last run. A lastmod read from the sitemap is
+held as pending until its page has been scraped, so an interrupted run keeps
+the lastmods of the pages it finished.
+"""
+
+import json
+import sqlite3
+import time
+
+HTTP_CACHE_FILENAME = ".http-cache.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    links TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sitemap_lastmod (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sitemap_pending (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT NOT NULL
+);
+"""
+
+
+class ResponseCache:
+    """SQLite-backed map of URL -> (validators, extracted links).
+
+    Like CrawlCheckpoint, it is only touched by the thread driving the crawl;
+    workers receive validators as plain headers.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, links FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        etag, last_modified, links = row
+        return {"etag": etag, "last_modified": last_modified, "links": json.loads(links)}
+
+    def put(self, url, etag, last_modified, links):
+        if not etag and not last_modified:
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (url, etag, last_modified, links, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, json.dumps(links), time.time()),
+        )
+
+    def touch(self, url):
+        self.conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def get_lastmod(self, url):
+        """Return the sitemap <lastmod> recorded the last time ``url`` was scraped."""
+        row = self.conn.execute("SELECT lastmod FROM sitemap_lastmod WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def set_lastmod(self, url, lastmod):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sitemap_lastmod (url, lastmod) VALUES (?, ?)", (url, lastmod)
+        )
+
+    def note_lastmod(self, url, lastmod):
+        """Hold the sitemap <lastmod> for ``url`` until ``confirm_lastmod`` is called."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sitemap_pending (url, lastmod) VALUES (?, ?)", (url, lastmod)
+        )
+
+    def confirm_lastmod(self, url):
+        """``url`` has been scraped: its pending sitemap <lastmod> becomes the recorded one."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sitemap_lastmod (url, lastmod) "
+            "SELECT url, lastmod FROM sitemap_pending WHERE url = ?", (url,)
+        )
+        self.conn.execute("DELETE FROM sitemap_pending WHERE url = ?", (url,))
+
+    def lastmod_unchanged(self, url):
+        """True when ``url``'s pending sitemap <lastmod> equals the one recorded last time."""
+        return self.conn.execute(
+            "SELECT 1 FROM sitemap_pending p JOIN sitemap_lastmod l ON l.url = p.url "
+            "WHERE p.url = ? AND p.lastmod = l.lastmod", (url,)
+        ).fetchone() is not None
+
+    def clear_pending_lastmods(self):
+        self.conn.execute("DELETE FROM sitemap_pending")
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def conditional_headers(entry):
+    """Build If-None-Match / If-Modified-Since headers from a cache entry."""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -9,6 +9,7 @@ Usage:
 
 Description:
     - Copies local docs into a blank or scaffolded project under /docs
+      (folders are symlinked; packed .corpus files are exported)
     - Injects an onboarding README so Cursor AI understands the docs
     - Adds a .cursor/config.json file to guide Cursor context awareness
     - Optionally runs one or more shell commands or a script in the new project
@@ -20,6 +21,8 @@ import shutil
 import subprocess
 from pathlib import Path
 
+from scrapedocs.corpus import Corpus, find_corpus, topic_name
+
 TEMPLATE_ONBOARDING = Path(__file__).parent / "Cursor-Onboarding-Guide.md"
 CURSOR_CONFIG = Path(__file__).parent / "cursor_config.json"
 
@@ -30,14 +33,31 @@ def copy_docs(topics, source_root, dest_root, verbose=False):
 
     for topic in topics:
         src = Path(source_root) / topic
-        dst = dest_docs / topic
+        # A packed corpus (<topic>.corpus) is exported, since editors need real files.
+        corpus_path = None if src.is_dir() else find_corpus(source_root, topic)
+        dst = dest_docs / topic_name(topic)
 
-        if not src.exists():
+        if corpus_path is None and not src.exists():
             print(f"❌ Skipping {topic}: not found at {src}")
             continue
 
-        if dst.exists():
+        if dst.is_symlink():
+            dst.unlink()
+        elif dst.exists() and corpus_path is None:
             shutil.rmtree(dst)
+
+        if corpus_path is not None:
+            # Re-exporting into an earlier export only rewrites files that changed.
+            try:
+                with Corpus(corpus_path, readonly=True) as corpus:
+                    written, unchanged, removed = corpus.export(dst)
+            except ValueError as e:
+                print(f"❌ Skipping {topic}: {e}")
+                continue
+            if verbose:
+                print(f"📦 Exported {topic} to {dst} ({written} written, {unchanged} unchanged, {removed} removed)")
+            continue
+
         dst.symlink_to(src, target_is_directory=True)
         if verbose:
             print(f"✅ Copied {topic} to {dst}")
@@ -79,7 +99,7 @@ def run_script(script_path, cwd):
 def main():
     parser = argparse.ArgumentParser(description="Inject docs + onboarding into a new AI project")
     parser.add_argument("project", help="Path to your new project root (even if blank)")
-    parser.add_argument("--docs", nargs="+", required=True, help="Names of documentation folders to inject")
+    parser.add_argument("--docs", nargs="+", required=True, help="Names of documentation folders or .corpus files to inject")
     parser.add_argument("--from", dest="source_root", default="~/Documentation/docs-central", help="Path to centralized docs")
     parser.add_argument("--run", nargs="+", help="Command(s) to run after injection (in project root)")
     parser.add_argument("--run-script", help="Path to a shell script to run inside the project root")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+"""
+jsonl_sink.py
+
+JSON Lines output for scrape-docs.
+
+Instead of one Markdown file per page, every converted page becomes one JSON
+record (URL, title, Markdown, content hash and fetch metadata) on stdout or
+in a JSONL file, so a chunk-and-embed pipeline can consume pages while the
+crawl is still running, without a directory walk. Files can be rotated by
+size and gzip-compressed.
+"""
+
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+from scrapedocs.content_store import sha256
+
+ATX_HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.+?)(?:\s+#+)?$")
+SETEXT_UNDERLINE_PATTERN = re.compile(r"^(=+|-{2,})$")
+GZIP_LEVEL = 6
+
+
+def markdown_title(markdown, url):
+    """Return the first heading in ``markdown``, or the URL path when there is none."""
+    previous = ""
+    for line in markdown.split("\n"):
+        line = line.strip()
+        match = ATX_HEADING_PATTERN.match(line)
+        if match:
+            return match.group(1)
+        if previous and SETEXT_UNDERLINE_PATTERN.match(line):
+            return previous
+        previous = line
+    return urlparse(url).path or "Home"
+
+
+def page_record(page):
+    """The JSON record for one CrawledPage."""
+    return {
+        "url": page.url,
+        "title": markdown_title(page.markdown, page.url),
+        "markdown": page.markdown,
+        "sha256": sha256(page.markdown),
+        "depth": page.depth,
+        "rendered": page.rendered,
+        "html_bytes": page.html_bytes,
+        "etag": page.etag,
+        "last_modified": page.last_modified,
+        "fetched_at": round(time.time(), 3),
+        "timings": {stage: round(seconds, 6) for stage, seconds in page.timings.items()},
+    }
+
+
+class JsonlSink:
+    """Crawler sink that writes one JSON record per page to ``path``.
+
+    ``path`` "-" means stdout. With ``compress`` (implied by a ``.gz`` path)
+    the output is gzip-compressed. With ``max_bytes`` the output is split
+    into numbered parts (``pages-00000.jsonl``, ``pages-00001.jsonl``, ...)
+    and a new part is started once the current one holds ``max_bytes`` of
+    records (before compression). Plain output is flushed after every record
+    so it can be read while the crawl runs; a gzip part is complete once the
+    next part is started or the sink is closed. With ``append`` (for resumed
+    crawls) earlier output is kept: records are added to the end of the file,
+    or to a new part after the existing ones. A URL is only written once:
+    ``seen`` holds the URLs already in the output (seed it with the pages a
+    resumed crawl finished earlier). ``files`` lists the files written so
+    far.
+    """
+
+    def __init__(self, path="-", max_bytes=None, compress=False, append=False):
+        self.compress = compress or path.endswith(".gz")
+        self.max_bytes = max_bytes
+        self.append = append
+        self.files = []
+        self.seen = set()
+        self._file = None
+        self._part = 0
+        self._part_bytes = 0
+        if path == "-":
+            if max_bytes:
+                raise ValueError("JSONL output to stdout cannot be rotated")
+            self._stdout = sys.stdout.buffer
+            self._root, self._ext = None, None
+        else:
+            self._stdout = None
+            base = path[:-3] if path.endswith(".gz") else path
+            self._root, self._ext = os.path.splitext(base)
+            self._ext = self._ext or ".jsonl"
+
+    def _open(self):
+        if self._stdout is not None:
+            self._file = (gzip.GzipFile(fileobj=self._stdout, mode="wb", compresslevel=GZIP_LEVEL)
+                          if self.compress else self._stdout)
+            return
+        name = self._part_name()
+        if self.append and self.max_bytes:
+            while os.path.exists(name):
+                self._part += 1
+                name = self._part_name()
+        mode = "ab" if self.append else "wb"
+        os.makedirs(os.path.dirname(os.path.abspath(name)), exist_ok=True)
+        self._file = gzip.open(name, mode, compresslevel=GZIP_LEVEL) if self.compress else open(name, mode)
+        self.files.append(name)
+        self._part_bytes = 0
+
+    def _part_name(self):
+        name = self._root + (f"-{self._part:05d}" if self.max_bytes else "") + self._ext
+        return name + ".gz" if self.compress else name
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        if self._file is self._stdout:
+            self._file.flush()
+        else:
+            self._file.close()
+            if self._stdout is not None:
+                self._stdout.flush()
+        self._file = None
+
+    def has(self, url):
+        return url in self.seen
+
+    def write(self, page):
+        if page.url in self.seen:
+            return 0
+        self.seen.add(page.url)
+        data = (json.dumps(page_record(page), ensure_ascii=False) + "\n").encode("utf-8")
+        if self._file is None:
+            self._open()
+        elif self.max_bytes and self._part_bytes and self._part_bytes + len(data) > self.max_bytes:
+            self._close_file()
+            self._part += 1
+            self._open()
+        self._file.write(data)
+        self._part_bytes += len(data)
+        if not self.compress:
+            self._file.flush()
+        return len(data)
+
+    def close(self):
+        self._close_file()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+"""
+metrics.py
+
+Per-stage timing and counters for scrape runs.
+
+Every page passes through the same stages: ``rate_wait`` (waiting on the
+per-host rate limiter), ``proxy`` (picking a proxy), ``fetch``, ``parse``,
+``prune``, ``markdownify``, ``sanitize`` and ``write``. The browser adds
+``ready`` (waiting for the page to settle). Each stage gets a
+histogram with fixed buckets. Counters track pages, retries, failures and
+bytes. The Node scraper uses the same stage names, buckets and JSON layout
+(see puppeteer_scraper.js), so static and SPA runs can be compared directly.
+Reports can be written as JSON or in the Prometheus text format.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, shared with puppeteer_scraper.js.
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PROMETHEUS_PREFIX = "scrapedocs"
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds. Not thread-safe on its own."""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.bounds[-1]
+
+    def snapshot(self):
+        buckets = {}
+        cumulative = 0
+        for bound, n in zip(self.bounds + ("+Inf",), self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": _round(self.quantile(0.5)),
+            "p99": _round(self.quantile(0.99)),
+            "buckets": buckets,
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 6)
+
+
+class Metrics:
+    """Thread-safe registry of stage histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe_timings(self, timings):
+        """Record a ``{stage: seconds}`` dict, e.g. from a browser worker reply."""
+        for stage, seconds in (timings or {}).items():
+            self.observe(stage, seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started_at": self.started,
+                "elapsed_seconds": round(time.time() - self.started, 3),
+                "stages": {stage: h.snapshot() for stage, h in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_prometheus(self):
+        return format_prometheus(self.snapshot())
+
+    def write(self, path, fmt=None):
+        """Write a report to ``path`` as "json" or "prometheus" (default: by extension)."""
+        if fmt is None:
+            fmt = "prometheus" if str(path).endswith((".prom", ".txt")) else "json"
+        snapshot = self.snapshot()
+        with open(path, "w", encoding="utf-8") as f:
+            if fmt == "prometheus":
+                f.write(format_prometheus(snapshot))
+            else:
+                json.dump(snapshot, f, indent=2)
+
+    def summary(self):
+        """Return printable lines: one per stage, then the counters."""
+        snapshot = self.snapshot()
+        if not snapshot["stages"] and not snapshot["counters"]:
+            return []
+        lines = [f"{'stage':<12} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}"]
+        stages = sorted(snapshot["stages"].items(), key=lambda item: -item[1]["sum"])
+        for stage, h in stages:
+            mean = h["sum"] / h["count"] * 1000 if h["count"] else 0
+            lines.append(f"{stage:<12} {h['count']:>7} {h['sum']:>9.2f} {mean:>9.1f} "
+                         f"{(h['p50'] or 0) * 1000:>9.1f} {(h['p99'] or 0) * 1000:>9.1f}")
+        if snapshot["counters"]:
+            lines.append(", ".join(f"{name}: {value}" for name, value in sorted(snapshot["counters"].items())))
+        return lines
+
+    def print_summary(self):
+        lines = self.summary()
+        if lines:
+            print("\n📈 Stage timings:")
+            for line in lines:
+                print(f"   {line}")
+
+
+@contextmanager
+def timed(timings, stage):
+    """Add the time spent in the block to ``timings[stage]`` (a plain dict).
+
+    Used where one page's stage timings are collected on a worker thread and
+    recorded in bulk with ``Metrics.observe_timings`` later.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def format_prometheus(snapshot, prefix=PROMETHEUS_PREFIX):
+    """Render a metrics snapshot in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per page in each scrape stage.",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for stage, h in sorted(snapshot["stages"].items()):
+        for bound, cumulative in h["buckets"].items():
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h["sum"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h["count"]}')
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Shared by every module in a scrape run.
+metrics = Metrics()
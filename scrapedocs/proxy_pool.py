@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""
+proxy_pool.py
+
+Long-lived proxy pool with passive health scoring.
+
+Instead of re-validating a proxy against httpbin before every page, the pool
+learns from the outcome of real fetches: each proxy tracks its success rate,
+a latency EWMA and its consecutive failures. Proxies are picked by score;
+proxies that keep failing are quarantined with a growing cooldown and
+evicted for good after repeated quarantines.
+
+``race_proxies`` probes the best few proxies in parallel against the target
+site so a crawl can start on the fastest working one instead of waiting out
+dead proxies one timeout at a time.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scrapedocs.sessions import session_pool
+
+# Responses that usually mean the proxy's IP is blocked rather than the page
+# being missing; they count against the proxy's health score.
+PROXY_BLOCKED_STATUSES = (403, 407, 429)
+
+
+class ProxyHealth:
+    """Running health statistics for a single proxy."""
+
+    __slots__ = ("address", "successes", "failures", "consecutive_failures",
+                 "latency_ewma", "strikes", "quarantined_until", "evicted")
+
+    def __init__(self, address, latency=None):
+        self.address = address
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ewma = latency
+        self.strikes = 0
+        self.quarantined_until = 0.0
+        self.evicted = False
+
+    def success_rate(self):
+        # Laplace-smoothed so untried proxies start at 0.5 instead of 0 or 1.
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def score(self, default_latency):
+        latency = self.latency_ewma if self.latency_ewma is not None else default_latency
+        return self.success_rate() / max(latency, 0.05)
+
+
+class ProxyPool:
+    """Thread-safe, score-ranked pool of proxy addresses (``host:port``).
+
+    ``acquire()`` returns the address of a healthy proxy, or None when every
+    proxy is quarantined or evicted (callers then go direct). Report each use
+    back with ``record_success()`` / ``record_failure()``.
+    """
+
+    def __init__(self, proxies, proxy_type="http", alpha=0.3, max_consecutive_failures=3,
+                 cooldown=30.0, max_strikes=3, default_latency=1.0, latencies=None):
+        self.proxy_type = proxy_type
+        self.alpha = alpha
+        self.max_consecutive_failures = max_consecutive_failures
+        self.cooldown = cooldown
+        self.max_strikes = max_strikes
+        self.default_latency = default_latency
+        self._lock = threading.Lock()
+        latencies = latencies or {}
+        self._proxies = {p: ProxyHealth(p, latencies.get(p)) for p in proxies}
+        self._pinned = None
+
+    def __len__(self):
+        return len(self._proxies)
+
+    def as_requests_proxy(self, address):
+        """Return the ``proxies=`` mapping requests expects for ``address``."""
+        url = f"{self.proxy_type}://{address}"
+        return {"http": url, "https": url}
+
+    def _available(self, now):
+        return [h for h in self._proxies.values()
+                if not h.evicted and h.quarantined_until <= now]
+
+    def pin(self, address):
+        """Prefer ``address`` for every ``acquire()`` until it gets quarantined."""
+        with self._lock:
+            self._pinned = address if address in self._proxies else None
+
+    def acquire(self):
+        """Pick a proxy, weighted by score so load spreads over the best few."""
+        with self._lock:
+            candidates = self._available(time.monotonic())
+            pinned = self._proxies.get(self._pinned)
+            if pinned is not None and pinned in candidates:
+                return pinned.address
+            if not candidates:
+                return None
+            weights = [h.score(self.default_latency) for h in candidates]
+            return random.choices(candidates, weights=weights)[0].address
+
+    def ranked(self):
+        """Return usable proxy addresses, best score first."""
+        with self._lock:
+            candidates = self._available(time.monotonic())
+            candidates.sort(key=lambda h: h.score(self.default_latency), reverse=True)
+            return [h.address for h in candidates]
+
+    def record_success(self, address, latency):
+        with self._lock:
+            health = self._proxies.get(address)
+            if health is None:
+                return
+            health.successes += 1
+            health.consecutive_failures = 0
+            if health.latency_ewma is None:
+                health.latency_ewma = latency
+            else:
+                health.latency_ewma = self.alpha * latency + (1 - self.alpha) * health.latency_ewma
+
+    def record_failure(self, address):
+        with self._lock:
+            health = self._proxies.get(address)
+            if health is None:
+                return
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.consecutive_failures < self.max_consecutive_failures:
+                return
+            health.consecutive_failures = 0
+            health.strikes += 1
+            if health.strikes >= self.max_strikes:
+                health.evicted = True
+            else:
+                health.quarantined_until = time.monotonic() + self.cooldown * (2 ** (health.strikes - 1))
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "total": len(self._proxies),
+                "available": len(self._available(now)),
+                "quarantined": sum(1 for h in self._proxies.values()
+                                   if not h.evicted and h.quarantined_until > now),
+                "evicted": sum(1 for h in self._proxies.values() if h.evicted),
+            }
+
+
+def race_proxies(pool, probe_url, k=8, timeout=10, headers=None, on_result=None):
+    """Probe the top ``k`` proxies of ``pool`` at once; return the first that works.
+
+    Every probe is recorded in the pool (latency on success) and reported to
+    ``on_result(address, latency_or_None, error)`` when it finishes. The call
+    returns as soon as one proxy answers; probes still running then finish
+    in the background and are recorded and reported from their own thread.
+    Returns ``(address, latency)``, or ``(None, None)`` when no candidate
+    answered.
+    """
+    candidates = pool.ranked()[:k]
+    if not candidates:
+        return None, None
+
+    def probe(address):
+        started = time.monotonic()
+        res = session_pool.get(probe_url, headers=headers, timeout=timeout,
+                               proxies=pool.as_requests_proxy(address))
+        res.close()
+        if res.status_code in PROXY_BLOCKED_STATUSES or res.status_code >= 500:
+            raise RuntimeError(f"HTTP {res.status_code}")
+        return time.monotonic() - started
+
+    def record(future, address):
+        try:
+            latency = future.result()
+        except Exception as e:
+            pool.record_failure(address)
+            if on_result:
+                on_result(address, None, str(e))
+            return None
+        pool.record_success(address, latency)
+        if on_result:
+            on_result(address, latency, None)
+        return latency
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    futures = {executor.submit(probe, address): address for address in candidates}
+    winner = (None, None)
+    seen = set()
+    try:
+        for future in as_completed(futures):
+            seen.add(future)
+            address = futures[future]
+            latency = record(future, address)
+            if latency is not None:
+                winner = (address, latency)
+                break
+    finally:
+        # Every probe started at once, so the losers can't be cancelled; record
+        # them as they finish rather than dropping their results.
+        for future, address in futures.items():
+            if future not in seen:
+                future.add_done_callback(lambda f, address=address: record(f, address))
+        executor.shutdown(wait=False)
+    return winner
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+"""
+proxy_validator.py
+
+Concurrent asyncio proxy validator with a persisted, TTL-stamped health cache.
+
+Thousands of HTTP / SOCKS4 / SOCKS5 proxies are checked at once (bounded by a
+semaphore and a hard overall deadline) using raw asyncio streams, so no extra
+HTTP client dependency is needed. Each working proxy is recorded with its
+latency and anonymity level, and the ranked result is written to a cache file
+that later runs load instantly instead of re-validating.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import struct
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+TEST_URL = "http://httpbin.org/get"
+DEFAULT_CACHE_PATH = Path(os.getenv("SCRAPE_DOCS_CACHE", "~/.cache/scrape-docs")).expanduser() / "proxies.json"
+DEFAULT_TTL = 30 * 60
+MAX_RESPONSE_BYTES = 64 * 1024
+
+# Headers a proxy adds when it announces itself to the target server.
+PROXY_REVEALING_HEADERS = ("via", "x-forwarded-for", "forwarded", "x-real-ip", "proxy-connection")
+
+
+def parse_proxy_line(line, default_type="http"):
+    """Split ``socks5://1.2.3.4:1080`` or ``1.2.3.4:1080`` into (type, address)."""
+    line = line.strip()
+    if "://" in line:
+        scheme, address = line.split("://", 1)
+        return scheme.lower(), address
+    return default_type, line
+
+
+# ------------------ Raw Protocol Helpers ------------------ #
+async def _socks4_connect(reader, writer, target_ip, target_port):
+    writer.write(b"\x04\x01" + struct.pack(">H", target_port) + socket.inet_aton(target_ip) + b"\x00")
+    await writer.drain()
+    reply = await reader.readexactly(8)
+    if reply[1] != 0x5A:
+        raise ConnectionError(f"SOCKS4 request rejected ({reply[1]:#x})")
+
+
+async def _socks5_connect(reader, writer, target_host, target_port):
+    writer.write(b"\x05\x01\x00")
+    await writer.drain()
+    greeting = await reader.readexactly(2)
+    if greeting != b"\x05\x00":
+        raise ConnectionError("SOCKS5 proxy requires authentication")
+    host = target_host.encode("idna")
+    writer.write(b"\x05\x01\x00\x03" + bytes([len(host)]) + host + struct.pack(">H", target_port))
+    await writer.drain()
+    head = await reader.readexactly(4)
+    if head[1] != 0x00:
+        raise ConnectionError(f"SOCKS5 connect failed ({head[1]:#x})")
+    atyp = head[3]
+    if atyp == 0x01:
+        await reader.readexactly(4 + 2)
+    elif atyp == 0x04:
+        await reader.readexactly(16 + 2)
+    else:
+        length = (await reader.readexactly(1))[0]
+        await reader.readexactly(length + 2)
+
+
+async def _read_response(reader):
+    chunks = []
+    size = 0
+    while size < MAX_RESPONSE_BYTES:
+        chunk = await reader.read(8192)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    raw = b"".join(chunks)
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+    parts = status_line.split()
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ConnectionError(f"Malformed response: {status_line[:60]!r}")
+    return int(parts[1]), body
+
+
+async def _fetch(target, proxy_type=None, address=None, target_ip=None):
+    """GET ``target`` (a parsed URL) directly or through a proxy. Returns (status, body)."""
+    port = target.port or 80
+    path = target.path or "/"
+    if proxy_type is None:
+        reader, writer = await asyncio.open_connection(target.hostname, port)
+        request_target = path
+    else:
+        if proxy_type not in ("http", "socks4", "socks5"):
+            raise ValueError(f"Unsupported proxy type: {proxy_type}")
+        proxy_host, _, proxy_port = address.rpartition(":")
+        reader, writer = await asyncio.open_connection(proxy_host, int(proxy_port))
+        request_target = f"http://{target.netloc}{path}" if proxy_type == "http" else path
+    try:
+        if proxy_type == "socks4":
+            await _socks4_connect(reader, writer, target_ip, port)
+        elif proxy_type == "socks5":
+            await _socks5_connect(reader, writer, target.hostname, port)
+        writer.write(
+            f"GET {request_target} HTTP/1.0\r\nHost: {target.netloc}\r\n"
+            f"User-Agent: scrape-docs-proxy-check\r\nAccept: application/json\r\n\r\n".encode()
+        )
+        await writer.drain()
+        return await _read_response(reader)
+    finally:
+        writer.close()
+
+
+def _anonymity(body, real_ip):
+    try:
+        data = json.loads(body.decode("utf-8", "replace"))
+    except ValueError:
+        return "unknown"
+    if not isinstance(data, dict):
+        return "unknown"
+    if real_ip and real_ip in str(data.get("origin", "")):
+        return "transparent"
+    headers = {k.lower() for k in (data.get("headers") or {})}
+    if any(h in headers for h in PROXY_REVEALING_HEADERS):
+        return "anonymous"
+    return "elite"
+
+
+# ------------------ Validation ------------------ #
+async def check_proxy(address, proxy_type, target, timeout=5, real_ip=None, target_ip=None):
+    """Return a result dict for a working proxy, or None if it failed."""
+    started = time.monotonic()
+    try:
+        status, body = await asyncio.wait_for(_fetch(target, proxy_type, address, target_ip), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+        return None
+    if status != 200:
+        return None
+    return {
+        "address": address,
+        "type": proxy_type,
+        "latency": round(time.monotonic() - started, 3),
+        "anonymity": _anonymity(body, real_ip),
+    }
+
+
+async def _real_ip(target, timeout):
+    try:
+        _, body = await asyncio.wait_for(_fetch(target), timeout)
+        return str(json.loads(body.decode("utf-8", "replace")).get("origin", "")).split(",")[0].strip()
+    except Exception:
+        return None
+
+
+async def validate_proxies_async(proxies, proxy_type="http", concurrency=500, timeout=5,
+                                 deadline=60, test_url=TEST_URL, on_result=None):
+    """Check ``proxies`` concurrently; return working ones sorted by latency.
+
+    At most ``concurrency`` checks are in flight and the whole run is cut off
+    after ``deadline`` seconds; proxies still pending at that point count as
+    failed. ``on_result(address, result_or_None)`` is called as checks finish.
+    """
+    started = time.monotonic()
+    target = urlparse(test_url)
+    loop = asyncio.get_event_loop()
+    proxies = list(dict.fromkeys(proxies))
+    target_ip = None
+    if proxy_type == "socks4":
+        # SOCKS4 needs the target's IPv4 address; if it can't be resolved no proxy can pass.
+        try:
+            infos = await loop.getaddrinfo(target.hostname, target.port or 80, family=socket.AF_INET)
+            target_ip = infos[0][4][0]
+        except OSError:
+            if on_result:
+                for address in proxies:
+                    on_result(address, None)
+            return []
+    real_ip = await _real_ip(target, timeout)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(address):
+        async with semaphore:
+            result = await check_proxy(address, proxy_type, target, timeout, real_ip, target_ip)
+        if on_result:
+            on_result(address, result)
+        return result
+
+    tasks = [asyncio.ensure_future(run(p)) for p in proxies]
+    if not tasks:
+        return []
+    # The deadline covers the whole run, including the real-IP probe above.
+    remaining = max(0.0, deadline - (time.monotonic() - started))
+    done, pending = await asyncio.wait(tasks, timeout=remaining)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+    working = [t.result() for t in done if not t.cancelled() and t.exception() is None and t.result()]
+    working.sort(key=lambda r: r["latency"])
+    return working
+
+
+def validate_proxies(proxies, proxy_type="http", **kwargs):
+    """Blocking wrapper around ``validate_proxies_async``."""
+    return asyncio.run(validate_proxies_async(proxies, proxy_type, **kwargs))
+
+
+# ------------------ Health Cache ------------------ #
+class ProxyCache:
+    """JSON file of ranked validation results, keyed by proxy type and source."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL):
+        self.path = Path(path).expanduser()
+        self.ttl = ttl
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def key(proxy_type, source):
+        return f"{proxy_type}|{source}"
+
+    def load(self, proxy_type, source):
+        """Return cached results if they are younger than the TTL, else None."""
+        entry = self._read().get(self.key(proxy_type, source))
+        if not entry or time.time() - entry.get("validated_at", 0) > self.ttl:
+            return None
+        return entry["proxies"]
+
+    def save(self, proxy_type, source, results):
+        data = self._read()
+        data[self.key(proxy_type, source)] = {"validated_at": time.time(), "proxies": results}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def load_or_validate(source, fetch_candidates, proxy_type="http", cache=None, refresh=False,
+                     verbose=False, **kwargs):
+    """Return ranked results for ``source``, validating only on a cache miss.
+
+    ``fetch_candidates()`` is only called when the cache is empty, stale or
+    ``refresh`` is set; its lines may carry a ``scheme://`` prefix.
+    """
+    if cache is not None and not refresh:
+        cached = cache.load(proxy_type, source)
+        if cached is not None:
+            if verbose:
+                print(f"⚡ Loaded {len(cached)} cached {proxy_type.upper()} proxies for {source}")
+            return cached
+
+    candidates = []
+    for line in fetch_candidates():
+        line_type, address = parse_proxy_line(line, proxy_type)
+        if line_type == proxy_type and address:
+            candidates.append(address)
+
+    def report(address, result):
+        if verbose:
+            if result:
+                print(f"✅ Valid {proxy_type.upper()} proxy: {address} ({result['latency']:.2f}s, {result['anonymity']})")
+            else:
+                print(f"❌ Failed {proxy_type.upper()} proxy: {address}")
+
+    started = time.monotonic()
+    results = validate_proxies(candidates, proxy_type, on_result=report, **kwargs)
+    print(f"🧪 {len(results)}/{len(candidates)} {proxy_type.upper()} proxies passed "
+          f"in {time.monotonic() - started:.1f}s")
+    if cache is not None:
+        cache.save(proxy_type, source, results)
+    return results
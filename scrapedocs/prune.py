@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""
+prune.py
+
+DOM-level boilerplate pruning for scrape-docs.
+
+Docs themes put scripts, icons, breadcrumbs, "edit this page" links, prev/next
+pagers and footers inside <main>. Converting them to Markdown is wasted work
+(markdownify is the most expensive step per page) and the result only has to
+be thrown away again. The rules below are CSS selectors; every matching
+subtree is removed from the parsed tree before conversion.
+"""
+
+import re
+
+from bs4 import Tag
+
+# Selectors per docs framework. "generic" applies to any site.
+DEFAULT_PRUNE_RULES = {
+    "generic": [
+        "script", "style", "noscript", "template", "svg", "nav", "footer",
+    ],
+    "docusaurus": [
+        ".theme-edit-this-page", ".theme-last-updated", ".theme-doc-footer",
+        ".theme-doc-breadcrumbs", ".theme-doc-toc-mobile", ".pagination-nav",
+        ".hash-link", "button.clean-btn",
+    ],
+    "nextra": [
+        ".nextra-breadcrumb", ".nextra-toc", ".nextra-code-copy-btn",
+        ".nx-sr-only", "a.subheading-anchor",
+    ],
+    "mintlify": [
+        "#pagination", "#feedback", "#table-of-contents", "#footer",
+        "[data-testid='copy-code-button']",
+    ],
+    "vitepress": [
+        ".VPDocFooter", ".VPLocalNav", ".edit-link", ".prev-next",
+        ".header-anchor", "button.copy", "span.lang",
+    ],
+}
+
+# tag, tag.class, tag#id and tag[attr=value] (tag optional) are matched
+# directly; anything else goes through soupsieve, which is much slower.
+SIMPLE_SELECTOR = re.compile(
+    r"^([a-zA-Z][\w-]*)?(?:\.([\w-]+)|#([\w-]+)|\[([\w-]+)=(?:'([^']*)'|\"([^\"]*)\"|([\w-]+))\])?$"
+)
+
+
+def split_selectors(group):
+    """Split a comma-separated selector group, ignoring commas in [] and ()."""
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(group):
+        if char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append(group[start:i].strip())
+            start = i + 1
+    selectors.append(group[start:].strip())
+    return [selector for selector in selectors if selector]
+
+
+def build_prune_rules(frameworks=None, extra=None):
+    """Return the selectors for ``frameworks`` (default: all rule sets) plus
+    ``extra`` selector groups, as a list.
+    """
+    names = list(DEFAULT_PRUNE_RULES) if frameworks is None else ["generic"] + list(frameworks)
+    unknown = [name for name in names if name not in DEFAULT_PRUNE_RULES]
+    if unknown:
+        raise ValueError(f"Unknown prune rule set(s): {', '.join(unknown)} "
+                         f"(choose from {', '.join(DEFAULT_PRUNE_RULES)})")
+    selectors = []
+    for name in dict.fromkeys(names):
+        selectors.extend(DEFAULT_PRUNE_RULES[name])
+    for group in extra or []:
+        selectors.extend(split_selectors(group))
+    return selectors
+
+
+class Pruner:
+    """Removes every subtree matching a list of CSS selectors.
+
+    Raises ValueError for a selector that is not valid CSS. Safe to share
+    between threads.
+    """
+
+    def __init__(self, selectors):
+        self.selectors = list(selectors)
+        self.tags = set()
+        self.classes = {}
+        self.ids = {}
+        self.attrs = []
+        complex_selectors = []
+        for selector in self.selectors:
+            match = SIMPLE_SELECTOR.match(selector)
+            if not match or not any(match.groups()):
+                complex_selectors.append(selector)
+                continue
+            tag, cls, id_, attr = match.group(1, 2, 3, 4)
+            tag = tag.lower() if tag else None
+            if cls:
+                self.classes.setdefault(cls, set()).add(tag)
+            elif id_:
+                self.ids.setdefault(id_, set()).add(tag)
+            elif attr:
+                value = next(v for v in match.group(5, 6, 7) if v is not None)
+                self.attrs.append((tag, attr, value))
+            else:
+                self.tags.add(tag)
+        self.complex = None
+        if complex_selectors:
+            import soupsieve
+            try:
+                self.complex = soupsieve.compile(", ".join(complex_selectors))
+            except Exception as e:
+                raise ValueError(f"Invalid prune selector {', '.join(complex_selectors)!r}: {e}")
+
+    def matches(self, node):
+        name = node.name
+        if name in self.tags:
+            return True
+        attrs = node.attrs
+        if attrs:
+            for cls in attrs.get("class") or ():
+                tags = self.classes.get(cls)
+                if tags and (None in tags or name in tags):
+                    return True
+            tags = self.ids.get(attrs.get("id"))
+            if tags and (None in tags or name in tags):
+                return True
+            for tag, attr, value in self.attrs:
+                if attrs.get(attr) == value and (tag is None or tag == name):
+                    return True
+        return self.complex is not None and self.complex.match(node)
+
+    def prune(self, element):
+        """Remove matching descendants of ``element``; returns how many subtrees."""
+        matched = []
+        stack = [child for child in element.contents if isinstance(child, Tag)]
+        while stack:
+            node = stack.pop()
+            if self.matches(node):
+                matched.append(node)
+            else:
+                stack.extend(child for child in node.contents if isinstance(child, Tag))
+        for node in matched:
+            node.decompose()
+        # Re-join the text around removed nodes, as a re-parse would, so that
+        # direct conversion (--main-only) collapses whitespace the same way.
+        if matched and hasattr(element, "smooth"):
+            element.smooth()
+        return len(matched)
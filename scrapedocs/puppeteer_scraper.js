@@ -2,12 +2,15 @@ const puppeteer = require("puppeteer-extra");
 const StealthPlugin = require("puppeteer-extra-plugin-stealth");
 const fs = require("fs");
 const path = require("path");
+const readline = require("readline");
 const TurndownService = require("turndown");
 
 puppeteer.use(StealthPlugin());
 
 const turndown = new TurndownService();
 
+// scrapedocs/sanitize_docs.py implements the same rules for scrape-docs
+// --sanitize; test_sanitize_markdown.js checks that the two agree.
 function sanitizeMarkdown(md, verbose = false) {
   const lines = md.split("\n");
   const result = [];
@@ -23,7 +26,8 @@ function sanitizeMarkdown(md, verbose = false) {
     const hasBalancedBrackets = /^\s*\[.*?\]\s*$/.test(trimmed);
     const isLikelyMarkdown =
       hasBalancedBrackets ||
-      /^(\*+|#+|\d+\.|\[.*?\]\(.*?\)|```|>|-{3,}|_{3,})$/.test(trimmed) ||
+      /^(\*+|#+|\d+\.|\[.*?\]\(.*?\)|```|>|-{3,}|_{3,}|={3,})$/.test(trimmed) ||
+      /^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?$/.test(trimmed) ||
       /^[\[\(]{1,2}$/.test(trimmed);
 
     const isBrokenMarkdownLink =
@@ -34,7 +38,8 @@ function sanitizeMarkdown(md, verbose = false) {
       !isBrokenMarkdownLink &&
       (trimmed.length > 200 ||
         /!function|window\.|document\.|:where\\|--/.test(trimmed) ||
-        (trimmed.match(/[^\w\s]/g) || []).length / Math.max(trimmed.length, 1) >
+        (trimmed.match(/[^\p{L}\p{N}_\s]/gu) || []).length /
+          Math.max(trimmed.length, 1) >
           0.5);
 
     if (shouldRemove) {
@@ -47,8 +52,291 @@ function sanitizeMarkdown(md, verbose = false) {
   return result.join("\n").trim();
 }
 
-async function scrapeUrls(
+const DEFAULT_READINESS = {
+  strategies: ["network", "mutation"],
+  selector: "main, article, .content",
+  networkIdleMs: 300,
+  networkTimeout: 5000,
+  selectorTimeout: 5000,
+  quietMs: 250,
+  mutationTimeout: 5000,
+};
+
+function parseReadiness(args) {
+  const value = (name) => {
+    const arg = args.find((a) => a.startsWith(`--${name}=`));
+    return arg ? arg.slice(name.length + 3) : null;
+  };
+  const readiness = { ...DEFAULT_READINESS };
+  if (value("ready")) {
+    readiness.strategies = value("ready")
+      .split(",")
+      .map((s) => s.trim())
+      .filter(Boolean);
+  }
+  if (value("ready-selector")) readiness.selector = value("ready-selector");
+  const timeouts = {
+    "network-timeout": "networkTimeout",
+    "selector-timeout": "selectorTimeout",
+    "mutation-timeout": "mutationTimeout",
+    "quiet-ms": "quietMs",
+  };
+  Object.entries(timeouts).forEach(([flag, key]) => {
+    if (value(flag)) readiness[key] = parseInt(value(flag));
+  });
+  return readiness;
+}
+
+// Resolves once the DOM has gone `quietMs` without a mutation, or with
+// false once `timeout` expires. Runs inside the page.
+function waitForDomQuiet(quietMs, timeout) {
+  return new Promise((resolve) => {
+    let quietTimer;
+    const finish = (settled) => {
+      observer.disconnect();
+      clearTimeout(quietTimer);
+      clearTimeout(capTimer);
+      resolve(settled);
+    };
+    const observer = new MutationObserver(() => {
+      clearTimeout(quietTimer);
+      quietTimer = setTimeout(() => finish(true), quietMs);
+    });
+    observer.observe(document.documentElement, {
+      childList: true,
+      subtree: true,
+      characterData: true,
+      attributes: true,
+    });
+    quietTimer = setTimeout(() => finish(true), quietMs);
+    const capTimer = setTimeout(() => finish(false), timeout);
+  });
+}
+
+// Waits until the page looks rendered, using every strategy in
+// `readiness.strategies` at once: "network" (no requests for a moment),
+// "selector" (content selector present) and "mutation" (DOM quiescence).
+// A strategy that runs out of time does not fail the page. The time to
+// ready is recorded in `readiness.times`.
+async function waitForReady(page, url, readiness = DEFAULT_READINESS) {
+  const started = Date.now();
+  const timedOut = [];
+  const checks = {
+    network: () =>
+      page.waitForNetworkIdle({
+        idleTime: readiness.networkIdleMs,
+        timeout: readiness.networkTimeout,
+      }),
+    selector: () =>
+      page.waitForSelector(readiness.selector, {
+        timeout: readiness.selectorTimeout,
+      }),
+    mutation: async () => {
+      const settled = await page.evaluate(
+        waitForDomQuiet,
+        readiness.quietMs,
+        readiness.mutationTimeout
+      );
+      if (!settled) throw new Error("DOM still changing");
+    },
+  };
+
+  await Promise.all(
+    readiness.strategies
+      .filter((name) => checks[name])
+      .map((name) => checks[name]().catch(() => timedOut.push(name)))
+  );
+
+  const ms = Date.now() - started;
+  if (readiness.times) readiness.times.push({ url, ms, timedOut });
+  if (timedOut.length) {
+    console.log(
+      `⏱️ ${url} not ready after ${ms}ms (${timedOut.join(", ")})`
+    );
+  }
+  return ms;
+}
+
+function writeReadyTimes(outputDir, times) {
+  if (!times || times.length === 0) return;
+  const sorted = times.map((t) => t.ms).sort((a, b) => a - b);
+  const pick = (q) =>
+    sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+  const summary = {
+    pages: sorted.length,
+    p50: pick(0.5),
+    p90: pick(0.9),
+    max: sorted[sorted.length - 1],
+    timedOut: times.filter((t) => t.timedOut.length > 0).length,
+  };
+  fs.writeFileSync(
+    path.join(outputDir, "ready_times.json"),
+    JSON.stringify({ summary, pages: times }, null, 2)
+  );
+  console.log(
+    `⏱️ Time to ready: p50 ${summary.p50}ms, p90 ${summary.p90}ms, max ${summary.max}ms (${summary.timedOut} timed out)`
+  );
+}
+
+// ------------------ Stage Metrics ------------------ //
+// Same stage names, buckets and JSON / Prometheus layout as
+// scrapedocs/metrics.py, so SPA and static runs can be compared directly.
+const STAGE_BUCKETS = [
+  0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1,
+  2.5, 5, 10, 30, 60,
+];
+
+function newMetrics() {
+  return { startedAt: Date.now() / 1000, stages: {}, counters: {} };
+}
+
+const metrics = newMetrics();
+
+function observeStage(metrics, stage, seconds) {
+  let histogram = metrics.stages[stage];
+  if (!histogram) {
+    histogram = metrics.stages[stage] = {
+      count: 0,
+      sum: 0,
+      counts: new Array(STAGE_BUCKETS.length + 1).fill(0),
+    };
+  }
+  histogram.count++;
+  histogram.sum += seconds;
+  const i = STAGE_BUCKETS.findIndex((bound) => seconds <= bound);
+  histogram.counts[i === -1 ? STAGE_BUCKETS.length : i]++;
+}
+
+function countMetric(metrics, name, n = 1) {
+  metrics.counters[name] = (metrics.counters[name] || 0) + n;
+}
+
+// Runs fn and adds its duration to timings[stage] (in seconds).
+async function timeStage(timings, stage, fn) {
+  const started = process.hrtime.bigint();
+  try {
+    return await fn();
+  } finally {
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    timings[stage] = (timings[stage] || 0) + seconds;
+  }
+}
+
+function recordTimings(metrics, timings) {
+  for (const [stage, seconds] of Object.entries(timings)) {
+    observeStage(metrics, stage, seconds);
+  }
+}
+
+function stageQuantile(histogram, q) {
+  if (!histogram.count) return null;
+  const rank = q * histogram.count;
+  let cumulative = 0;
+  for (let i = 0; i < histogram.counts.length; i++) {
+    const n = histogram.counts[i];
+    if (n && cumulative + n >= rank) {
+      if (i === STAGE_BUCKETS.length) return STAGE_BUCKETS[i - 1];
+      const lower = i ? STAGE_BUCKETS[i - 1] : 0;
+      return lower + ((STAGE_BUCKETS[i] - lower) * (rank - cumulative)) / n;
+    }
+    cumulative += n;
+  }
+  return STAGE_BUCKETS[STAGE_BUCKETS.length - 1];
+}
+
+function metricsSnapshot(metrics) {
+  const round = (value) =>
+    value === null ? null : Math.round(value * 1e6) / 1e6;
+  const stages = {};
+  for (const [stage, histogram] of Object.entries(metrics.stages)) {
+    const buckets = {};
+    let cumulative = 0;
+    [...STAGE_BUCKETS, "+Inf"].forEach((bound, i) => {
+      cumulative += histogram.counts[i];
+      buckets[String(bound)] = cumulative;
+    });
+    stages[stage] = {
+      count: histogram.count,
+      sum: round(histogram.sum),
+      p50: round(stageQuantile(histogram, 0.5)),
+      p99: round(stageQuantile(histogram, 0.99)),
+      buckets,
+    };
+  }
+  return {
+    started_at: metrics.startedAt,
+    elapsed_seconds: Date.now() / 1000 - metrics.startedAt,
+    stages,
+    counters: { ...metrics.counters },
+  };
+}
+
+function formatPrometheus(snapshot, prefix = "scrapedocs") {
+  const lines = [
+    `# HELP ${prefix}_stage_seconds Time spent per page in each scrape stage.`,
+    `# TYPE ${prefix}_stage_seconds histogram`,
+  ];
+  for (const stage of Object.keys(snapshot.stages).sort()) {
+    const histogram = snapshot.stages[stage];
+    for (const [bound, cumulative] of Object.entries(histogram.buckets)) {
+      lines.push(
+        `${prefix}_stage_seconds_bucket{stage="${stage}",le="${bound}"} ${cumulative}`
+      );
+    }
+    lines.push(`${prefix}_stage_seconds_sum{stage="${stage}"} ${histogram.sum}`);
+    lines.push(
+      `${prefix}_stage_seconds_count{stage="${stage}"} ${histogram.count}`
+    );
+  }
+  for (const name of Object.keys(snapshot.counters).sort()) {
+    lines.push(`# TYPE ${prefix}_${name}_total counter`);
+    lines.push(`${prefix}_${name}_total ${snapshot.counters[name]}`);
+  }
+  return lines.join("\n") + "\n";
+}
+
+// Prometheus text for .prom / .txt files, JSON otherwise.
+function writeMetrics(file, metrics) {
+  const snapshot = metricsSnapshot(metrics);
+  const prometheus = /\.(prom|txt)$/.test(file);
+  fs.writeFileSync(
+    file,
+    prometheus ? formatPrometheus(snapshot) : JSON.stringify(snapshot, null, 2)
+  );
+  console.log(`📈 Metrics written to ${file}`);
+}
+
+function printMetricsSummary(metrics) {
+  const snapshot = metricsSnapshot(metrics);
+  const stages = Object.entries(snapshot.stages).sort(
+    (a, b) => b[1].sum - a[1].sum
+  );
+  if (stages.length === 0) return;
+  const ms = (seconds) => ((seconds || 0) * 1000).toFixed(1).padStart(9);
+  console.log("\n📈 Stage timings:");
+  console.log(
+    `   ${"stage".padEnd(12)} ${"count".padStart(7)} ${"total s".padStart(
+      9
+    )} ${"mean ms".padStart(9)} ${"p50 ms".padStart(9)} ${"p99 ms".padStart(9)}`
+  );
+  for (const [stage, h] of stages) {
+    console.log(
+      `   ${stage.padEnd(12)} ${String(h.count).padStart(7)} ${h.sum
+        .toFixed(2)
+        .padStart(9)} ${ms(h.sum / h.count)} ${ms(h.p50)} ${ms(h.p99)}`
+    );
+  }
+  const counters = Object.entries(snapshot.counters).sort();
+  if (counters.length) {
+    console.log(
+      `   ${counters.map(([name, value]) => `${name}: ${value}`).join(", ")}`
+    );
+  }
+}
+
+async function scrapePage(
   page,
+  url,
   urls,
   baseUrl,
   outputDir,
@@ -57,87 +345,172 @@ async function scrapeUrls(
   timeout,
   skipExisting,
   visited,
-  failedUrls
+  failedUrls,
+  readiness = DEFAULT_READINESS
 ) {
-  while (urls.length > 0) {
-    const url = urls.pop();
-    const cleanUrl = url.replace(/\/$/, ""); // normalize without trailing slash
-    if (visited.has(cleanUrl)) continue;
-    visited.add(cleanUrl);
+  const urlPath = new URL(url).pathname.replace(/\/$/, "");
+  const filename = urlPath.split("/").filter(Boolean).join("-") || "index";
+  const outPath = path.join(outputDir, `${filename}.md`);
 
-    const urlPath = new URL(url).pathname.replace(/\/$/, "");
-    const filename = urlPath.split("/").filter(Boolean).join("-") || "index";
-    const outPath = path.join(outputDir, `${filename}.md`);
-
-    for (let attempt = 1; attempt <= retries; attempt++) {
-      try {
-        console.log(`📄 Scraping: ${url} (Attempt ${attempt})`);
+  for (let attempt = 1; attempt <= retries; attempt++) {
+    if (attempt > 1) countMetric(metrics, "retries");
+    const timings = {};
+    const started = process.hrtime.bigint();
+    try {
+      console.log(`📄 Scraping: ${url} (Attempt ${attempt})`);
+      await timeStage(timings, "fetch", async () => {
         await page.goto(url, { waitUntil: "domcontentloaded", timeout });
         await page.waitForSelector("body", { timeout: 5000 });
-        await page.waitForTimeout(3000);
+      });
+      await timeStage(timings, "ready", () =>
+        waitForReady(page, url, readiness)
+      );
 
-        const html = await page.content();
-        let markdown = turndown.turndown(html);
-        markdown = sanitizeMarkdown(markdown, false);
+      const html = await timeStage(timings, "parse", () => page.content());
+      let markdown = await timeStage(timings, "markdownify", () =>
+        turndown.turndown(html)
+      );
+      markdown = await timeStage(timings, "sanitize", () =>
+        sanitizeMarkdown(markdown, false)
+      );
 
-        if (!html || html.length < 1000) {
-          throw new Error(
-            "Page content appears too short or failed to load properly."
-          );
-        }
+      if (!html || html.length < 1000) {
+        throw new Error(
+          "Page content appears too short or failed to load properly."
+        );
+      }
+      countMetric(metrics, "bytes_downloaded", Buffer.byteLength(html));
 
-        if (skipExisting && fs.existsSync(outPath)) {
-          console.log(`⏩ Skipping save for already scraped: ${url}`);
-        } else {
-          fs.writeFileSync(outPath, markdown);
-        }
+      if (skipExisting && fs.existsSync(outPath)) {
+        console.log(`⏩ Skipping save for already scraped: ${url}`);
+      } else {
+        await timeStage(timings, "write", () =>
+          fs.writeFileSync(outPath, markdown)
+        );
+        countMetric(metrics, "bytes_written", Buffer.byteLength(markdown));
+      }
 
-        const links = await page.$$eval(
+      const links = await timeStage(timings, "parse", () =>
+        page.$$eval(
           "a",
           (as, baseUrl) =>
             as
               .map((a) => a.href.split("#")[0])
               .filter((href) => href.startsWith(baseUrl)),
           baseUrl
-        );
+        )
+      );
+      countMetric(metrics, "pages");
 
-        links.forEach((link) => {
-          const cleanLink = link.replace(/\/$/, "");
-          const filename = slugify(cleanLink);
-          const outPath = path.join(outputDir, `${filename}.md`);
+      links.forEach((link) => {
+        const cleanLink = link.replace(/\/$/, "");
+        const filename = slugify(cleanLink);
+        const outPath = path.join(outputDir, `${filename}.md`);
 
-          if (!visited.has(cleanLink) && cleanLink.startsWith(baseUrl)) {
-            if (!skipExisting || !fs.existsSync(outPath)) {
-              urls.push(cleanLink);
-            } else {
-              console.log(`✅ Already scraped: ${cleanLink}`);
-            }
+        if (!visited.has(cleanLink) && cleanLink.startsWith(baseUrl)) {
+          if (!skipExisting || !fs.existsSync(outPath)) {
+            urls.push(cleanLink);
+          } else {
+            console.log(`✅ Already scraped: ${cleanLink}`);
           }
-        });
-
-        break; // success
-      } catch (err) {
-        if (err.message.toLowerCase().includes("tunnel")) {
-          throw err;
         }
+      });
 
-        console.warn(
-          `⚠️ Failed to scrape ${url} (Attempt ${attempt}): ${err.message}`
+      return; // success
+    } catch (err) {
+      if (err.message.toLowerCase().includes("tunnel")) {
+        throw err;
+      }
+
+      console.warn(
+        `⚠️ Failed to scrape ${url} (Attempt ${attempt}): ${err.message}`
+      );
+      if (attempt === retries) {
+        console.error(`❌ Giving up on ${url}`);
+        countMetric(metrics, "failed");
+        failedUrls.push(url);
+      } else {
+        await new Promise((res) => setTimeout(res, delay));
+      }
+    } finally {
+      timings.page = Number(process.hrtime.bigint() - started) / 1e9;
+      recordTimings(metrics, timings);
+    }
+  }
+}
+
+// Every page in `pages` runs its own worker loop over the shared `urls`
+// frontier. A worker that finds the frontier empty waits while others are
+// still loading pages, since they may push new links.
+async function scrapeUrls(
+  pages,
+  urls,
+  baseUrl,
+  outputDir,
+  retries,
+  delay,
+  timeout,
+  skipExisting,
+  visited,
+  failedUrls,
+  readiness = DEFAULT_READINESS
+) {
+  let active = 0;
+  let stopped = false;
+  let waiters = [];
+  const wakeAll = () => {
+    waiters.forEach((resolve) => resolve());
+    waiters = [];
+  };
+
+  async function worker(page) {
+    while (!stopped) {
+      if (urls.length === 0) {
+        if (active === 0) break;
+        await new Promise((resolve) => waiters.push(resolve));
+        continue;
+      }
+
+      const url = urls.pop();
+      const cleanUrl = url.replace(/\/$/, ""); // normalize without trailing slash
+      if (visited.has(cleanUrl)) continue;
+      visited.add(cleanUrl);
+
+      active++;
+      try {
+        await scrapePage(
+          page,
+          url,
+          urls,
+          baseUrl,
+          outputDir,
+          retries,
+          delay,
+          timeout,
+          skipExisting,
+          visited,
+          failedUrls,
+          readiness
         );
-        if (attempt === retries) {
-          console.error(`❌ Giving up on ${url}`);
-          failedUrls.push(url);
-        } else {
-          await new Promise((res) => setTimeout(res, delay));
-        }
+      } catch (err) {
+        stopped = true;
+        throw err;
+      } finally {
+        active--;
+        wakeAll();
       }
     }
+    wakeAll();
   }
 
-  if (failedUrls.length > 0) {
-    const failLogPath = path.join(outputDir, "failed_urls.txt");
-    fs.writeFileSync(failLogPath, failedUrls.join("\n"));
-    console.log(`📝 Failed URLs logged to ${failLogPath}`);
+  try {
+    await Promise.all(pages.map((page) => worker(page)));
+  } finally {
+    if (failedUrls.length > 0) {
+      const failLogPath = path.join(outputDir, "failed_urls.txt");
+      fs.writeFileSync(failLogPath, failedUrls.join("\n"));
+      console.log(`📝 Failed URLs logged to ${failLogPath}`);
+    }
   }
 }
 
@@ -148,10 +521,7 @@ function slugify(url) {
   );
 }
 
-async function getLinks(url, page, selector, timeout) {
-  await page.goto(url, { waitUntil: "domcontentloaded", timeout });
-  await page.waitForTimeout(3000);
-
+async function extractNavLinks(page, selector) {
   return await page.evaluate((selector) => {
     const anchors = Array.from(document.querySelectorAll(selector));
     return anchors.map((a) => ({
@@ -161,6 +531,22 @@ async function getLinks(url, page, selector, timeout) {
   }, selector);
 }
 
+async function getLinks(
+  url,
+  page,
+  selector,
+  timeout,
+  readiness = DEFAULT_READINESS
+) {
+  await page.goto(url, { waitUntil: "domcontentloaded", timeout });
+  await waitForReady(page, url, readiness);
+  return await extractNavLinks(page, selector);
+}
+
+function normalizeHref(href) {
+  return href.split("#")[0].replace(/\/$/, "");
+}
+
 function filterByOrigin(links, baseUrl) {
   return links.filter((link) => isSameDomain(link.href, baseUrl));
 }
@@ -174,6 +560,10 @@ function isSameDomain(url, baseUrl) {
   );
 }
 
+// Walks the sidebar by clicking through it in one tab. Every page is loaded
+// exactly once: the nav links of the page just scraped extend a set-backed
+// frontier, so collapsible sections that only render on their parent page
+// are still discovered without re-visiting anything.
 async function scrapeViaClicks(
   page,
   baseUrl,
@@ -182,11 +572,14 @@ async function scrapeViaClicks(
   delay,
   timeout,
   skipExisting,
-  navSelector = ".sidebar a"
+  navSelector = ".sidebar a",
+  readiness = DEFAULT_READINESS
 ) {
-  const visited = new Set();
+  const queued = new Set();
   const visitedPrevious = new Set();
+  const frontier = [];
   const failed = [];
+  let loads = 0;
 
   // Only add existing files to visited if skipExisting is true
   if (skipExisting) {
@@ -205,77 +598,226 @@ async function scrapeViaClicks(
     existingFiles.forEach((url) => visitedPrevious.add(url));
   }
 
-  let links = filterByOrigin(
-    await getLinks(baseUrl, page, navSelector, timeout),
-    baseUrl
-  );
+  const addLinks = (links) => {
+    for (const link of filterByOrigin(links, baseUrl)) {
+      const href = normalizeHref(link.href);
+      if (queued.has(href)) continue;
+      queued.add(href);
+      frontier.push(href);
+    }
+  };
 
-  while (links.length > 0) {
-    const link = links.shift();
-    const href = link.href;
+  addLinks(await getLinks(baseUrl, page, navSelector, timeout, readiness));
+  loads++;
 
-    if (visited.has(href)) {
-      console.log(`✅ Already scraped: ${href}`);
-      continue;
-    }
-    visited.add(href);
-    links = [
-      ...links,
-      ...filterByOrigin(await getLinks(href, page, navSelector), baseUrl),
-    ];
-    if (visitedPrevious.has(href)) {
-      console.log(`✅ Already scraped in the past: ${href}`);
-      continue;
-    }
+  for (let i = 0; i < frontier.length; i++) {
+    const href = frontier[i];
+    // Pages saved by an earlier run are still loaded, since their nav links
+    // may lead to pages not reached any other way; only the write is skipped.
+    const previous = visitedPrevious.has(href);
 
     for (let attempt = 1; attempt <= retries; attempt++) {
+      if (attempt > 1) countMetric(metrics, "retries");
+      const timings = {};
+      const started = process.hrtime.bigint();
       try {
-        console.log(`🖱️ Clicking and scraping: ${href} (Attempt ${attempt})`);
-        await page.evaluate((targetHref) => {
-          const link = Array.from(document.querySelectorAll("a[href]")).find(
-            (a) => new URL(a.href, location.origin).href === targetHref
+        if (attempt > 1 || normalizeHref(page.url()) !== href) {
+          console.log(`🖱️ Clicking and scraping: ${href} (Attempt ${attempt})`);
+          // Prefer client-side navigation; fall back to a full load when the
+          // link is not in the current DOM or a click already failed.
+          await timeStage(timings, "fetch", async () => {
+            const clicked =
+              attempt === 1 &&
+              (await page.evaluate((targetHref) => {
+                const clean = (href) =>
+                  href.split("#")[0].replace(/\/$/, "");
+                const link = Array.from(
+                  document.querySelectorAll("a[href]")
+                ).find(
+                  (a) =>
+                    clean(new URL(a.href, location.origin).href) === targetHref
+                );
+                if (link) link.click();
+                return Boolean(link);
+              }, href));
+            if (!clicked) {
+              await page.goto(href, { waitUntil: "domcontentloaded", timeout });
+            }
+          });
+          loads++;
+          await timeStage(timings, "ready", () =>
+            waitForReady(page, href, readiness)
           );
-          if (link) link.click();
-        }, href);
-
-        await page.waitForTimeout(3000);
-        await page.waitForSelector("main, .content, article, div.flex", {
-          timeout: 5000,
-        });
-
-        const html = await page.content();
-        let markdown = turndown.turndown(html);
-        markdown = sanitizeMarkdown(markdown, false);
-        const filename = slugify(href);
-        const outPath = path.join(outputDir, `${filename}.md`);
-
-        if (!html || html.length < 1000) {
-          throw new Error("Page content too short");
+        } else {
+          console.log(`📄 Scraping loaded page: ${href}`);
         }
 
-        if (skipExisting && fs.existsSync(outPath)) {
-          console.log(`⏩ Skipping existing: ${href}`);
+        await timeStage(timings, "ready", () =>
+          page.waitForSelector("main, .content, article, div.flex", {
+            timeout: 5000,
+          })
+        );
+
+        if (previous) {
+          console.log(`✅ Already scraped in the past: ${href}`);
         } else {
-          fs.writeFileSync(outPath, markdown);
+          const html = await timeStage(timings, "parse", () => page.content());
+          let markdown = await timeStage(timings, "markdownify", () =>
+            turndown.turndown(html)
+          );
+          markdown = await timeStage(timings, "sanitize", () =>
+            sanitizeMarkdown(markdown, false)
+          );
+          const filename = slugify(href);
+          const outPath = path.join(outputDir, `${filename}.md`);
+
+          if (!html || html.length < 1000) {
+            throw new Error("Page content too short");
+          }
+          countMetric(metrics, "bytes_downloaded", Buffer.byteLength(html));
+
+          if (skipExisting && fs.existsSync(outPath)) {
+            console.log(`⏩ Skipping existing: ${href}`);
+          } else {
+            await timeStage(timings, "write", () =>
+              fs.writeFileSync(outPath, markdown)
+            );
+            countMetric(metrics, "bytes_written", Buffer.byteLength(markdown));
+          }
+          countMetric(metrics, "pages");
         }
 
+        addLinks(
+          await timeStage(timings, "parse", () =>
+            extractNavLinks(page, navSelector)
+          )
+        );
         break;
       } catch (err) {
         console.warn(
           `⚠️ Failed to click/scrape ${href} (Attempt ${attempt}): ${err.message}`
         );
-        if (attempt === retries) failed.push(href);
-        else await new Promise((res) => setTimeout(res, delay));
+        if (attempt === retries) {
+          countMetric(metrics, "failed");
+          failed.push(href);
+        } else await new Promise((res) => setTimeout(res, delay));
+      } finally {
+        timings.page = Number(process.hrtime.bigint() - started) / 1e9;
+        recordTimings(metrics, timings);
       }
     }
   }
 
+  console.log(
+    `🧭 Click navigation: ${queued.size} nav links, ${loads} page loads`
+  );
+
   if (failed.length > 0) {
     fs.writeFileSync("failed_clicks.txt", failed.join("\n"));
     console.log(`❌ Some pages failed via click: logged to failed_clicks.txt`);
   }
 }
 
+// ------------------ Network Rules ------------------ //
+const DEFAULT_BLOCKING = {
+  types: ["image", "stylesheet", "font", "media"],
+  urls: [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "segment.com",
+    "segment.io",
+    "hotjar.com",
+    "mixpanel.com",
+    "plausible.io",
+    "clarity.ms",
+    "connect.facebook.net",
+    "intercom.io",
+    "widget.intercom.io",
+    "youtube.com/embed",
+    "player.vimeo.com",
+  ],
+};
+
+// Reads --block-types / --block-urls (comma-separated, an empty value turns
+// that rule off) and --user-data-dir for a persistent browser profile.
+function parseBrowserOptions(args) {
+  const value = (name) => {
+    const arg = args.find((a) => a.startsWith(`--${name}=`));
+    return arg ? arg.slice(name.length + 3) : null;
+  };
+  const list = (text) =>
+    text
+      .split(",")
+      .map((s) => s.trim())
+      .filter(Boolean);
+  const blocking = { ...DEFAULT_BLOCKING };
+  if (value("block-types") !== null) {
+    blocking.types = list(value("block-types"));
+  }
+  if (value("block-urls") !== null) {
+    blocking.urls = list(value("block-urls"));
+  }
+  return { blocking, userDataDir: value("user-data-dir") };
+}
+
+function newNetworkStats() {
+  return { requests: 0, cached: 0, blocked: 0 };
+}
+
+function addNetworkStats(total, stats) {
+  total.requests += stats.requests;
+  total.cached += stats.cached;
+  total.blocked += stats.blocked;
+}
+
+function formatNetworkStats(stats) {
+  const rate = stats.requests
+    ? Math.round((100 * stats.cached) / stats.requests)
+    : 0;
+  return `📦 ${stats.requests} responses, ${stats.cached} from browser cache (${rate}%), ${stats.blocked} requests blocked`;
+}
+
+async function setupPage(
+  page,
+  auth,
+  blocking = DEFAULT_BLOCKING,
+  stats = newNetworkStats()
+) {
+  await page.setUserAgent(
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+  );
+  await page.setExtraHTTPHeaders({ "Accept-Language": "en-US,en;q=0.9" });
+  if (auth) await page.authenticate(auth);
+
+  page.on("error", (err) => {
+    console.error("🔥 Page crashed:", err);
+    throw new Error("Page crashed");
+  });
+
+  await page.setRequestInterception(true);
+  // Interception must not turn the HTTP cache off, or bundles are refetched.
+  await page.setCacheEnabled(true);
+  page.on("request", (req) => {
+    const url = req.url();
+    if (
+      blocking.types.includes(req.resourceType()) ||
+      blocking.urls.some((pattern) => url.includes(pattern))
+    ) {
+      stats.blocked++;
+      req.abort();
+    } else {
+      req.continue();
+    }
+  });
+  page.on("response", (res) => {
+    stats.requests++;
+    if (res.fromCache()) stats.cached++;
+  });
+
+  return page;
+}
+
 async function scrapeSite(
   baseUrl,
   outputDir,
@@ -288,8 +830,16 @@ async function scrapeSite(
   skipExisting = false,
   retryFailedOnly = false,
   clickNav = false,
-  navSelector = ".sidebar a"
+  navSelector = ".sidebar a",
+  concurrency = 1,
+  readiness = DEFAULT_READINESS,
+  browserOptions = {},
+  metricsOut = null
 ) {
+  readiness = { ...readiness, times: [] };
+  const blocking = browserOptions.blocking || DEFAULT_BLOCKING;
+  const networkStats = newNetworkStats();
+
   async function launchAndScrape(useProxy = true) {
     const launchArgs = ["--no-sandbox", "--disable-setuid-sandbox"];
     let proxyHost = null;
@@ -318,43 +868,36 @@ async function scrapeSite(
       headless: headless ? "new" : false,
       protocolTimeout: 60000,
       args: launchArgs,
+      userDataDir: browserOptions.userDataDir || undefined,
     });
-    const context = await browser.createIncognitoBrowserContext();
-    const page = await context.newPage();
-
-    await page.setUserAgent(
-      "Mozilla/5.0 (Macintosh; Intel Mac OS X 13_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
-    );
-    await page.setExtraHTTPHeaders({ "Accept-Language": "en-US,en;q=0.9" });
-    if (auth) await page.authenticate(auth);
-
-    page.on("error", (err) => {
-      console.error("🔥 Page crashed:", err);
-      throw new Error("Page crashed");
-    });
-
-    await page.setRequestInterception(true);
-    page.on("request", (req) => {
-      if (["image", "stylesheet", "font"].includes(req.resourceType())) {
-        req.abort();
-      } else {
-        req.continue();
-      }
-    });
+    // A persistent profile keeps its disk cache only in the default context.
+    const context = browserOptions.userDataDir
+      ? browser.defaultBrowserContext()
+      : await browser.createIncognitoBrowserContext();
+    // Click navigation follows the sidebar in a single tab.
+    const pageCount = clickNav ? 1 : Math.max(1, concurrency);
+    const pages = [];
+    for (let i = 0; i < pageCount; i++) {
+      pages.push(
+        await setupPage(await context.newPage(), auth, blocking, networkStats)
+      );
+    }
+    if (pageCount > 1) console.log(`🗂️ Scraping with ${pageCount} tabs`);
 
     fs.mkdirSync(outputDir, { recursive: true });
 
     try {
       if (clickNav) {
         await scrapeViaClicks(
-          page,
+          pages[0],
           baseUrl,
           outputDir,
           retries,
           delay,
           timeout,
           skipExisting,
-          navSelector
+          navSelector,
+          readiness
         );
       } else {
         const visited = new Set();
@@ -366,7 +909,7 @@ async function scrapeSite(
               .filter(Boolean)
           : [baseUrl];
         await scrapeUrls(
-          page,
+          pages,
           toVisit,
           baseUrl,
           outputDir,
@@ -375,7 +918,8 @@ async function scrapeSite(
           timeout,
           skipExisting,
           visited,
-          failedUrls
+          failedUrls,
+          readiness
         );
       }
     } catch (error) {
@@ -391,6 +935,10 @@ async function scrapeSite(
     }
 
     await browser.close();
+    writeReadyTimes(outputDir, readiness.times);
+    console.log(formatNetworkStats(networkStats));
+    printMetricsSummary(metrics);
+    if (metricsOut) writeMetrics(metricsOut, metrics);
     console.log("✅ Done scraping.");
   }
 
@@ -401,8 +949,207 @@ async function scrapeSite(
   }
 }
 
+// ------------------ Worker Mode ------------------ //
+// `--worker` keeps one browser alive and reads scrape jobs as JSON lines on
+// stdin: {id, url, baseUrl, proxy, proxyType, timeout}. Each job is answered
+// on stdout with {id, ok, url, markdown, links, readyMs, network, bytes,
+// timings} or {id, ok: false, error, network, timings}, where timings holds
+// the seconds spent per stage (see Stage Metrics). Jobs run concurrently; the caller decides how many are in flight.
+// Log output goes to stderr so stdout only carries the protocol.
+
+const MAX_PROXY_CONTEXTS = 8;
+
+function parseProxy(proxy, proxyType = "http") {
+  if (!proxy) return { server: null, auth: null };
+  let host = proxy;
+  let auth = null;
+  if (proxy.includes("@")) {
+    const [creds, proxyHost] = proxy.split("@");
+    const [username, password] = creds.split(":");
+    auth = { username, password };
+    host = proxyHost;
+  }
+  return { server: `${proxyType}://${host}`, auth };
+}
+
+async function runWorker(
+  headless,
+  readiness = DEFAULT_READINESS,
+  browserOptions = {}
+) {
+  const blocking = browserOptions.blocking || DEFAULT_BLOCKING;
+  const send = (message) =>
+    process.stdout.write(JSON.stringify(message) + "\n");
+  console.log = console.error;
+  process.on("uncaughtException", (err) =>
+    console.error("🔥 Worker error:", err.message)
+  );
+
+  const browser = await puppeteer.launch({
+    headless: headless ? "new" : false,
+    protocolTimeout: 60000,
+    args: ["--no-sandbox", "--disable-setuid-sandbox"],
+    userDataDir: browserOptions.userDataDir || undefined,
+  });
+
+  // One incognito context per proxy, least recently used first. Direct jobs
+  // use the persistent profile's default context when there is one. The map
+  // holds the creation promise, so concurrent jobs for a proxy share one
+  // context instead of each creating (and leaking) their own.
+  const contexts = new Map();
+  async function contextFor(server) {
+    const key = server || "direct";
+    let entry = contexts.get(key);
+    if (entry) {
+      contexts.delete(key);
+    } else if (!server && browserOptions.userDataDir) {
+      const ready = Promise.resolve(browser.defaultBrowserContext());
+      entry = { ready, pages: 0, keep: true };
+    } else {
+      const ready = browser.createIncognitoBrowserContext(
+        server ? { proxyServer: server } : {}
+      );
+      entry = { ready, pages: 0 };
+    }
+    contexts.set(key, entry);
+    entry.pages++;
+    for (const [oldKey, old] of contexts) {
+      if (contexts.size <= MAX_PROXY_CONTEXTS) break;
+      if (old.pages === 0 && !old.keep && oldKey !== key) {
+        contexts.delete(oldKey);
+        old.ready.then((context) => context.close()).catch(() => {});
+      }
+    }
+    try {
+      entry.context = await entry.ready;
+    } catch (err) {
+      entry.pages--;
+      if (contexts.get(key) === entry) contexts.delete(key);
+      throw err;
+    }
+    return entry;
+  }
+
+  async function runJob(job) {
+    const { server, auth } = parseProxy(job.proxy, job.proxyType);
+    let entry = null;
+    let page = null;
+    const network = newNetworkStats();
+    const timings = {};
+    const started = process.hrtime.bigint();
+    const elapsed = () => {
+      timings.page = Number(process.hrtime.bigint() - started) / 1e9;
+      return timings;
+    };
+    try {
+      entry = await contextFor(server);
+      page = await setupPage(
+        await entry.context.newPage(),
+        auth,
+        blocking,
+        network
+      );
+      const timeout = job.timeout || 30000;
+      await timeStage(timings, "fetch", async () => {
+        await page.goto(job.url, { waitUntil: "domcontentloaded", timeout });
+        await page.waitForSelector("body", { timeout: 5000 });
+      });
+      const readyMs = await timeStage(timings, "ready", () =>
+        waitForReady(page, job.url, readiness)
+      );
+
+      const html = await timeStage(timings, "parse", () => page.content());
+      if (!html || html.length < 1000) {
+        throw new Error(
+          "Page content appears too short or failed to load properly."
+        );
+      }
+      const converted = await timeStage(timings, "markdownify", () =>
+        turndown.turndown(html)
+      );
+      const markdown = await timeStage(timings, "sanitize", () =>
+        sanitizeMarkdown(converted, false)
+      );
+      const links = await timeStage(timings, "parse", () =>
+        page.$$eval(
+          "a",
+          (as, baseUrl) =>
+            as
+              .map((a) => a.href.split("#")[0])
+              .filter((href) => href.startsWith(baseUrl)),
+          job.baseUrl || job.url
+        )
+      );
+      send({
+        id: job.id,
+        ok: true,
+        url: page.url(),
+        markdown,
+        links,
+        readyMs,
+        network,
+        bytes: Buffer.byteLength(html),
+        timings: elapsed(),
+      });
+    } catch (err) {
+      send({
+        id: job.id,
+        ok: false,
+        error: err.message,
+        network,
+        timings: elapsed(),
+      });
+    } finally {
+      if (entry) entry.pages--;
+      if (page) await page.close().catch(() => {});
+    }
+  }
+
+  const pending = new Set();
+  const input = readline.createInterface({ input: process.stdin });
+  input.on("line", (line) => {
+    if (!line.trim()) return;
+    let job;
+    try {
+      job = JSON.parse(line);
+    } catch (err) {
+      send({ id: null, ok: false, error: `Bad job: ${err.message}` });
+      return;
+    }
+    // Every job gets a reply, even if something outside runJob's own
+    // handling throws, so the Python side never waits on it forever.
+    const task = runJob(job)
+      .catch((err) => {
+        console.error("🔥 Worker error:", err.message);
+        send({ id: job.id, ok: false, error: err.message });
+      })
+      .finally(() => pending.delete(task));
+    pending.add(task);
+  });
+  input.on("close", async () => {
+    await Promise.allSettled([...pending]);
+    await browser.close();
+    process.exit(0);
+  });
+
+  send({ ready: true });
+}
+
 if (require.main === module) {
   const args = process.argv.slice(2);
+
+  if (args.includes("--worker")) {
+    runWorker(
+      !args.includes("--headless=false"),
+      parseReadiness(args),
+      parseBrowserOptions(args)
+    ).catch((err) => {
+      console.error("❌ Worker failed to start:", err.message);
+      process.exit(1);
+    });
+    return;
+  }
+
   const url = args[0];
   const outDir = args[1];
 
@@ -416,6 +1163,8 @@ if (require.main === module) {
   const clickNav = args.includes("--click-nav");
   const skipExisting = args.includes("--skip-existing");
   const navSelectorArg = args.find((arg) => arg.startsWith("--nav-selector="));
+  const concurrencyArg = args.find((arg) => arg.startsWith("--concurrency="));
+  const metricsOutArg = args.find((arg) => arg.startsWith("--metrics-out="));
 
   const retries = retriesArg ? parseInt(retriesArg.split("=")[1]) : 3;
   const delay = delayArg ? parseInt(delayArg.split("=")[1]) : 2000;
@@ -425,10 +1174,18 @@ if (require.main === module) {
   const navSelector = navSelectorArg
     ? navSelectorArg.split("=")[1]
     : ".sidebar a";
+  const concurrency = concurrencyArg
+    ? parseInt(concurrencyArg.split("=")[1])
+    : 1;
+  const readiness = parseReadiness(args);
+  const browserOptions = parseBrowserOptions(args);
+  const metricsOut = metricsOutArg
+    ? metricsOutArg.slice("--metrics-out=".length)
+    : null;
 
   if (!url || !outDir) {
     console.error(
-      "Usage: node puppeteer_scraper.js <url> <outputDir> [--headless=false] [--retries=N] [--delay=MS] [--timeout=MS] [--proxy=ip:port] [--proxy-type=http|socks4|socks5] [--skip-existing] [--retry-failed] [--click-nav] [--nav-selector='selector']"
+      "Usage: node puppeteer_scraper.js <url> <outputDir> [--headless=false] [--retries=N] [--delay=MS] [--timeout=MS] [--proxy=ip:port] [--proxy-type=http|socks4|socks5] [--skip-existing] [--retry-failed] [--click-nav] [--nav-selector='selector'] [--concurrency=N] [--ready=network,selector,mutation] [--ready-selector='selector'] [--network-timeout=MS] [--selector-timeout=MS] [--mutation-timeout=MS] [--quiet-ms=MS] [--block-types=image,font,...] [--block-urls=pattern,...] [--user-data-dir=DIR] [--metrics-out=FILE]"
     );
     process.exit(1);
   }
@@ -445,9 +1202,14 @@ if (require.main === module) {
     skipExisting,
     retryFailedOnly,
     clickNav,
-    navSelector
+    navSelector,
+    concurrency,
+    readiness,
+    browserOptions,
+    metricsOut
   );
 }
 
 module.exports = scrapeSite;
 module.exports.sanitizeMarkdown = sanitizeMarkdown;
+module.exports.waitForReady = waitForReady;
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""
+rate_limit.py
+
+Adaptive per-host politeness for the concurrent crawler.
+
+Each host gets a token bucket whose refill rate adapts AIMD-style: it grows
+additively while the server answers cleanly and is halved on 429 / 503.
+Without a starting rate a host is not throttled at all until its first 429 /
+503, which sets the rate from the pace achieved so far. ``Retry-After``
+pauses the host outright, and a robots.txt ``Crawl-delay`` caps the rate. Workers reserve a token before each request and sleep outside
+the lock, so many threads can share one limiter.
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds for a Retry-After header value, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class TokenBucket:
+    """Token bucket whose rate can change on the fly; a ``rate`` of None means
+    unlimited. Not thread-safe on its own.
+    """
+
+    def __init__(self, rate, burst, max_rate):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.started = self.updated
+        self.requests = 0
+        self.throttled = 0
+
+    def reserve(self, now):
+        """Take a token and return how long the caller must wait before using it."""
+        if self.rate is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        self.requests += 1
+        if self.rate is None:
+            self.tokens = self.burst
+            return max(0.0, self.paused_until - now)
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.paused_until - now)
+
+
+class HostRateLimiter:
+    """Per-host token buckets with additive-increase / multiplicative-decrease.
+
+    With ``rate=None`` (the default) hosts run unthrottled until they first
+    answer 429 / 503.
+    """
+
+    def __init__(self, rate=None, min_rate=0.1, max_rate=50.0, increase=0.25, decrease=0.5, burst=2):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, self.max_rate)
+        return bucket
+
+    def set_crawl_delay(self, host, delay):
+        """Cap ``host`` at one request per ``delay`` seconds (robots.txt Crawl-delay)."""
+        if not delay or delay <= 0:
+            return
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.max_rate = min(bucket.max_rate, 1.0 / delay)
+            bucket.rate = bucket.max_rate if bucket.rate is None else min(bucket.rate, bucket.max_rate)
+            bucket.burst = 1
+
+    def acquire(self, url):
+        """Block until a request to ``url``'s host is allowed."""
+        host = urlparse(url).netloc
+        with self._lock:
+            wait = self._bucket(host).reserve(time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def observe(self, url, status, retry_after=None):
+        """Adapt the host's rate to a response status (and Retry-After header)."""
+        host = urlparse(url).netloc
+        with self._lock:
+            bucket = self._bucket(host)
+            if status in THROTTLE_STATUSES:
+                now = time.monotonic()
+                bucket.throttled += 1
+                if bucket.rate is None:
+                    # First throttle on an unthrottled host: start from the pace it
+                    # was actually getting, then back off from there.
+                    achieved = bucket.requests / max(now - bucket.started, 1e-6)
+                    bucket.rate = min(bucket.max_rate, achieved)
+                    bucket.tokens = 0
+                # Requests already in flight all see the same overload; back off
+                # once per round-trip instead of once per response.
+                if now - bucket.last_decrease >= max(1.0 / bucket.rate, 1.0):
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                    bucket.last_decrease = now
+                bucket.tokens = min(bucket.tokens, 0)
+                delay = parse_retry_after(retry_after)
+                if delay:
+                    bucket.paused_until = max(bucket.paused_until, now + delay)
+            elif status < 400 and bucket.rate is not None:
+                bucket.rate = min(bucket.max_rate, bucket.rate + self.increase)
+
+    def observe_response(self, url, res):
+        self.observe(url, res.status_code, res.headers.get("Retry-After"))
+
+    def stats(self):
+        """Return ``{host: {...}}`` with request counts and effective vs. current rate."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                host: {
+                    "requests": b.requests,
+                    "throttled": b.throttled,
+                    "effective_rate": round(b.requests / max(now - b.started, 1e-6), 2),
+                    "current_rate": None if b.rate is None else round(b.rate, 2),
+                }
+                for host, b in self._buckets.items()
+            }
+
+
+def load_crawl_delay(base_url, session, user_agent="*", headers=None, timeout=10):
+    """Return the robots.txt Crawl-delay for ``user_agent`` at ``base_url``, or None."""
+    parser = RobotFileParser()
+    try:
+        res = session.get(urljoin(base_url, "/robots.txt"), headers=headers, timeout=timeout)
+        if res.status_code != 200:
+            return None
+        parser.parse(res.text.splitlines())
+        delay = parser.crawl_delay(user_agent)
+        return float(delay) if delay is not None else None
+    except Exception:
+        return None
@@ -1,45 +1,279 @@
 import os
 import re
+import json
+import hashlib
 import click
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapedocs.corpus import Corpus, is_corpus
+
+# Bump whenever the garbage-line rules change so every file is re-checked.
+SANITIZER_VERSION = "2"
+MANIFEST_FILENAME = ".sanitize-manifest.json"
+
+# These rules mirror sanitizeMarkdown in puppeteer_scraper.js; keep them in
+# sync (test_sanitize_markdown.js checks both against the same cases).
+ZERO_WIDTH_PATTERN = re.compile("[\u200b\u200c\u200d\u2060]")
+GARBAGE_PATTERN = re.compile(r"!function|window\.|document\.|:where\\|--")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+BRACKETED_PATTERN = re.compile(r"^\s*\[.*?\]\s*$")
+MARKDOWN_TOKEN_PATTERN = re.compile(r"^(\*+|#+|\d+\.|\[.*?\]\(.*?\)|```|>|-{3,}|_{3,}|={3,})$")
+TABLE_DELIMITER_PATTERN = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)+\|?$")
+OPEN_BRACKETS_PATTERN = re.compile(r"^[\[\(]{1,2}$")
+LINK_TAIL_PATTERN = re.compile(r"^\s*\]\(.*?\)")
+
+# Below this many files to check, a process pool costs more than it saves.
+MIN_PARALLEL_FILES = 64
+# Corpus documents are read and sanitized this many at a time.
+CORPUS_BATCH = 512
+
+
+def is_garbage_line(line):
+    line = line.strip()
+    if len(line) > 200:
+        return True
+    if GARBAGE_PATTERN.search(line):
+        return True
+    non_alpha_ratio = len(PUNCTUATION_PATTERN.findall(line)) / max(len(line), 1)
+    return non_alpha_ratio > 0.5
+
+
+def is_markdown_syntax(trimmed):
+    """True for lines that are punctuation-heavy but legitimate Markdown."""
+    return bool(
+        BRACKETED_PATTERN.match(trimmed)
+        or MARKDOWN_TOKEN_PATTERN.match(trimmed)
+        or TABLE_DELIMITER_PATTERN.match(trimmed)
+        or OPEN_BRACKETS_PATTERN.match(trimmed)
+    )
+
+
+def iter_clean_lines(lines, on_remove=None):
+    """Yield the lines worth keeping from an iterable of Markdown lines.
+
+    Lines are handled one at a time with a single line of lookahead (for
+    links split across lines), so a page never has to be held twice.
+    Removed lines are passed to ``on_remove``.
+    """
+    lines = iter(lines)
+    line = next(lines, None)
+    while line is not None:
+        following = next(lines, None)
+        line = ZERO_WIDTH_PATTERN.sub("", line)
+        trimmed = line.strip()
+        split_link = (BRACKETED_PATTERN.match(trimmed)
+                      and LINK_TAIL_PATTERN.match(ZERO_WIDTH_PATTERN.sub("", following or "").strip()))
+        if is_markdown_syntax(trimmed) or split_link or not is_garbage_line(trimmed):
+            yield line
+        elif on_remove is not None:
+            on_remove(line)
+        line = following
+
+
+def sanitize_markdown(markdown, on_remove=None):
+    """Python twin of ``sanitizeMarkdown``: drop leaked JS/CSS and junk lines."""
+    return "\n".join(iter_clean_lines(markdown.split("\n"), on_remove=on_remove)).strip()
+
+
+def sanitize_text(text):
+    """Return ``(cleaned_text, removed_lines)`` for one Markdown document."""
+    removed = []
+    cleaned = "\n".join(iter_clean_lines(text.splitlines(), on_remove=removed.append)).strip()
+    return cleaned, removed
+
+
+def sanitize_file(filepath, dry_run=False, known_sha256=None):
+    """Sanitize one file in place.
+
+    Runs in a worker process. A file whose hash matches ``known_sha256`` (it
+    was clean last run and only its mtime moved) is not re-sanitized. Returns
+    ``(filepath, changed, removed_lines, manifest_entry)``, where the entry
+    describes the file as left on disk.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    changed, removed = False, []
+    if digest != known_sha256:
+        text = data.decode("utf-8")
+        cleaned_text, removed = sanitize_text(text)
+        changed = cleaned_text != "\n".join(text.splitlines()).strip()
+        if changed and not dry_run:
+            data = (cleaned_text + "\n").encode("utf-8")
+            with open(filepath, "wb") as f:
+                f.write(data)
+            digest = hashlib.sha256(data).hexdigest()
+    st = os.stat(filepath)
+    entry = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest}
+    return filepath, changed, [line[:80] for line in removed], entry
+
+
+def iter_markdown(root):
+    """Yield ``(path, stat)`` for every .md file below ``root``."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md") and entry.is_file():
+                    yield entry.path, entry.stat()
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != SANITIZER_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, files):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": SANITIZER_VERSION, "files": files}, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def sanitize_document(text):
+    """Sanitize one corpus document in a worker process.
+
+    Returns ``(cleaned_text, removed_lines)``; ``cleaned_text`` is None when
+    the document was already clean.
+    """
+    cleaned_text, removed = sanitize_text(text)
+    if cleaned_text == "\n".join(text.splitlines()).strip():
+        return None, [line[:80] for line in removed]
+    return cleaned_text + "\n", [line[:80] for line in removed]
+
+
+def sanitize_corpus(path, dry_run=False, verbose=False, jobs=None, force=False):
+    """Sanitize the documents of a packed corpus (see corpus.py) in place.
+
+    Works like the directory mode: documents recorded as clean under this
+    version of the rules (by hash, in the corpus itself) are skipped without
+    being read. Returns ``(cleaned, checked, unchanged)``.
+    """
+    with Corpus(path, readonly=dry_run) as corpus:
+        known = {}
+        if not force:
+            try:
+                manifest = json.loads(corpus.get_meta(MANIFEST_FILENAME) or "{}")
+            except ValueError:
+                manifest = {}
+            if manifest.get("version") == SANITIZER_VERSION:
+                known = manifest.get("files", {})
+        files = {}
+        todo = []
+        for name, _, _, digest, _ in corpus.entries():
+            if known.get(name) == digest:
+                files[name] = digest
+            else:
+                todo.append((name, digest))
+        unchanged = len(files)
+
+        cleaned = 0
+        jobs = jobs or os.cpu_count() or 1
+        executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and len(todo) >= MIN_PARALLEL_FILES else None
+        try:
+            for start in range(0, len(todo), CORPUS_BATCH):
+                batch = todo[start:start + CORPUS_BATCH]
+                texts = [corpus.read(name) for name, _ in batch]
+                if executor is not None:
+                    results = executor.map(sanitize_document, texts, chunksize=64)
+                else:
+                    results = map(sanitize_document, texts)
+                for (name, digest), (cleaned_text, removed) in zip(batch, results):
+                    if verbose:
+                        for line in removed:
+                            click.echo(f"🗑 Removed: {line}... from {name}")
+                    if cleaned_text is None:
+                        files[name] = digest
+                        continue
+                    cleaned += 1
+                    if not dry_run:
+                        corpus.add(name, cleaned_text)
+                        files[name] = hashlib.sha256(cleaned_text.encode("utf-8")).hexdigest()
+                if not dry_run:
+                    corpus.commit()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if not dry_run:
+            corpus.set_meta(MANIFEST_FILENAME, json.dumps({"version": SANITIZER_VERSION, "files": files},
+                                                          separators=(",", ":")))
+    return cleaned, len(todo), unchanged
+
 
 @click.command()
-@click.option('--path', '-p', required=True, type=click.Path(exists=True, file_okay=False), help='Directory to scan for .md files')
+@click.option('--path', '-p', required=True, type=click.Path(exists=True), help='Directory to scan for .md files, or a packed .corpus file')
 @click.option('--dry-run', is_flag=True, default=False, help='Preview changes without overwriting files')
 @click.option('--verbose', is_flag=True, default=False, help='Show cleaned files and line removals')
-def sanitize_docs(path, dry_run, verbose):
-    """Smart sanitizer: removes embedded JS/CSS and junk from markdown files."""
-    md_files = Path(path).rglob("*.md")
+@click.option('--jobs', '-j', type=int, default=None, help='Worker processes (default: number of CPUs)')
+@click.option('--force', is_flag=True, default=False, help='Re-check every file, ignoring the manifest of already-clean files')
+def sanitize_docs(path, dry_run, verbose, jobs, force):
+    """Smart sanitizer: removes embedded JS/CSS and junk from markdown files.
+
+    Files already sanitized by this version of the rules and untouched since
+    (same size and mtime, recorded in .sanitize-manifest.json) are skipped
+    without being read. The rest are processed in parallel. A packed corpus
+    (see docs-corpus) is sanitized in place the same way.
+    """
+    if os.path.isfile(path):
+        if not is_corpus(path):
+            raise click.BadParameter(f"{path} is neither a directory nor a docs corpus", param_hint="--path")
+        cleaned, checked, unchanged = sanitize_corpus(path, dry_run=dry_run, verbose=verbose, jobs=jobs, force=force)
+        click.echo(f"✅ Sanitized {cleaned} document(s) in {path}{' (dry-run)' if dry_run else ''}"
+                   f" — {checked} checked, {unchanged} unchanged since last run")
+        return
+
+    manifest_path = os.path.join(path, MANIFEST_FILENAME)
+    known = {} if force else load_manifest(manifest_path)
+    files = {}
+    todo = []
+    todo_hashes = []
+    unchanged = 0
+    for filepath, st in iter_markdown(path):
+        rel_path = os.path.relpath(filepath, path)
+        entry = known.get(rel_path)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            files[rel_path] = entry
+            unchanged += 1
+        else:
+            todo.append(filepath)
+            todo_hashes.append(entry["sha256"] if entry and entry["size"] == st.st_size else None)
+
     cleaned = 0
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(todo) >= MIN_PARALLEL_FILES:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(sanitize_file, todo, [dry_run] * len(todo), todo_hashes, chunksize=64)
+    else:
+        executor = None
+        results = map(sanitize_file, todo, [dry_run] * len(todo), todo_hashes)
+
+    try:
+        for filepath, changed, removed, entry in results:
+            if verbose:
+                for line in removed:
+                    click.echo(f"🗑 Removed: {line}... from {os.path.basename(filepath)}")
+            if changed:
+                cleaned += 1
+            if not (changed and dry_run):
+                files[os.path.relpath(filepath, path)] = entry
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not dry_run:
+        save_manifest(manifest_path, files)
 
-    def is_garbage_line(line):
-        if len(line) > 200:
-            return True
-        if re.search(r"!function|window\.|document\.|:where\\|--", line):
-            return True
-        non_alpha_ratio = len(re.findall(r"[^\w\s]", line)) / max(len(line), 1)
-        return non_alpha_ratio > 0.5
-
-    for file in md_files:
-        lines = file.read_text(encoding='utf-8').splitlines()
-        original = lines[:]
-        cleaned_lines = []
-
-        for line in lines:
-            if is_garbage_line(line):
-                if verbose:
-                    click.echo(f"🗑 Removed: {line[:80]}... from {file.name}")
-                continue
-            cleaned_lines.append(line)
-
-        cleaned_text = "\n".join(cleaned_lines).strip()
-
-        if cleaned_text != "\n".join(original).strip():
-            if not dry_run:
-                file.write_text(cleaned_text + "\n", encoding='utf-8')
-            cleaned += 1
-
-    click.echo(f"✅ Sanitized {cleaned} markdown file(s) in {path}{' (dry-run)' if dry_run else ''}")
+    click.echo(f"✅ Sanitized {cleaned} markdown file(s) in {path}{' (dry-run)' if dry_run else ''}"
+               f" — {len(todo)} checked, {unchanged} unchanged since last run")
 
 if __name__ == '__main__':
     sanitize_docs()
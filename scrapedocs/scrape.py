@@ -2,17 +2,32 @@
 
 import os
 import requests
-import random
 import time
 import argparse
 import json
+import sys
 from urllib.parse import urljoin, urlparse, quote_plus
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from markdownify import markdownify as md, MarkdownConverter
 from dotenv import load_dotenv
 from pathlib import Path
 import shutil
 
+from scrapedocs.sessions import session_pool, format_stats
+from scrapedocs.proxy_pool import ProxyPool, PROXY_BLOCKED_STATUSES
+from scrapedocs.browser_worker import BrowserWorker
+from scrapedocs.rate_limit import HostRateLimiter, load_crawl_delay
+from scrapedocs.content_store import ContentStore
+from scrapedocs.jsonl_sink import JsonlSink
+from scrapedocs.corpus import corpus_state_dir
+from scrapedocs.sanitize_docs import sanitize_markdown
+from scrapedocs.metrics import metrics, timed
+from scrapedocs.prune import DEFAULT_PRUNE_RULES, Pruner, build_prune_rules, split_selectors
+from scrapedocs.sitemap import discover_sitemaps, iter_sitemap
+from scrapedocs.proxy_validator import ProxyCache, DEFAULT_CACHE_PATH, load_or_validate
+from scrapedocs.checkpoint import CrawlCheckpoint, CHECKPOINT_FILENAME, DONE
+from scrapedocs.http_cache import ResponseCache, HTTP_CACHE_FILENAME
+
 # ------------------ Env Bootstrap ------------------ #
 def ensure_env_file():
     example_path = Path(".env.example")
@@ -20,19 +35,17 @@ def ensure_env_file():
 
     if not actual_path.exists() and example_path.exists():
         shutil.copy(example_path, actual_path)
-        print("📄 Created .env from .env.example — please fill in your ScraperAPI key.")
+        print("📄 Created .env from .env.example — please fill in your ScraperAPI key.", file=sys.stderr)
 
 def validate_scraperapi_key():
     api_key = os.getenv("SCRAPERAPI_KEY")
     if not api_key or "your_api_key_here" in api_key.lower():
-        print("⚠️  Warning: SCRAPERAPI_KEY is not set or still contains a placeholder. ScraperAPI requests may fail.")
-
-visited = set()
+        print("⚠️  Warning: SCRAPERAPI_KEY is not set or still contains a placeholder. ScraperAPI requests may fail.", file=sys.stderr)
 
 # ------------------ Proxy Utils ------------------ #
 def fetch_proxies_from_api(api_url, proxy_type, limit=None, verbose=False):
     try:
-        res = requests.get(api_url, timeout=10)
+        res = session_pool.get(api_url, timeout=10)
         res.raise_for_status()
         proxies = res.text.strip().splitlines()
         if limit:
@@ -44,70 +57,76 @@ def fetch_proxies_from_api(api_url, proxy_type, limit=None, verbose=False):
         print(f"❌ Failed to fetch {proxy_type.upper()} proxies: {e}")
         return []
 
-def test_proxy(proxy_url, proxy_type, headers=None, verbose=False):
-    schema = f"{proxy_type}://"
-    proxy = {"http": schema + proxy_url, "https": schema + proxy_url}
-    try:
-        res = requests.get("http://httpbin.org/ip", proxies=proxy, headers=headers, timeout=5)
-        if res.status_code == 200:
-            if verbose:
-                print(f"✅ Valid {proxy_type.upper()} proxy: {proxy_url}")
-            return proxy_url
-    except Exception:
-        if verbose:
-            print(f"❌ Failed {proxy_type.upper()} proxy: {proxy_url}")
-    return None
+def load_and_validate_proxies(args):
+    """Fetch and validate proxies from the --*-api sources.
 
-def load_and_validate_proxies(args, headers):
+    Validation runs concurrently and its ranked results are cached on disk, so
+    repeat runs within --proxy-cache-ttl skip it entirely. Returns
+    ``(addresses, proxy_type, latencies)``.
+    """
     sources = {
         "http": args.http_api,
         "socks4": args.socks4_api,
         "socks5": args.socks5_api
     }
+    cache = ProxyCache(args.proxy_cache, ttl=args.proxy_cache_ttl * 60)
 
     valid_proxies = {}
+    latencies = {}
     for proxy_type, api in sources.items():
         if not api:
             continue
-        proxies = fetch_proxies_from_api(api, proxy_type, limit=args.limit, verbose=args.verbose)
-        working = []
-        for p in proxies:
-            result = test_proxy(p, proxy_type, headers=headers, verbose=args.verbose)
-            if result:
-                working.append(result)
-        if working:
-            valid_proxies[proxy_type] = working
+        results = load_or_validate(
+            api,
+            lambda: fetch_proxies_from_api(api, proxy_type, limit=args.limit, verbose=args.verbose),
+            proxy_type=proxy_type,
+            cache=cache,
+            refresh=args.refresh_proxies,
+            verbose=args.verbose,
+            concurrency=args.validate_concurrency,
+            deadline=args.validate_deadline,
+        )
+        if results:
+            valid_proxies[proxy_type] = [r["address"] for r in results]
+            latencies.update((r["address"], r["latency"]) for r in results)
 
     if args.proxy_type:
         selected = args.proxy_type
         if selected not in valid_proxies:
             print(f"🚫 No valid proxies found for type: {selected.upper()}")
-            return None, selected
-        return valid_proxies[selected], selected
+            return None, selected, latencies
+        return valid_proxies[selected], selected, latencies
 
     if valid_proxies:
         auto_type = next(iter(valid_proxies))
-        return valid_proxies[auto_type], auto_type
+        return valid_proxies[auto_type], auto_type, latencies
 
     print("🚫 No valid proxies found.")
-    return None, None
+    return None, None, latencies
 
-def get_working_proxy(proxies, headers, proxy_type="http", verbose=False):
-    random.shuffle(proxies)
-    for proxy_url in proxies:
-        proxy = {"http": f"{proxy_type}://{proxy_url}", "https": f"{proxy_type}://{proxy_url}"}
-        try:
-            if verbose:
-                print(f"🔌 Trying proxy: {proxy_url}")
-            res = requests.get("http://httpbin.org/ip", headers=headers, proxies=proxy, timeout=5)
-            if res.status_code == 200:
-                if verbose:
-                    print(f"✅ Proxy OK: {proxy_url}")
-                return proxy
-        except Exception:
-            if verbose:
-                print(f"❌ Proxy failed: {proxy_url}")
-    return None
+def proxied_get(url, headers=None, proxy=None, proxy_pool=None, timeout=10, on_response=None):
+    """GET ``url`` through the pool proxy ``proxy`` (or directly when None).
+
+    The outcome is fed back into ``proxy_pool`` so proxy health is learned from
+    real fetches instead of separate test requests. ``on_response`` is called
+    with every response received, errors included.
+    """
+    proxies = proxy_pool.as_requests_proxy(proxy) if proxy else None
+    started = time.monotonic()
+    try:
+        res = session_pool.get(url, headers=headers, proxies=proxies, timeout=timeout)
+    except requests.RequestException:
+        if proxy:
+            proxy_pool.record_failure(proxy)
+        raise
+    if proxy:
+        if res.status_code in PROXY_BLOCKED_STATUSES:
+            proxy_pool.record_failure(proxy)
+        else:
+            proxy_pool.record_success(proxy, time.monotonic() - started)
+    if on_response is not None:
+        on_response(res)
+    return res
 
 # ------------------ Scraper ------------------ #
 def is_valid_link(href, base_netloc, restrict_path=None):
@@ -122,24 +141,47 @@ def is_valid_link(href, base_netloc, restrict_path=None):
         return False
     return True
 
-def save_markdown(base_url, url, content, output_dir, skip_existing=False):
+def markdown_path(url, output_dir):
     rel_path = urlparse(url).path.strip("/")
     if rel_path == "":
         rel_path = "index"
     filename = rel_path.replace("/", "_") + ".md"
-    filepath = os.path.join(output_dir, filename)
+    return os.path.join(output_dir, filename)
+
+def markdown_document(url, content):
+    """The saved form of a page: a title line with its URL path, then the Markdown."""
+    return f"# {urlparse(url).path or 'Home'}\n\n" + content
+
+def save_markdown(base_url, url, content, output_dir, skip_existing=False, content_store=None):
+    """Write one page's Markdown; returns the number of bytes written (0 if skipped)."""
+    filepath = markdown_path(url, output_dir)
 
     if skip_existing and os.path.exists(filepath):
         print(f"⏩ Skipping existing file: {filepath}")
-        return
+        return 0
 
+    text = markdown_document(url, content)
+
+    if content_store is not None:
+        filename = os.path.relpath(filepath, output_dir)
+        canonical = content_store.canonical_for(url, filename, content)
+        if canonical:
+            content_store.add_alias(url, filename, canonical)
+            return 0
+        if content_store.is_unchanged(filename, text):
+            content_store.record(url, filename, text, content, written=False)
+            return 0
 
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     with open(filepath, "w", encoding="utf-8") as f:
-        f.write(f"# {urlparse(url).path or 'Home'}\n\n")
-        f.write(content)
+        f.write(text)
+
+    if content_store is not None:
+        content_store.record(url, filename, text, content, written=True)
+    return len(text.encode("utf-8"))
 
-def try_request_with_fallback(full_url, headers, scraperapi_config, proxy, timeout=10, dry_run=False):
+def try_request_with_fallback(full_url, headers, scraperapi_config, proxy, timeout=10, dry_run=False,
+                              proxy_pool=None, on_response=None):
     if dry_run:
         print(f"[DRY-RUN] Would request: {full_url}")
         return None
@@ -152,75 +194,271 @@ def try_request_with_fallback(full_url, headers, scraperapi_config, proxy, timeo
                 req_url += f"&country_code={scraperapi_config['country_code']}"
             if scraperapi_config.get("session_number"):
                 req_url += f"&session_number={scraperapi_config['session_number']}"
-            res = requests.get(req_url, headers=headers, timeout=timeout)
+            if headers and ("If-None-Match" in headers or "If-Modified-Since" in headers):
+                req_url += "&keep_headers=true"
+            res = session_pool.get(req_url, headers=headers, timeout=timeout)
+            if on_response is not None:
+                on_response(res)
             res.raise_for_status()
             return res
         else:
-            res = requests.get(full_url, headers=headers, proxies=proxy, timeout=timeout)
+            res = proxied_get(full_url, headers=headers, proxy=proxy, proxy_pool=proxy_pool,
+                              timeout=timeout, on_response=on_response)
             res.raise_for_status()
             return res
     except Exception:
         return None
 
-def crawl(base_url, current_url, output_dir, base_netloc, headers=None, proxies=None,
-          proxy_type="http", limit=None, verbose=False, follow_links=True, delay_range=None,
-          scraperapi_config=None, dry_run=False, max_depth=None, depth=0, restrict_path=None, skip_existing=False):
-    if limit is not None and len(visited) >= limit:
-        return
+def resolve_parser(name):
+    """Map a --parser choice to an installed bs4 tree builder."""
+    if name == "auto":
+        return "lxml" if parser_available("lxml") else "html.parser"
+    return name
 
-    if max_depth is not None and depth > max_depth:
-        return
+def parser_available(name):
+    try:
+        BeautifulSoup("", name)
+        return True
+    except FeatureNotFound:
+        return False
 
-    full_url = urljoin(base_url, current_url)
-    if full_url in visited:
-        return
-    visited.add(full_url)
+def parse_main(html, parser="html.parser", main_only=False):
+    """Return the page's <main> element, or None.
+
+    With ``main_only`` only <main> and its descendants are built into the tree,
+    which skips the (often much larger) surrounding chrome. html5lib does not
+    support partial parsing and always builds the full tree.
+    """
+    parse_only = SoupStrainer("main") if main_only and parser != "html5lib" else None
+    soup = BeautifulSoup(html, parser, parse_only=parse_only)
+    return soup.find("main")
+
+def convert_main(main, direct=False):
+    """Convert a parsed <main> element to Markdown.
+
+    By default the element is serialized and re-parsed by markdownify. With
+    ``direct`` the already-parsed tree is converted in place, which skips the
+    second parse; the document-level newline stripping markdownify applies is
+    reproduced so the output is identical.
+    """
+    if direct and hasattr(MarkdownConverter, "convert_soup"):
+        return MarkdownConverter().convert_soup(main).strip("\n")
+    return md(str(main))
+
+# Markers of a client-side app shell (React/Next, Vue/Nuxt, Gatsby, Angular, Svelte).
+SPA_ROOT_MARKERS = ('id="__next"', 'id="root"', 'id="app"', 'id="__nuxt"', 'id="___gatsby"',
+                    'data-reactroot', 'ng-version', 'id="svelte"')
+# Framework bundles and boot data that only a client-side app ships.
+SPA_BUNDLE_MARKERS = ("/_next/static/", "window.__NUXT__", "/_nuxt/", "window.__remixContext",
+                      "__sveltekit", "window.___gatsby")
+MIN_RENDERED_CHARS = 80
+
+def is_app_shell(html):
+    """True when the HTML carries an app root, a framework bundle or an "enable JavaScript" notice."""
+    return (any(marker in html for marker in SPA_ROOT_MARKERS + SPA_BUNDLE_MARKERS)
+            or "enable javascript" in html.lower())
+
+def needs_rendering(html, markdown=None):
+    """True when a page's content looks like it only exists after JavaScript runs.
+
+    That is a page without <main>, or with a (nearly) empty one, whose HTML
+    is an app shell (see ``is_app_shell``). Plain static pages without <main>
+    are left alone rather than sent to the browser.
+    """
+    if markdown is not None and len(markdown.strip()) >= MIN_RENDERED_CHARS:
+        return False
+    return is_app_shell(html)
+
+def extract_page(html, base_netloc, restrict_path=None, parser="html.parser", main_only=False,
+                 pruner=None, timings=None):
+    """Convert a page's <main> to Markdown and collect its crawlable links.
+
+    ``main_only`` parses just the <main> subtree and converts it without a
+    second parse. Subtrees matched by ``pruner`` (a Pruner) are dropped
+    before conversion; links are collected first, so pruned navigation still feeds
+    the crawl. Time spent per stage is added to the ``timings`` dict, if
+    given. Returns ``(markdown, links)``, or None when the page has no <main>.
+    """
+    if timings is None:
+        timings = {}
+    with timed(timings, "parse"):
+        main = parse_main(html, parser=parser, main_only=main_only)
+        if not main:
+            return None
+
+        links = [
+            link['href'] for link in main.find_all("a", href=True)
+            if is_valid_link(link['href'], base_netloc, restrict_path=restrict_path)
+        ]
+    if pruner is not None:
+        with timed(timings, "prune"):
+            pruner.prune(main)
+    with timed(timings, "markdownify"):
+        markdown = convert_main(main, direct=main_only)
+    return markdown, links
+
+class FetchError(Exception):
+    """Raised when a page could not be fetched through any route.
+
+    ``status`` is the last HTTP status received, if any response came back;
+    ``timings`` and ``retries`` describe the attempts that were made.
+    """
+
+    def __init__(self, url, status=None, timings=None, retries=0):
+        super().__init__(url)
+        self.url = url
+        self.status = status
+        self.timings = timings if timings is not None else {}
+        self.retries = retries
+
+
+def fetch_page(full_url, base_netloc, headers=None, proxy_pool=None, verbose=False,
+               rate_limiter=None, scraperapi_config=None, dry_run=False, restrict_path=None,
+               cache_headers=None, parser="html.parser", main_only=False, detect_spa=False,
+               sanitize=False, pruner=None, timings=None):
+    """Fetch one page and convert its <main> to Markdown.
+
+    Returns a dict with ``markdown``, ``links`` and the response's ``etag`` /
+    ``last_modified`` validators; ``markdown`` is None when the page has no
+    <main> element. Every dict also carries the ``proxy`` picked from
+    ``proxy_pool`` (or None), the response size (``bytes``),
+    the number of fallback ``retries`` and per-stage ``timings``, which are
+    collected in the ``timings`` dict passed in, if any. With ``detect_spa``, pages that need a browser to render (see
+    ``needs_rendering``) come back as ``{"needs_render": True}`` instead.
+    With ``sanitize``, leaked JS/CSS and junk lines are dropped from the
+    Markdown before it is returned (same rules as sanitize-docs).
+    When ``cache_headers`` are sent and the server answers 304, the page is not
+    parsed and ``not_modified`` is set. Runs on a crawl worker thread. Returns
+    None on a dry run. Raises FetchError when every fetch attempt failed.
+    """
+    if timings is None:
+        timings = {}
+    if cache_headers:
+        headers = dict(headers or {}, **cache_headers)
 
     if verbose:
         print(f"📄 Fetching: {full_url}")
 
-    if delay_range:
-        delay = random.uniform(*delay_range)
-        if verbose:
-            print(f"⏳ Waiting {delay:.2f}s before request...")
-        time.sleep(delay)
+    statuses = []
 
-    proxy = None
-    if proxies:
-        proxy = get_working_proxy(proxies, headers, proxy_type, verbose)
+    def on_response(res):
+        statuses.append(res.status_code)
+        if rate_limiter is not None:
+            rate_limiter.observe_response(full_url, res)
+
+    if rate_limiter is not None and not dry_run:
+        with timed(timings, "rate_wait"):
+            rate_limiter.acquire(full_url)
 
-    res = try_request_with_fallback(full_url, headers, scraperapi_config, proxy, dry_run=dry_run)
+    proxy = None
+    if proxy_pool is not None:
+        with timed(timings, "proxy"):
+            proxy = proxy_pool.acquire()
+        if verbose and proxy:
+            print(f"🔌 Using proxy: {proxy}")
+
+    with timed(timings, "fetch"):
+        res = try_request_with_fallback(full_url, headers, scraperapi_config, proxy, dry_run=dry_run,
+                                        proxy_pool=proxy_pool, on_response=on_response)
     if dry_run:
-        return
+        return None
 
+    retries = 0
     if not res:
         print(f"❌ Failed to fetch with ScraperAPI. Trying with proxy fallback...")
         if proxy:
+            retries += 1
             try:
-                res = requests.get(full_url, headers=headers, proxies=proxy, timeout=10)
+                if rate_limiter is not None:
+                    with timed(timings, "rate_wait"):
+                        rate_limiter.acquire(full_url)
+                with timed(timings, "fetch"):
+                    res = proxied_get(full_url, headers=headers, proxy=proxy, proxy_pool=proxy_pool,
+                                      timeout=10, on_response=on_response)
                 res.raise_for_status()
             except Exception as e:
                 print(f"⚠️ Final fallback failed for {full_url}: {e}")
-                return
+                raise FetchError(full_url, status=statuses[-1] if statuses else None,
+                                 timings=timings, retries=retries)
         else:
-            return
-
-    soup = BeautifulSoup(res.text, "html.parser")
-    main = soup.find("main")
-    if not main:
-        return
-
-    markdown = md(str(main))
-    save_markdown(base_url, full_url, markdown, output_dir, skip_existing=skip_existing)
+            raise FetchError(full_url, status=statuses[-1] if statuses else None,
+                             timings=timings, retries=retries)
+
+    result = {
+        "not_modified": res.status_code == 304,
+        "markdown": None,
+        "links": [],
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified"),
+        "bytes": len(res.content),
+        "retries": retries,
+        "timings": timings,
+        "proxy": proxy,
+    }
+    if result["not_modified"]:
+        if verbose:
+            print(f"♻️  Not modified: {full_url}")
+        return result
 
-    if follow_links:
-        for link in main.find_all("a", href=True):
-            href = link['href']
-            if is_valid_link(href, base_netloc, restrict_path=restrict_path):
-                crawl(base_url, href, output_dir, base_netloc, headers, proxies,
-                      proxy_type, limit, verbose, follow_links, delay_range,
-                      scraperapi_config, dry_run=dry_run, max_depth=max_depth, depth=depth + 1,
-                      restrict_path=restrict_path)
+    extracted = extract_page(res.text, base_netloc, restrict_path=restrict_path,
+                             parser=parser, main_only=main_only, pruner=pruner, timings=timings)
+    if detect_spa and needs_rendering(res.text, extracted[0] if extracted else None):
+        if verbose:
+            print(f"🧪 Needs a browser to render: {full_url}")
+        result["needs_render"] = True
+        return result
+    if extracted is None:
+        return result
+
+    markdown, links = extracted
+    if sanitize:
+        def on_remove(line):
+            if verbose:
+                print(f"🗑 Removed: {line[:80]}... from {full_url}")
+        with timed(timings, "sanitize"):
+            markdown = sanitize_markdown(markdown, on_remove=on_remove)
+    result.update(markdown=markdown, links=links)
+    return result
+
+def rendered_result(reply, full_url, base_netloc, restrict_path=None):
+    """Turn a browser worker reply into the dict ``fetch_page`` returns."""
+    timings = reply.get("timings") or {}
+    if not reply.get("ok"):
+        print(f"❌ Browser render failed for {full_url}: {reply.get('error')}")
+        raise FetchError(full_url, timings=timings)
+    print(f"🧪 Rendered in browser: {full_url}")
+    links = [link for link in reply.get("links", [])
+             if is_valid_link(link, base_netloc, restrict_path=restrict_path)]
+    return {"not_modified": False, "markdown": reply["markdown"], "links": links,
+            "etag": None, "last_modified": None, "bytes": reply.get("bytes", 0),
+            "retries": 0, "timings": timings}
+
+def crawl(base_url, start_url, output_dir, base_netloc, headers=None, proxy_pool=None,
+          limit=None, verbose=False, follow_links=True, rate_limiter=None,
+          scraperapi_config=None, dry_run=False, max_depth=None, restrict_path=None,
+          skip_existing=False, concurrency=8, per_host_concurrency=8, checkpoint=None,
+          response_cache=None, parser="html.parser", main_only=False, seeds=None, unchanged=None,
+          content_store=None, renderer=None, render_timeout=60000, sanitize=False,
+          pruner=None):
+    """Crawl a docs site from ``start_url`` and save every page under ``output_dir``.
+
+    A thin wrapper around ``Crawler`` (see crawler.py) with a ``DiskSink``;
+    the options are documented there. Returns the set of URLs finished in
+    this run.
+    """
+    # crawler.py builds on the fetch helpers above, so import it late.
+    from scrapedocs.crawler import Crawler, DiskSink
+
+    sink = DiskSink(output_dir, skip_existing=skip_existing, content_store=content_store)
+    with Crawler(base_url, start_url, sinks=[sink], base_netloc=base_netloc, headers=headers,
+                 proxy_pool=proxy_pool, limit=limit, verbose=verbose, follow_links=follow_links,
+                 rate_limiter=rate_limiter, scraperapi_config=scraperapi_config, dry_run=dry_run,
+                 max_depth=max_depth, restrict_path=restrict_path, concurrency=concurrency,
+                 per_host_concurrency=per_host_concurrency, checkpoint=checkpoint,
+                 response_cache=response_cache, parser=parser, main_only=main_only, seeds=seeds,
+                 unchanged=unchanged, renderer=renderer, render_timeout=render_timeout,
+                 sanitize=sanitize, pruner=pruner) as crawler:
+        return {page.url for page in crawler}
 
 # ------------------ Main CLI ------------------ #
 def main():
@@ -228,19 +466,28 @@ def main():
         description="Scrape documentation sites into Markdown using rotating proxies and optional ScraperAPI integration."
     )
     parser.add_argument("--url", required=True, help="Base URL of the docs site to start scraping")
-    parser.add_argument("--out", required=True, help="Directory where Markdown files will be saved")
+    parser.add_argument("--out", help="Directory where Markdown files (and crawl state) will be saved")
     parser.add_argument("--limit", type=int, help="Max number of pages to scrape")
     parser.add_argument("--max-depth", type=int, help="Max number of link levels to follow from the start URL")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     parser.add_argument("--skip-links", action="store_true", help="Do not follow internal links beyond the base page")
-    parser.add_argument("--delay-min", type=float, default=0, help="Minimum delay (in seconds) between requests")
-    parser.add_argument("--delay-max", type=float, default=0, help="Maximum delay (in seconds) between requests")
+    parser.add_argument("--delay-min", type=float, default=0, help="Minimum delay (in seconds) between requests to a host")
+    parser.add_argument("--delay-max", type=float, default=0, help="Maximum delay (in seconds) between requests to a host")
+    parser.add_argument("--rate", type=float, default=None, help="Starting request rate per host (req/s); adapts to server responses (default: unthrottled until the server answers 429/503)")
+    parser.add_argument("--min-rate", type=float, default=0.1, help="Lowest request rate per host the limiter backs off to (req/s)")
+    parser.add_argument("--max-rate", type=float, default=50.0, help="Highest request rate per host the limiter speeds up to (req/s)")
+    parser.add_argument("--ignore-crawl-delay", action="store_true", help="Do not cap the rate at robots.txt Crawl-delay")
     parser.add_argument("--proxy-list", help="Path to file containing list of proxies to rotate through")
     parser.add_argument("--proxy-type", choices=["http", "socks4", "socks5"], help="Type of proxies in the proxy list")
     parser.add_argument("--http-api", help="URL to fetch live HTTP proxies")
     parser.add_argument("--socks4-api", help="URL to fetch live SOCKS4 proxies")
     parser.add_argument("--socks5-api", help="URL to fetch live SOCKS5 proxies")
     parser.add_argument("--save-proxies", help="File to save validated working proxies")
+    parser.add_argument("--proxy-cache", default=str(DEFAULT_CACHE_PATH), help="File where validated proxies are cached between runs")
+    parser.add_argument("--proxy-cache-ttl", type=float, default=30, help="Minutes before cached proxy validation results expire")
+    parser.add_argument("--refresh-proxies", action="store_true", help="Ignore the proxy cache and re-validate")
+    parser.add_argument("--validate-concurrency", type=int, default=500, help="Max proxies validated at once")
+    parser.add_argument("--validate-deadline", type=float, default=60, help="Hard limit (in seconds) for the whole proxy validation pass")
     parser.add_argument("--headers", help="Path to JSON file with custom HTTP headers")
     parser.add_argument("--render", action="store_true", help="Use JS rendering via ScraperAPI (costs credits)")
     parser.add_argument("--country", help="Geo-targeting via ScraperAPI (e.g., US, DE)")
@@ -248,13 +495,88 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Print intended requests without making them")
     parser.add_argument("--restrict-path", help="Only crawl URLs that start with this path (e.g., /docs)")
     parser.add_argument("--skip-existing", action="store_true", help="Skip saving if file already exists")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted crawl from the checkpoint in the output directory")
+    parser.add_argument("--max-failures", type=int, default=3, help="Retry failed pages on --resume until they have failed this many times")
+    parser.add_argument("--no-cache", action="store_true", help="Always download full pages instead of sending conditional (ETag / Last-Modified) requests")
+    parser.add_argument("--parser", choices=["html.parser", "lxml", "html5lib", "auto"], default="html.parser",
+                        help="HTML parser backend (auto picks lxml when installed)")
+    parser.add_argument("--main-only", action="store_true", help="Only parse the <main> element and its links instead of the whole page")
+    parser.add_argument("--sitemap", nargs="?", const="auto",
+                        help="Seed the crawl from sitemap.xml (optionally give its URL; default: from robots.txt or /sitemap.xml)")
+    parser.add_argument("--sitemap-lastmod", action="store_true", help="Skip sitemap pages whose <lastmod> is unchanged since the last run")
+    parser.add_argument("--keep-duplicates", action="store_true", help="Write a separate file for pages whose content duplicates another URL")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max number of requests in flight at once")
+    parser.add_argument("--hybrid", action="store_true", help="Render pages whose static HTML is an empty app shell in headless Chrome (needs the Node scraper deps)")
+    parser.add_argument("--render-timeout", type=int, default=60000, help="Page load timeout in ms for --hybrid browser renders")
+    parser.add_argument("--sanitize", action="store_true", help="Drop leaked JS/CSS and junk lines from pages before saving (same rules as sanitize-docs)")
+    parser.add_argument("--prune", nargs="?", const="all",
+                        help="Drop scripts, icons, nav, edit links and footers from <main> before converting "
+                             f"(optionally only some rule sets: {','.join(r for r in DEFAULT_PRUNE_RULES if r != 'generic')})")
+    parser.add_argument("--prune-selectors", help="Extra CSS selectors to drop before converting (e.g. \".banner, #ads\")")
+    parser.add_argument("--metrics-out", help="Write per-stage timings and counters to this file")
+    parser.add_argument("--metrics-format", choices=["json", "prometheus"],
+                        help="Format for --metrics-out (default: prometheus for .prom/.txt, else json)")
+    parser.add_argument("--jsonl", metavar="PATH",
+                        help="Stream one JSON record per page to PATH ('-' for stdout) instead of writing Markdown files")
+    parser.add_argument("--jsonl-max-mb", type=float, help="Start a new numbered --jsonl file after this many MB of records")
+    parser.add_argument("--gzip", action="store_true", help="Gzip-compress --jsonl output")
+    parser.add_argument("--corpus", metavar="PATH",
+                        help="Save pages into a packed single-file corpus (see docs-corpus) instead of Markdown files")
+    parser.add_argument("--per-host-concurrency", type=int, default=8, help="Max number of requests in flight per host")
 
     args = parser.parse_args()
+    if args.jsonl and args.corpus:
+        parser.error("--jsonl and --corpus cannot be combined")
+    if not args.out and not args.jsonl and not args.corpus:
+        parser.error("--out is required unless --jsonl or --corpus is given")
+    if args.sitemap_lastmod:
+        # The lastmod check needs the HTTP cache, which only exists for these runs.
+        if not args.sitemap:
+            parser.error("--sitemap-lastmod needs --sitemap")
+        if args.jsonl or args.no_cache or args.dry_run:
+            parser.error("--sitemap-lastmod cannot be used with --jsonl, --no-cache or --dry-run")
+    if args.resume and not args.out and not args.corpus:
+        parser.error("--resume needs --out (or --corpus), where the crawl checkpoint is kept")
+
+    jsonl_sink = None
+    if args.jsonl:
+        max_bytes = int(args.jsonl_max_mb * 1024 * 1024) if args.jsonl_max_mb else None
+        try:
+            jsonl_sink = JsonlSink(args.jsonl, max_bytes=max_bytes, compress=args.gzip, append=args.resume)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.jsonl == "-":
+            # Records own stdout; progress and summaries go to stderr.
+            sys.stdout = sys.stderr
 
     base_url = args.url.rstrip("/")
-    output_dir = os.path.abspath(args.out)
+    output_dir = os.path.abspath(args.out) if args.out else None
+    # Crawl state (checkpoint, HTTP cache) lives in --out, or next to the corpus without it.
+    state_dir = output_dir
+    if state_dir is None and args.corpus:
+        state_dir = corpus_state_dir(args.corpus)
     base_netloc = urlparse(base_url).netloc
 
+    html_parser = resolve_parser(args.parser)
+    if not parser_available(html_parser):
+        print(f"🚫 Parser backend '{html_parser}' is not installed (try: pip install {html_parser})")
+        return
+
+    pruner = None
+    if args.prune or args.prune_selectors:
+        try:
+            if args.prune:
+                frameworks = None if args.prune == "all" else [name.strip() for name in args.prune.split(",")]
+                extra = [args.prune_selectors] if args.prune_selectors else None
+                pruner = Pruner(build_prune_rules(frameworks, extra))
+            else:
+                pruner = Pruner(split_selectors(args.prune_selectors))
+        except ValueError as e:
+            print(f"🚫 {e}")
+            return
+
+    session_pool.configure(pool_size=max(args.concurrency, args.per_host_concurrency))
+
     headers = None
     if args.headers:
         with open(args.headers, "r") as f:
@@ -268,15 +590,29 @@ def main():
             )
         }
 
-    delay_range = None
+    rate = args.rate
+    max_rate = args.max_rate
     if args.delay_min > 0 or args.delay_max > 0:
-        delay_range = (args.delay_min, args.delay_max)
+        # Legacy delay flags map onto the limiter: the average delay sets the
+        # starting rate and the minimum delay caps how fast it may adapt.
+        rate = 1.0 / max((args.delay_min + args.delay_max) / 2, 1e-3)
+        if args.delay_min > 0:
+            max_rate = min(max_rate, 1.0 / args.delay_min)
+    if rate is not None:
+        rate = min(rate, max_rate)
+    rate_limiter = HostRateLimiter(rate=rate, min_rate=min(args.min_rate, rate or args.min_rate), max_rate=max_rate)
+    if not args.ignore_crawl_delay and not args.dry_run:
+        crawl_delay = load_crawl_delay(base_url, session_pool, user_agent=headers.get("User-Agent", "*"), headers=headers)
+        if crawl_delay:
+            rate_limiter.set_crawl_delay(base_netloc, crawl_delay)
+            print(f"🐢 robots.txt Crawl-delay: {crawl_delay}s for {base_netloc}")
 
     proxies = None
     proxy_type = args.proxy_type or "http"
+    latencies = None
 
     if args.http_api or args.socks4_api or args.socks5_api:
-        proxies, proxy_type = load_and_validate_proxies(args, headers)
+        proxies, proxy_type, latencies = load_and_validate_proxies(args)
     elif args.proxy_list:
         with open(args.proxy_list, "r") as f:
             proxies = [line.strip() for line in f if line.strip()]
@@ -286,6 +622,8 @@ def main():
             f.write("\n".join(proxies))
         print(f"📅 Saved {len(proxies)} working {proxy_type.upper()} proxies to {args.save_proxies}")
 
+    proxy_pool = ProxyPool(proxies, proxy_type=proxy_type, latencies=latencies) if proxies else None
+
     scraperapi_config = None
     if os.getenv("SCRAPERAPI_KEY"):
         scraperapi_config = {
@@ -296,26 +634,147 @@ def main():
             "session_number": args.session
         }
 
-    os.makedirs(output_dir, exist_ok=True)
-
-    crawl(
+    if state_dir:
+        os.makedirs(state_dir, exist_ok=True)
+
+    # Without a state directory, crawl state is kept in a temporary file and cannot be resumed.
+    checkpoint = None
+    if state_dir and not args.dry_run:
+        checkpoint = CrawlCheckpoint(os.path.join(state_dir, CHECKPOINT_FILENAME), max_failures=args.max_failures)
+        previous_url = checkpoint.get_meta("base_url")
+        if args.resume and previous_url and previous_url != base_url:
+            print(f"🚫 Checkpoint in {state_dir} belongs to {previous_url}, not {base_url}")
+            checkpoint.close()
+            return
+        if not args.resume or not previous_url:
+            checkpoint.reset(base_url)
+        elif jsonl_sink is not None:
+            # Pages finished before the interruption are already in the appended output.
+            jsonl_sink.seen.update(checkpoint.urls(DONE))
+
+    # Conditional requests only pay off when the previous Markdown is kept.
+    response_cache = None
+    if state_dir and jsonl_sink is None and not args.dry_run and not args.no_cache:
+        response_cache = ResponseCache(os.path.join(state_dir, HTTP_CACHE_FILENAME))
+
+    # crawler.py builds on this module's fetch helpers, so import it late.
+    from scrapedocs.crawler import Crawler, CorpusSink, DiskSink
+
+    content_store = None
+    if jsonl_sink is not None:
+        sink = jsonl_sink
+    elif args.corpus:
+        sink = CorpusSink(args.corpus)
+    else:
+        if not args.dry_run:
+            content_store = ContentStore(output_dir, dedup=not args.keep_duplicates)
+        sink = DiskSink(output_dir, skip_existing=args.skip_existing, content_store=content_store)
+
+    seeds, unchanged = None, None
+    if args.sitemap:
+        if response_cache is not None and not args.resume:
+            response_cache.clear_pending_lastmods()
+        sitemap_counts = {"listed": 0, "unchanged": 0}
+
+        def sitemap_seeds():
+            # Streamed into the crawl checkpoint as the sitemap is parsed, so
+            # huge sitemaps are never held in memory.
+            sitemap_urls = discover_sitemaps(base_url, headers=headers) if args.sitemap == "auto" else [args.sitemap]
+            for sitemap_url in sitemap_urls:
+                for loc, lastmod in iter_sitemap(sitemap_url, headers=headers, verbose=args.verbose):
+                    if not is_valid_link(loc, base_netloc, restrict_path=args.restrict_path):
+                        continue
+                    page_url = urljoin(base_url, loc)
+                    if lastmod and response_cache is not None:
+                        # Recorded for good once the page is scraped (see Crawler._record).
+                        response_cache.note_lastmod(page_url, lastmod)
+                    sitemap_counts["listed"] += 1
+                    yield page_url
+            print(f"🗺️  Sitemap: {sitemap_counts['listed'] - sitemap_counts['unchanged']} page(s) queued, "
+                  f"{sitemap_counts['unchanged']} unchanged since last run")
+
+        def sitemap_unchanged(page_url):
+            if (args.sitemap_lastmod and response_cache.lastmod_unchanged(page_url)
+                    and sink.has(page_url)):
+                sitemap_counts["unchanged"] += 1
+                return True
+            return False
+
+        seeds, unchanged = sitemap_seeds(), sitemap_unchanged
+
+    renderer = BrowserWorker() if args.hybrid and not args.dry_run else None
+
+    crawler = Crawler(
         base_url,
         "/",
-        output_dir,
-        base_netloc,
+        sinks=[sink],
         headers=headers,
-        proxies=proxies,
-        proxy_type=proxy_type,
+        proxy_pool=proxy_pool,
         limit=args.limit,
         verbose=args.verbose,
         follow_links=not args.skip_links,
-        delay_range=delay_range,
+        rate_limiter=rate_limiter,
         scraperapi_config=scraperapi_config,
         dry_run=args.dry_run,
         max_depth=args.max_depth,
         restrict_path=args.restrict_path,
-        skip_existing=args.skip_existing
+        concurrency=args.concurrency,
+        per_host_concurrency=args.per_host_concurrency,
+        checkpoint=checkpoint,
+        response_cache=response_cache,
+        parser=html_parser,
+        main_only=args.main_only,
+        seeds=seeds,
+        unchanged=unchanged,
+        renderer=renderer,
+        render_timeout=args.render_timeout,
+        sanitize=args.sanitize,
+        pruner=pruner
     )
+    try:
+        crawler.run()
+    finally:
+        crawler.close()
+        if renderer is not None:
+            renderer.close()
+            if renderer.jobs:
+                print(f"🧪 {renderer.jobs} page(s) rendered in the browser")
+        metrics.print_summary()
+        if args.metrics_out:
+            metrics.write(args.metrics_out, args.metrics_format)
+            print(f"📈 Metrics written to {args.metrics_out}")
+
+    if content_store is not None:
+        stats = content_store.stats
+        print(f"💾 {stats['written']} file(s) written, {stats['unchanged']} unchanged, "
+              f"{stats['duplicates']} duplicate page(s) aliased")
+    if args.corpus:
+        print(f"💾 {crawler.stats['done']} page(s) saved to corpus {args.corpus}")
+    if jsonl_sink is not None:
+        target = ", ".join(jsonl_sink.files) or ("stdout" if args.jsonl == "-" else args.jsonl)
+        print(f"💾 {crawler.stats['done']} JSONL record(s) written to {target}")
+
+    if response_cache is not None:
+        response_cache.close()
+
+    for host, stats in rate_limiter.stats().items():
+        if stats["requests"]:
+            limit = "unthrottled" if stats["current_rate"] is None else f"{stats['current_rate']} req/s"
+            print(f"🚦 {host}: {stats['requests']} request(s) at {stats['effective_rate']} req/s effective "
+                  f"(limit now {limit}, {stats['throttled']} throttled)")
+
+    if args.verbose:
+        print(format_stats(session_pool.stats()))
+        if proxy_pool is not None:
+            stats = proxy_pool.stats()
+            print(f"🧮 Proxies: {stats['available']}/{stats['total']} healthy, "
+                  f"{stats['quarantined']} quarantined, {stats['evicted']} evicted")
+
+    if checkpoint is not None:
+        counts = checkpoint.counts()
+        checkpoint.close()
+        if counts.get("failed"):
+            print(f"⚠️ {counts['failed']} page(s) failed — rerun with --resume to retry them")
 
     print("\n✅ Done!")
 
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+sessions.py
+
+Shared, keep-alive HTTP sessions for the scrapers and proxy tools.
+
+A bare ``requests.get`` opens a fresh TCP (and TLS) connection every time,
+which is expensive through slow free proxies. SessionPool keeps one pooled
+``requests.Session`` per route — per proxy, or per origin for direct and
+ScraperAPI requests — so connections are reused across pages.
+"""
+
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def route_key(url, proxies=None):
+    """Return the pooling key for a request: the proxy if any, else the origin."""
+    if proxies:
+        return "proxy:" + (proxies.get("https") or proxies.get("http") or "")
+    parsed = urlparse(url)
+    return f"direct:{parsed.scheme}://{parsed.netloc}"
+
+
+def _connection_pools(adapter):
+    managers = [adapter.poolmanager] + list(adapter.proxy_manager.values())
+    for manager in managers:
+        if manager is None:
+            continue
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                yield pool
+
+
+class SessionPool:
+    """Thread-safe LRU of pooled ``requests.Session`` objects keyed by route.
+
+    ``pool_size`` is the number of keep-alive connections kept per host and
+    should match the crawl concurrency. At most ``max_sessions`` routes are
+    kept open; the least recently used session is closed beyond that.
+    """
+
+    def __init__(self, pool_size=10, max_sessions=256):
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._closed_requests = 0
+        self._closed_connections = 0
+
+    def configure(self, pool_size=None, max_sessions=None):
+        """Resize future sessions; already open sessions keep their pools."""
+        if pool_size:
+            self.pool_size = pool_size
+        if max_sessions:
+            self.max_sessions = max_sessions
+
+    def session(self, key):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                return session
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[key] = session
+
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                self._retire(evicted)
+            return session
+
+    def get(self, url, proxies=None, **kwargs):
+        """Drop-in replacement for ``requests.get`` that reuses connections."""
+        return self.session(route_key(url, proxies)).get(url, proxies=proxies, **kwargs)
+
+    def _retire(self, session):
+        requests_made, connections = self._count(session)
+        self._closed_requests += requests_made
+        self._closed_connections += connections
+        session.close()
+
+    @staticmethod
+    def _count(session):
+        requests_made = connections = 0
+        for adapter in set(session.adapters.values()):
+            for pool in _connection_pools(adapter):
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        return requests_made, connections
+
+    def stats(self):
+        """Return request, connection and session counts for reuse reporting."""
+        with self._lock:
+            requests_made = self._closed_requests
+            connections = self._closed_connections
+            for session in self._sessions.values():
+                r, c = self._count(session)
+                requests_made += r
+                connections += c
+            return {
+                "sessions": len(self._sessions),
+                "requests": requests_made,
+                "connections": connections,
+                "reused": max(requests_made - connections, 0),
+            }
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                self._retire(session)
+            self._sessions.clear()
+
+
+session_pool = SessionPool()
+
+
+def format_stats(stats):
+    return (
+        f"🔌 HTTP: {stats['requests']} request(s) over {stats['connections']} connection(s) "
+        f"({stats['reused']} reused, {stats['sessions']} session(s))"
+    )
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+sitemap.py
+
+Streaming sitemap discovery for scrape-docs.
+
+Sitemaps and sitemap indexes (plain or gzipped) are parsed incrementally
+with ``iterparse`` straight off the HTTP response, so memory stays bounded
+no matter how large the sitemap is. Entries come back as ``(loc, lastmod)``
+pairs that can seed the crawl frontier in one step.
+"""
+
+import gzip
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlparse
+
+from scrapedocs.sessions import session_pool
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def discover_sitemaps(base_url, headers=None, timeout=10):
+    """Return sitemap URLs listed in robots.txt, or the conventional /sitemap.xml."""
+    origin = "{0.scheme}://{0.netloc}".format(urlparse(base_url))
+    sitemaps = []
+    try:
+        res = session_pool.get(urljoin(origin, "/robots.txt"), headers=headers, timeout=timeout)
+        if res.status_code == 200:
+            for line in res.text.splitlines():
+                key, _, value = line.partition(":")
+                if key.strip().lower() == "sitemap" and value.strip():
+                    sitemaps.append(value.strip())
+    except Exception:
+        pass
+    return sitemaps or [urljoin(origin, "/sitemap.xml")]
+
+
+class _PrefixedStream:
+    """Readable stream that replays already-consumed ``prefix`` bytes first."""
+
+    def __init__(self, prefix, raw):
+        self.prefix = prefix
+        self.raw = raw
+
+    def read(self, size=-1):
+        if self.prefix:
+            if size is None or size < 0:
+                data, self.prefix = self.prefix + self.raw.read(), b""
+                return data
+            data, self.prefix = self.prefix[:size], self.prefix[size:]
+            if len(data) < size:
+                data += self.raw.read(size - len(data))
+            return data
+        return self.raw.read(size)
+
+
+def _open_stream(url, headers=None, timeout=30):
+    res = session_pool.get(url, headers=headers, timeout=timeout, stream=True)
+    res.raise_for_status()
+    res.raw.decode_content = True
+    magic = res.raw.read(2)
+    stream = _PrefixedStream(magic, res.raw)
+    if magic == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    return res, stream
+
+
+def iter_sitemap(url, headers=None, verbose=False, max_nesting=3, _seen=None):
+    """Yield ``(loc, lastmod)`` for every page in a sitemap or sitemap index.
+
+    Nested sitemap indexes are followed up to ``max_nesting`` levels. Parsed
+    elements are discarded as soon as they are yielded.
+    """
+    seen = _seen if _seen is not None else set()
+    if url in seen:
+        return
+    seen.add(url)
+
+    try:
+        res, stream = _open_stream(url, headers=headers)
+    except Exception as e:
+        print(f"❌ Failed to fetch sitemap {url}: {e}")
+        return
+
+    if verbose:
+        print(f"🗺️  Reading sitemap: {url}")
+
+    nested = []
+    try:
+        root = None
+        loc = lastmod = None
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            name = _local(elem.tag)
+            if name == "loc":
+                loc = (elem.text or "").strip()
+            elif name == "lastmod":
+                lastmod = (elem.text or "").strip() or None
+            elif name in ("url", "sitemap"):
+                if loc:
+                    if name == "url":
+                        yield loc, lastmod
+                    else:
+                        nested.append(loc)
+                loc = lastmod = None
+                root.clear()
+    except ET.ParseError as e:
+        print(f"⚠️ Malformed sitemap {url}: {e}")
+    finally:
+        res.close()
+
+    if max_nesting > 0:
+        for child in nested:
+            yield from iter_sitemap(child, headers=headers, verbose=verbose,
+                                    max_nesting=max_nesting - 1, _seen=seen)
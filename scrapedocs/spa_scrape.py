@@ -2,20 +2,36 @@
 # Enhanced: retries, throttling, timeout, SOCKS5/premium proxy fallback, logging, and skip-existing
 
 import argparse
+import json
+import shutil
 import subprocess
+import tempfile
 import time
-import requests
 import os
+from concurrent.futures import FIRST_COMPLETED, wait
 from pathlib import Path
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from scrapedocs.sessions import session_pool
+from scrapedocs.proxy_pool import ProxyPool, race_proxies
+from scrapedocs.proxy_validator import ProxyCache, load_or_validate
+from scrapedocs.browser_worker import BrowserWorker, BrowserWorkerError
+from scrapedocs.checkpoint import CrawlCheckpoint, CHECKPOINT_FILENAME, FAILED
+from scrapedocs.metrics import metrics
+
 load_dotenv()
 
+FREE_PROXY_SOURCE = "https://api.proxyscrape.com/v4/free-proxy-list/get?request=display_proxies&proxy_format=protocolipport&format=text"
+
+# Seed latency for the premium proxy so the pool prefers it over free ones.
+PREMIUM_PROXY_LATENCY = 0.1
+
 
 def fetch_proxies_from_api(api_url: str, limit: int = 10):
     try:
         print(f"🌐 Fetching proxies from: {api_url}")
-        response = requests.get(api_url, timeout=10)
+        response = session_pool.get(api_url, timeout=10)
         response.raise_for_status()
         proxies = [line.strip() for line in response.text.splitlines() if line.strip()]
         return proxies[:limit]
@@ -23,50 +39,217 @@ def fetch_proxies_from_api(api_url: str, limit: int = 10):
         print(f"❌ Failed to fetch proxies: {e}")
         return []
 
-def test_proxy(proxy_url, proxy_type="http", headers=None):
-    schema = f"{proxy_type}://"
-    proxy = {"http": schema + proxy_url, "https": schema + proxy_url}
-    try:
-        res = requests.get("http://httpbin.org/ip", proxies=proxy, headers=headers, timeout=5)
-        if res.status_code == 200:
-            print(f"✅ Valid {proxy_type.upper()} proxy: {proxy_url}")
-            return proxy_url
-    except Exception:
-        print(f"❌ Failed {proxy_type.upper()} proxy: {proxy_url}")
-    return None
-
-def load_and_validate_proxies(scheme, source_url, limit, headers):
-    valid_proxies = {}
-    proxies = fetch_proxies_from_api(source_url, limit)
-    working = []
-    for p in proxies:
-        result = test_proxy(p, scheme, headers=headers)
-        if result:
-            working.append(result)
-    if working:
-        valid_proxies[scheme] = working
-        
-
-    if scheme:
-        selected = scheme
-        if selected not in valid_proxies:
-            print(f"🚫 No valid proxies found for type: {selected.upper()}")
-            return None, selected
-        return valid_proxies[selected], selected
-
-    if valid_proxies:
-        auto_type = next(iter(valid_proxies))
-        return valid_proxies[auto_type], auto_type
-
-    print("🚫 No valid proxies found.")
-    return None, None
+def load_and_validate_proxies(scheme, source_url, limit, refresh=False):
+    """Return ``(addresses, scheme, latencies)`` of working proxies from ``source_url``.
+
+    Results come from the shared proxy cache when fresh; otherwise the list is
+    validated concurrently and the cache is refreshed.
+    """
+    results = load_or_validate(
+        source_url,
+        lambda: fetch_proxies_from_api(source_url, limit),
+        proxy_type=scheme,
+        cache=ProxyCache(),
+        refresh=refresh,
+        verbose=True,
+    )
+    if not results:
+        print(f"🚫 No valid proxies found for type: {scheme.upper()}")
+        return None, scheme, {}
+    return [r["address"] for r in results], scheme, {r["address"]: r["latency"] for r in results}
 
 def log_proxy_result(proxy: str, status: str, logfile: Path):
     with open(logfile, "a") as f:
         f.write(f"{proxy} - {status}\n")
 
 
-def run_puppeteer_scraper(url: str, out_dir: str, headless: bool = True, retries: int = 3, delay: int = 2, proxy: str = None, proxy_type: str = "http", timeout: int = 60000, skip_existing: bool = False, click_nav: bool = False, nav_selector: str = ".sidebar a", retry_failed: bool = False):
+def race_for_proxy(proxy_pool, probe_url, k, timeout, log_path):
+    """Race the top ``k`` proxies against ``probe_url`` and pin the fastest working one."""
+    print(f"🏁 Racing {min(k, len(proxy_pool))} proxies against {probe_url}")
+
+    def report(address, latency, error):
+        if latency is not None:
+            log_proxy_result(address, f"RACE OK {latency:.2f}s", log_path)
+        else:
+            log_proxy_result(address, f"RACE FAILED ({error[:80]})", log_path)
+
+    winner, latency = race_proxies(proxy_pool, probe_url, k=k, timeout=timeout, on_result=report)
+    if winner:
+        print(f"🏆 Fastest working proxy: {winner} ({latency:.2f}s)")
+        proxy_pool.pin(winner)
+    else:
+        print("⚠️ None of the raced proxies answered")
+    return winner
+
+
+def race_probe_url(args):
+    if args.probe_url:
+        return args.probe_url
+    parsed = urlparse(args.url)
+    return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+
+
+def browser_args(browser_options):
+    return [f"--{flag}={value}" for flag, value in (browser_options or {}).items() if value is not None]
+
+
+def spa_filename(url):
+    """Markdown filename the Node scraper uses for ``url``."""
+    parts = [part for part in urlparse(url).path.rstrip("/").split("/") if part]
+    return ("-".join(parts) or "index") + ".md"
+
+
+def write_ready_times(out_dir, times):
+    if not times:
+        return
+    ordered = sorted(t["ms"] for t in times)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    summary = {"pages": len(ordered), "p50": pick(0.5), "p90": pick(0.9), "max": ordered[-1]}
+    with open(os.path.join(out_dir, "ready_times.json"), "w") as f:
+        json.dump({"summary": summary, "pages": times}, f, indent=2)
+    print(f"⏱️ Time to ready: p50 {summary['p50']}ms, p90 {summary['p90']}ms, max {summary['max']}ms")
+
+
+def crawl_with_worker(worker, base_url, out_dir, proxy_pool, seeds, retries=3, delay=2, timeout=60000,
+                      skip_existing=False, concurrency=4, log_path=None, checkpoint=None):
+    """Crawl an SPA through a persistent browser worker.
+
+    Python owns the frontier: up to ``concurrency`` pages are in flight in the
+    worker at once, each through a proxy picked from ``proxy_pool`` (or direct
+    once no proxy is healthy). A failed page is retried after ``delay``
+    seconds, through whichever proxy the pool picks next, up to ``retries``
+    attempts in total.
+
+    The frontier and per-URL status live in ``checkpoint`` (a CrawlCheckpoint),
+    as in scrape-docs, so an interrupted crawl carries on where it stopped and
+    pages that gave up are retried on the next resumed run. ``seeds`` are only
+    queued when the checkpoint holds no earlier state. Returns the
+    checkpoint's status counts.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state_dir = None
+    if checkpoint is None:
+        state_dir = tempfile.mkdtemp(prefix="scrapedocs-spa-")
+        checkpoint = CrawlCheckpoint(os.path.join(state_dir, CHECKPOINT_FILENAME))
+    finished, queued = checkpoint.resume()
+    if finished or queued:
+        print(f"♻️  Resuming crawl: {finished} pages done, {queued} queued")
+    else:
+        checkpoint.enqueue_many((url.rstrip("/") for url in seeds), 0)
+
+    retry_queue = []
+    attempts = {}
+    in_flight = {}
+    outcomes = {}
+    ready_times = []
+    network = {"requests": 0, "cached": 0, "blocked": 0}
+
+    def submit(url, depth):
+        attempts[url] = attempts.get(url, 0) + 1
+        proxy = proxy_pool.acquire()
+        print(f"📄 Scraping: {url} (Attempt {attempts[url]})" + (f" via {proxy}" if proxy else ""))
+        future = worker.submit(url, base_url=base_url, proxy=proxy,
+                               proxy_type=proxy_pool.proxy_type, timeout=timeout)
+        in_flight[future] = (url, depth, proxy, time.monotonic())
+
+    try:
+        while True:
+            now = time.monotonic()
+            due = [(url, depth) for at, url, depth in retry_queue if at <= now]
+            retry_queue = [entry for entry in retry_queue if entry[0] > now]
+            for url, depth in due:
+                submit(url, depth)
+            if len(in_flight) < concurrency:
+                for url, depth in checkpoint.next_queued(concurrency - len(in_flight)):
+                    checkpoint.mark_fetching(url, depth)
+                    submit(url, depth)
+
+            if not in_flight:
+                if not retry_queue:
+                    break
+                time.sleep(max(0.0, min(at for at, _, _ in retry_queue) - time.monotonic()))
+                continue
+
+            wait_for = None
+            if retry_queue:
+                wait_for = max(0.0, min(at for at, _, _ in retry_queue) - time.monotonic())
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                url, depth, proxy, started = in_flight.pop(future)
+                try:
+                    reply = future.result()
+                except BrowserWorkerError as e:
+                    reply = {"ok": False, "error": str(e)}
+                for key, value in (reply.get("network") or {}).items():
+                    network[key] = network.get(key, 0) + value
+                metrics.observe_timings(reply.get("timings"))
+                outcome = outcomes.setdefault(proxy or "NO_PROXY", [0, 0])
+
+                if not reply.get("ok"):
+                    outcome[1] += 1
+                    if proxy:
+                        proxy_pool.record_failure(proxy)
+                    print(f"⚠️ Failed to scrape {url} (Attempt {attempts[url]}): {reply.get('error')}")
+                    if attempts[url] < retries:
+                        metrics.count("retries")
+                        retry_queue.append((time.monotonic() + delay, url, depth))
+                    else:
+                        print(f"❌ Giving up on {url}")
+                        metrics.count("failed")
+                        checkpoint.mark_failed(url, depth)
+                    continue
+
+                outcome[0] += 1
+                if proxy:
+                    proxy_pool.record_success(proxy, time.monotonic() - started)
+                ready_times.append({"url": url, "ms": reply.get("readyMs")})
+                metrics.count("pages")
+                metrics.count("bytes_downloaded", reply.get("bytes", 0))
+
+                out_path = os.path.join(out_dir, spa_filename(url))
+                if skip_existing and os.path.exists(out_path):
+                    print(f"⏩ Skipping save for already scraped: {url}")
+                else:
+                    with metrics.timer("write"), open(out_path, "w", encoding="utf-8") as f:
+                        f.write(reply["markdown"])
+                    metrics.count("bytes_written", len(reply["markdown"].encode("utf-8")))
+                checkpoint.mark_done(url, depth)
+
+                links = []
+                for link in dict.fromkeys(link.rstrip("/") for link in reply.get("links", [])):
+                    if not link.startswith(base_url) or checkpoint.status(link) is not None:
+                        continue
+                    if skip_existing and os.path.exists(os.path.join(out_dir, spa_filename(link))):
+                        print(f"✅ Already scraped: {link}")
+                        checkpoint.mark_skipped(link, depth + 1)
+                        continue
+                    links.append(link)
+                checkpoint.enqueue_many(links, depth + 1)
+            checkpoint.commit()
+    finally:
+        # Pages still waiting for a retry stay "fetching" and are requeued on resume.
+        checkpoint.commit()
+        counts = checkpoint.counts()
+        if state_dir is not None:
+            checkpoint.close()
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    if counts.get(FAILED):
+        print(f"⚠️ {counts[FAILED]} page(s) failed — rerun with --resume to retry them")
+    write_ready_times(out_dir, ready_times)
+    cache_rate = round(100 * network["cached"] / network["requests"]) if network["requests"] else 0
+    print(f"📦 {network['requests']} responses, {network['cached']} from browser cache ({cache_rate}%), "
+          f"{network['blocked']} requests blocked")
+    if log_path is not None:
+        for proxy, (successes, failures) in outcomes.items():
+            log_proxy_result(proxy, f"SUCCESS ({successes} ok, {failures} failed)" if successes
+                             else f"FAILED ({failures} failed)", log_path)
+    print(f"🧠 Browser started {worker.starts} time(s) for {sum(attempts.values())} page attempt(s)")
+    return counts
+
+
+def run_puppeteer_scraper(url: str, out_dir: str, headless: bool = True, retries: int = 3, delay: int = 2, proxy: str = None, proxy_type: str = "http", timeout: int = 60000, skip_existing: bool = False, click_nav: bool = False, nav_selector: str = ".sidebar a", retry_failed: bool = False, concurrency: int = 1, browser_options: dict = None, metrics_out: str = None):
     script_path = Path(__file__).parent / "puppeteer_scraper.js"
     args = ["node", str(script_path), url, out_dir]
 
@@ -86,6 +269,10 @@ def run_puppeteer_scraper(url: str, out_dir: str, headless: bool = True, retries
         args.append(f"--nav-selector={nav_selector}")
     if retry_failed:
         args.append("--retry-failed")
+    args.append(f"--concurrency={concurrency}")
+    args.extend(browser_args(browser_options))
+    if metrics_out:
+        args.append(f"--metrics-out={metrics_out}")
 
     subprocess.run(args, check=True)
 
@@ -105,10 +292,39 @@ def main():
     parser.add_argument("--log", default="proxy_log.txt")
     parser.add_argument("--click-nav", action="store_true", help="Enable click-based sidebar scraping")
     parser.add_argument("--nav-selector", default=".sidebar a", help="CSS selector for sidebar nav links")
-    parser.add_argument("--retry-failed", action="store_true", help="Retry scraping failed_urls.txt from the output directory")
+    parser.add_argument("--retry-failed", action="store_true", help="With --click-nav: retry scraping failed_urls.txt from the output directory (otherwise use --resume)")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted crawl from the checkpoint in the output directory")
+    parser.add_argument("--max-failures", type=int, default=3, help="Retry failed pages on --resume until they have failed this many times")
     parser.add_argument("--skip-existing", action="store_true", help="Skip saving if markdown already exists")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of browser tabs scraping pages in parallel")
+    parser.add_argument("--ready", default="network,mutation", help="Comma-separated readiness checks: network, selector, mutation")
+    parser.add_argument("--ready-selector", default=None, help="CSS selector that marks rendered content (for --ready selector)")
+    parser.add_argument("--network-timeout", type=int, default=None, help="Max ms to wait for network idle")
+    parser.add_argument("--selector-timeout", type=int, default=None, help="Max ms to wait for --ready-selector")
+    parser.add_argument("--mutation-timeout", type=int, default=None, help="Max ms to wait for the DOM to stop changing")
+    parser.add_argument("--quiet-ms", type=int, default=None, help="How long the DOM must go without changes to count as settled")
+    parser.add_argument("--browser-cache", default=None, metavar="DIR", help="Persistent browser profile directory so JS bundles stay cached across runs")
+    parser.add_argument("--block-types", default=None, help="Comma-separated resource types to block (default: image,stylesheet,font,media; empty blocks none)")
+    parser.add_argument("--block-urls", default=None, help="Comma-separated URL substrings to block (default: common analytics/trackers/video embeds; empty blocks none)")
+    parser.add_argument("--race", type=int, default=0, metavar="K", help="Probe the top K proxies in parallel and start with the fastest working one")
+    parser.add_argument("--probe-url", default=None, help="Cheap page used for --race (default: the site's /robots.txt)")
+    parser.add_argument("--probe-timeout", type=float, default=10, help="Seconds each --race probe may take")
+    parser.add_argument("--refresh-proxies", action="store_true", help="Ignore the proxy cache and re-validate free proxies")
+    parser.add_argument("--metrics-out", default=None, help="Write per-stage timings and counters to this file (.prom/.txt for Prometheus text, else JSON)")
     args = parser.parse_args()
 
+    browser_options = {
+        "ready": args.ready,
+        "ready-selector": args.ready_selector,
+        "network-timeout": args.network_timeout,
+        "selector-timeout": args.selector_timeout,
+        "mutation-timeout": args.mutation_timeout,
+        "quiet-ms": args.quiet_ms,
+        "block-types": args.block_types,
+        "block-urls": args.block_urls,
+        "user-data-dir": os.path.expanduser(args.browser_cache) if args.browser_cache else None,
+    }
+
     log_path = Path(args.log).expanduser().resolve()
     log_path.write_text("")
 
@@ -119,7 +335,74 @@ def main():
     else:
         scheme = "http"
 
-    if args.proxy_mode == "premium" and args.premium_user and args.premium_pass:
+    if args.click_nav:
+        # Click navigation walks the sidebar inside one browser session, so it
+        # still runs as a single scraper process per proxy attempt.
+        run_fallback_chain(args, scheme, browser_options, log_path)
+        return
+
+    proxies, latencies = [], {}
+    if args.proxy_mode in ("premium", "both") and args.premium_user and args.premium_pass:
+        premium_proxy = f"{args.premium_user}:{args.premium_pass}@proxy.packetstream.io:31112"
+        print(f"🌐 Using Premium proxy: {scheme}://{premium_proxy}")
+        proxies.append(premium_proxy)
+        latencies[premium_proxy] = PREMIUM_PROXY_LATENCY
+    if args.proxy_mode in ("free", "both"):
+        free, _, free_latencies = load_and_validate_proxies(scheme, FREE_PROXY_SOURCE, limit=20,
+                                                            refresh=args.refresh_proxies)
+        proxies.extend(free or [])
+        latencies.update(free_latencies)
+    proxy_pool = ProxyPool(proxies, proxy_type=scheme, latencies=latencies)
+
+    base_url = args.url.rstrip("/")
+    if args.race and len(proxy_pool):
+        race_for_proxy(proxy_pool, race_probe_url(args), args.race, args.probe_timeout, log_path)
+    if args.retry_failed:
+        print("ℹ️  --retry-failed only applies to --click-nav; resuming from the checkpoint instead")
+        args.resume = True
+
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint = CrawlCheckpoint(os.path.join(args.out, CHECKPOINT_FILENAME), max_failures=args.max_failures)
+    previous_url = checkpoint.get_meta("base_url")
+    if args.resume and previous_url and previous_url != base_url:
+        print(f"🚫 Checkpoint in {args.out} belongs to {previous_url}, not {base_url}")
+        checkpoint.close()
+        return
+    if not args.resume or not previous_url:
+        checkpoint.reset(base_url)
+
+    worker = BrowserWorker(headless=args.headless, extra_args=browser_args(browser_options))
+    try:
+        with worker:
+            crawl_with_worker(
+                worker,
+                base_url,
+                args.out,
+                proxy_pool,
+                [base_url],
+                retries=args.retries,
+                delay=args.delay,
+                timeout=args.timeout,
+                skip_existing=args.skip_existing,
+                concurrency=args.concurrency,
+                log_path=log_path,
+                checkpoint=checkpoint,
+            )
+    except BrowserWorkerError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        checkpoint.close()
+        metrics.print_summary()
+        if args.metrics_out:
+            metrics.write(args.metrics_out)
+            print(f"📈 Metrics written to {args.metrics_out}")
+    print("✅ Done scraping.")
+
+
+def run_fallback_chain(args, scheme, browser_options, log_path):
+    """Run the one-shot scraper process with premium, free, then no proxy."""
+    if args.proxy_mode in ("premium", "both") and args.premium_user and args.premium_pass:
         premium_proxy = f"{args.premium_user}:{args.premium_pass}@proxy.packetstream.io:31112"
         try:
             print(f"🌐 Using Premium proxy: {scheme}://{premium_proxy}")
@@ -135,7 +418,10 @@ def main():
                 skip_existing=args.skip_existing,
                 click_nav=args.click_nav,
                 nav_selector=args.nav_selector,
-                retry_failed=args.retry_failed
+                retry_failed=args.retry_failed,
+                concurrency=args.concurrency,
+                browser_options=browser_options,
+                metrics_out=args.metrics_out
             )
             log_proxy_result(premium_proxy, "SUCCESS", log_path)
             return
@@ -145,7 +431,7 @@ def main():
 
     proxy_sources = []
     if args.proxy_mode in ("free", "both"):
-        proxy_sources.append("https://api.proxyscrape.com/v4/free-proxy-list/get?request=display_proxies&proxy_format=protocolipport&format=text")
+        proxy_sources.append(FREE_PROXY_SOURCE)
     
     for source_url in proxy_sources:
 
@@ -153,18 +439,19 @@ def main():
         proxies = None
         # proxy_type = args.proxy_type or "http"
         # if args.http_api or args.socks4_api or args.socks5_api:
-        proxies = load_and_validate_proxies(scheme, source_url, limit=20, headers={
-            "User-Agent": (
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/122.0.0.0 Safari/537.36"
-            )
-        })
+        proxies, _, latencies = load_and_validate_proxies(scheme, source_url, limit=20, refresh=args.refresh_proxies)
 
         # proxies = fetch_proxies_from_api(source_url, limit=20)
-        for i, proxy in enumerate(proxies):
+        proxy_pool = ProxyPool(proxies or [], proxy_type=scheme, latencies=latencies)
+        candidates = proxy_pool.ranked()
+        if args.race and candidates:
+            winner = race_for_proxy(proxy_pool, race_probe_url(args), args.race, args.probe_timeout, log_path)
+            if winner:
+                candidates = [winner] + [p for p in proxy_pool.ranked() if p != winner]
+        for i, proxy in enumerate(candidates):
+            started = time.monotonic()
             try:
-                print(f"🌐 Trying proxy [{i+1}/{len(proxies)}]: {proxy}")
+                print(f"🌐 Trying proxy [{i+1}/{len(candidates)}]: {proxy}")
                 run_puppeteer_scraper(
                     args.url,
                     args.out,
@@ -177,12 +464,17 @@ def main():
                     skip_existing=args.skip_existing,
                     click_nav=args.click_nav,
                     nav_selector=args.nav_selector,
-                    retry_failed=args.retry_failed
+                    retry_failed=args.retry_failed,
+                    concurrency=args.concurrency,
+                    browser_options=browser_options,
+                    metrics_out=args.metrics_out
                 )
+                proxy_pool.record_success(proxy, time.monotonic() - started)
                 log_proxy_result(proxy, "SUCCESS", log_path)
                 return
             except subprocess.CalledProcessError:
                 print(f"❌ Proxy failed: {proxy}\n")
+                proxy_pool.record_failure(proxy)
                 log_proxy_result(proxy, "FAILED", log_path)
                 continue
 
@@ -199,7 +491,10 @@ def main():
             skip_existing=args.skip_existing,
             click_nav=args.click_nav,
             nav_selector=args.nav_selector,
-            retry_failed=args.retry_failed
+            retry_failed=args.retry_failed,
+            concurrency=args.concurrency,
+            browser_options=browser_options,
+            metrics_out=args.metrics_out
         )
         log_proxy_result("NO_PROXY", "SUCCESS", log_path)
     except subprocess.CalledProcessError:
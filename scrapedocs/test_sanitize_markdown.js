@@ -1,3 +1,5 @@
+const path = require("path");
+const { spawnSync } = require("child_process");
 const { sanitizeMarkdown } = require("./puppeteer_scraper");
 
 const cases = [
@@ -29,6 +31,22 @@ const cases = [
     name: "✅ Empty Markdown link with ZWSP",
     input: `[​](#invisible)`,
   },
+  {
+    name: "✅ Setext heading and rules",
+    input: `Getting started\n===============\n\n---\n\nInstall it first.`,
+  },
+  {
+    name: "✅ Table delimiter row",
+    input: `| Option | Default |\n| --- | :---: |\n| depth | 3 |`,
+  },
+  {
+    name: "✅ Non-Latin text",
+    input: `## 快速开始\n\nЭто документация.`,
+  },
+  {
+    name: "❌ Junk between paragraphs",
+    input: `Intro text.\n}});}\ndocument.body.classList.add("dark")\nMore text.`,
+  },
 ];
 
 console.log("\n=== Markdown Sanitizer Test ===\n");
@@ -45,3 +63,45 @@ cases.forEach(({ name, input }) => {
     )}\nInput:\n${input}\n\nOutput:\n${output}\n\nResult: ${passed}\n`
   );
 });
+
+// scrape-docs --sanitize runs the Python port in sanitize_docs.py; it must
+// produce exactly what sanitizeMarkdown does for every case above.
+console.log("\n=== Python Conformance Test ===\n");
+
+const python = process.env.PYTHON || "python3";
+const conformance = spawnSync(
+  python,
+  [
+    "-c",
+    "import json, sys\n" +
+      "from scrapedocs.sanitize_docs import sanitize_markdown\n" +
+      "cases = json.load(sys.stdin)\n" +
+      "print(json.dumps([sanitize_markdown(c) for c in cases]))",
+  ],
+  {
+    cwd: path.join(__dirname, ".."),
+    input: JSON.stringify(cases.map(({ input }) => input)),
+    encoding: "utf-8",
+  }
+);
+
+if (conformance.status !== 0) {
+  console.error(
+    `❌ Could not run ${python}:`,
+    conformance.stderr || conformance.error
+  );
+  process.exitCode = 1;
+} else {
+  const outputs = JSON.parse(conformance.stdout);
+  cases.forEach(({ name, input }, i) => {
+    const expected = sanitizeMarkdown(input);
+    if (outputs[i] === expected) {
+      console.log(`✅ ${name}`);
+    } else {
+      console.log(
+        `❌ ${name}\nJS:\n${expected}\n\nPython:\n${outputs[i]}\n`
+      );
+      process.exitCode = 1;
+    }
+  });
+}
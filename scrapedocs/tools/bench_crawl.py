@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+
+"""
+bench_crawl.py
+
+Offline end-to-end benchmark for scrape-docs.
+
+A synthetic docs site (see fixture_site.py) is served from localhost in its
+own process, then each stage runs in a fresh child process so peak RSS and
+CPU time are its own:
+
+    parse        extract_page on every page (parse, link extraction, Markdown)
+    markdownify  Markdown conversion of already-parsed <main> elements
+    crawl        scrape.crawl against the fixture server, writing to a temp dir
+    puppeteer    every page through the browser worker (only with --puppeteer)
+
+The report gives pages/sec, p50/p99 per-page latency, peak RSS and CPU time
+per stage as JSON. With --baseline, a previous report is compared and the
+exit status is 1 when a stage got slower than --tolerance allows.
+
+Usage:
+    python -m scrapedocs.tools.bench_crawl --pages 300 --out bench.json
+    python -m scrapedocs.tools.bench_crawl --latency 0.02 --error-rate 0.05 --baseline bench.json
+    python -m scrapedocs.tools.bench_crawl --stages crawl --puppeteer --pages 50
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ["parse", "markdownify", "crawl"]
+BASE_NETLOC = "127.0.0.1"
+ROOT = Path(__file__).resolve().parents[2]
+
+
+# ------------------ Measurement ------------------ #
+def _rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def summarize(latencies, wall, cpu, pages=None):
+    """Build a stage report from per-page latencies (seconds) and totals."""
+    pages = len(latencies) if pages is None else pages
+    report = {
+        "pages": pages,
+        "wall_seconds": round(wall, 3),
+        "pages_per_sec": round(pages / wall, 2) if wall > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            "p99": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            "max": round(max(latencies) * 1000, 2) if latencies else None,
+        },
+        "cpu_seconds": round(cpu, 3),
+        "peak_rss_mb": _rss_mb(resource.getrusage(resource.RUSAGE_SELF)) if resource else None,
+    }
+    return report
+
+
+def site_config(config):
+    return {key: config[key] for key in ("pages", "fanout", "weight", "seed")}
+
+
+# ------------------ Stages (run in child processes) ------------------ #
+def stage_parse(config):
+    from scrapedocs.scrape import extract_page
+    from scrapedocs.tools.fixture_site import generate_site
+
+    pages = list(generate_site(**site_config(config)).values())
+    pruner = _pruner(config)
+    latencies = []
+    cpu, started = time.process_time(), time.perf_counter()
+    for html in pages:
+        t = time.perf_counter()
+        extract_page(html, BASE_NETLOC, parser=config["parser"], main_only=config["main_only"], pruner=pruner)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started, time.process_time() - cpu)
+
+
+def stage_markdownify(config):
+    from scrapedocs.scrape import convert_main, parse_main
+    from scrapedocs.tools.fixture_site import generate_site
+
+    pruner = _pruner(config)
+    mains = []
+    for html in generate_site(**site_config(config)).values():
+        main = parse_main(html, parser=config["parser"], main_only=config["main_only"])
+        if pruner is not None:
+            pruner.prune(main)
+        mains.append(main)
+    latencies = []
+    cpu, started = time.process_time(), time.perf_counter()
+    for main in mains:
+        t = time.perf_counter()
+        convert_main(main, direct=config["main_only"])
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - started, time.process_time() - cpu)
+
+
+def stage_crawl(config, url):
+    from scrapedocs.checkpoint import CHECKPOINT_FILENAME, DONE, CrawlCheckpoint
+    from scrapedocs.content_store import ContentStore
+    from scrapedocs.crawler import Crawler, DiskSink
+    from scrapedocs.rate_limit import HostRateLimiter
+
+    latencies = []
+    rate = config["rate"]
+    with tempfile.TemporaryDirectory(prefix="bench-crawl-") as out_dir:
+        checkpoint = CrawlCheckpoint(os.path.join(out_dir, CHECKPOINT_FILENAME))
+        checkpoint.reset(url)
+        log = io.StringIO()
+        cpu, started = time.process_time(), time.perf_counter()
+        with contextlib.redirect_stdout(log):
+            crawler = Crawler(
+                url, sinks=[DiskSink(out_dir, content_store=ContentStore(out_dir))],
+                rate_limiter=HostRateLimiter(rate=rate, max_rate=rate, min_rate=min(1.0, rate)),
+                concurrency=config["concurrency"], per_host_concurrency=config["concurrency"],
+                checkpoint=checkpoint, parser=config["parser"], main_only=config["main_only"],
+                sanitize=config["sanitize"], pruner=_pruner(config),
+            )
+            with crawler:
+                # Each page's fetch + convert time, as measured on the worker thread.
+                latencies = [page.timings.get("page", 0.0) for page in crawler]
+        wall, cpu = time.perf_counter() - started, time.process_time() - cpu
+        counts = checkpoint.counts()
+        checkpoint.close()
+    report = summarize(latencies, wall, cpu, pages=counts.get(DONE, 0))
+    report["failed"] = sum(n for status, n in counts.items() if status != DONE)
+    return report
+
+
+def stage_puppeteer(config, url):
+    from scrapedocs.browser_worker import BrowserWorker, BrowserWorkerError
+    from scrapedocs.tools.fixture_site import page_path
+
+    urls = [url + page_path(i) for i in range(config["pages"])]
+    latencies = []
+    failed = 0
+    worker = BrowserWorker()
+    cpu, started = time.process_time(), time.perf_counter()
+    try:
+        in_flight = {}
+        while urls or in_flight:
+            while urls and len(in_flight) < config["concurrency"]:
+                page_url = urls.pop()
+                in_flight[worker.submit(page_url, base_url=url)] = time.perf_counter()
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                latencies.append(time.perf_counter() - in_flight.pop(future))
+                try:
+                    ok = future.result().get("ok")
+                except BrowserWorkerError:
+                    ok = False
+                failed += 0 if ok else 1
+    except BrowserWorkerError as e:
+        return {"error": str(e)}
+    finally:
+        worker.close()
+    wall, cpu = time.perf_counter() - started, time.process_time() - cpu
+    report = summarize(latencies, wall, cpu, pages=len(latencies) - failed)
+    report["failed"] = failed
+    if resource:
+        # The worker has exited, so its usage shows up under RUSAGE_CHILDREN.
+        browser = resource.getrusage(resource.RUSAGE_CHILDREN)
+        report["browser_cpu_seconds"] = round(browser.ru_utime + browser.ru_stime, 3)
+        report["browser_peak_rss_mb"] = _rss_mb(browser)
+    return report
+
+
+def _pruner(config):
+    if not config["prune"]:
+        return None
+    from scrapedocs.prune import Pruner, build_prune_rules
+    return Pruner(build_prune_rules())
+
+
+STAGE_FUNCTIONS = {
+    "parse": stage_parse,
+    "markdownify": stage_markdownify,
+    "crawl": stage_crawl,
+    "puppeteer": stage_puppeteer,
+}
+NEEDS_SERVER = ("crawl", "puppeteer")
+
+
+# ------------------ Orchestration ------------------ #
+@contextlib.contextmanager
+def fixture_server(config):
+    """Run fixture_site.py in a child process and yield its URL."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    command = [
+        sys.executable, "-m", "scrapedocs.tools.fixture_site",
+        "--pages", str(config["pages"]), "--fanout", str(config["fanout"]),
+        "--weight", str(config["weight"]), "--seed", str(config["seed"]),
+        "--latency", str(config["latency"]), "--error-rate", str(config["error_rate"]),
+    ]
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+    try:
+        url = proc.stdout.readline().strip()
+        if not url.startswith("http"):
+            raise RuntimeError("fixture site failed to start")
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run_stage(name, config, url=None):
+    """Run one stage in a fresh process and return its report."""
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        args = (config, url) if name in NEEDS_SERVER else (config,)
+        try:
+            return executor.submit(STAGE_FUNCTIONS[name], *args).result()
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+
+def compare(report, baseline, tolerance):
+    """Return a list of regression messages against a baseline report."""
+    regressions = []
+    for name, stage in report["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or "error" in stage or "error" in before:
+            continue
+        if before.get("pages_per_sec") and stage.get("pages_per_sec") is not None:
+            if stage["pages_per_sec"] < before["pages_per_sec"] * (1 - tolerance):
+                regressions.append(f"{name}: {stage['pages_per_sec']} pages/sec "
+                                   f"(baseline {before['pages_per_sec']})")
+        p99, p99_before = stage["latency_ms"]["p99"], before.get("latency_ms", {}).get("p99")
+        if p99 is not None and p99_before and p99 > p99_before * (1 + tolerance):
+            regressions.append(f"{name}: p99 {p99} ms (baseline {p99_before} ms)")
+    return regressions
+
+
+def print_report(report):
+    config = report["config"]
+    print(f"\n📊 {config['pages']} pages, fan-out {config['fanout']}, weight {config['weight']}, "
+          f"latency {config['latency']}s, error rate {config['error_rate']}\n")
+    print(f"{'stage':<12} {'pages/sec':>10} {'p50 ms':>9} {'p99 ms':>9} {'cpu s':>8} {'rss MB':>8}")
+    for name, stage in report["stages"].items():
+        if "error" in stage:
+            print(f"{name:<12} ❌ {stage['error']}")
+            continue
+        latency = stage["latency_ms"]
+        print(f"{name:<12} {stage['pages_per_sec'] or 0:>10.1f} {latency['p50'] or 0:>9.1f} "
+              f"{latency['p99'] or 0:>9.1f} {stage['cpu_seconds']:>8.2f} {stage['peak_rss_mb'] or 0:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline crawl benchmark for scrape-docs.")
+    parser.add_argument("--pages", type=int, default=200, help="Pages in the synthetic site")
+    parser.add_argument("--fanout", type=int, default=5, help="Links from each page to other pages")
+    parser.add_argument("--weight", type=int, default=8, help="Content sections per page (page size)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fixture server waits before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of page requests answered with 503")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated site")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages to run ({','.join(STAGES)})")
+    parser.add_argument("--puppeteer", action="store_true", help="Also run every page through the browser worker (needs the Node scraper deps)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight during the crawl and puppeteer stages")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Per-host request rate for the crawl stage (req/s)")
+    parser.add_argument("--parser", default="html.parser", help="HTML parser backend")
+    parser.add_argument("--main-only", action="store_true", help="Benchmark with --main-only parsing")
+    parser.add_argument("--prune", action="store_true", help="Benchmark with the default --prune rules")
+    parser.add_argument("--sanitize", action="store_true", help="Benchmark the crawl with --sanitize")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs. --baseline before failing (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    if args.puppeteer and "puppeteer" not in stages:
+        stages.append("puppeteer")
+    unknown = [name for name in stages if name not in STAGE_FUNCTIONS]
+    if unknown:
+        print(f"🚫 Unknown stage(s): {', '.join(unknown)}")
+        sys.exit(2)
+
+    config = {
+        "pages": args.pages, "fanout": args.fanout, "weight": args.weight, "latency": args.latency,
+        "error_rate": args.error_rate, "seed": args.seed, "concurrency": args.concurrency,
+        "rate": args.rate, "parser": args.parser, "main_only": args.main_only, "prune": args.prune,
+        "sanitize": args.sanitize,
+    }
+    report = {
+        "config": config,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "stages": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        url = None
+        if any(name in NEEDS_SERVER for name in stages):
+            url = stack.enter_context(fixture_server(config))
+        for name in stages:
+            if not args.json:
+                print(f"⏱️  Running {name}...")
+            report["stages"][name] = run_stage(name, config, url)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if args.out:
+            print(f"\n💾 Report written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"🐢 Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        if not args.json:
+            print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
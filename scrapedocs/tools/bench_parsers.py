@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+bench_parsers.py
+
+Benchmark scrape-docs HTML parsing backends on a fixture corpus.
+
+Every installed bs4 backend is run in full-page and --main-only mode over the
+same pages. The tool reports pages/sec and checks that the Markdown output is
+byte-for-byte identical to the reference (html.parser, full page), which is
+what scrape-docs produces by default.
+
+Usage:
+    python -m scrapedocs.tools.bench_parsers --generate 200
+    python -m scrapedocs.tools.bench_parsers --corpus ./saved-html --repeat 3 --json
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+
+from scrapedocs.scrape import extract_page, parser_available
+from scrapedocs.tools.fixture_site import generate_page
+
+BACKENDS = ["html.parser", "lxml", "html5lib"]
+BASE_NETLOC = "docs.example.com"
+
+
+def load_corpus(corpus_dir=None, generate=100, seed=1):
+    if corpus_dir:
+        return [p.read_text(encoding="utf-8", errors="replace")
+                for p in sorted(Path(corpus_dir).rglob("*.htm*"))]
+    rng = random.Random(seed)
+    return [generate_page(rng, i, generate, weight=12, chrome_links=150) for i in range(generate)]
+
+
+def run(pages, backend, main_only, repeat=1):
+    outputs = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [extract_page(html, BASE_NETLOC, parser=backend, main_only=main_only) for html in pages]
+    elapsed = time.perf_counter() - started
+    return len(pages) * repeat / elapsed, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends for scrape-docs.")
+    parser.add_argument("--corpus", help="Directory of saved .html pages (default: synthetic pages)")
+    parser.add_argument("--generate", type=int, default=100, help="Number of synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per backend")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.generate)
+    if not pages:
+        print("🚫 No pages to benchmark.")
+        return
+
+    reference = None
+    results = []
+    for backend in BACKENDS:
+        if not parser_available(backend):
+            if not args.json:
+                print(f"⏭️  {backend} not installed, skipping")
+            continue
+        for main_only in (False, True):
+            pages_per_sec, outputs = run(pages, backend, main_only, args.repeat)
+            if reference is None:
+                reference = outputs
+            mismatches = sum(1 for a, b in zip(outputs, reference) if a != b)
+            results.append({
+                "backend": backend,
+                "main_only": main_only,
+                "pages_per_sec": round(pages_per_sec, 2),
+                "identical": mismatches == 0,
+                "mismatches": mismatches,
+            })
+
+    if args.json:
+        print(json.dumps({"pages": len(pages), "results": results}, indent=2))
+        return
+
+    print(f"\n📊 {len(pages)} pages × {args.repeat} pass(es)\n")
+    print(f"{'backend':<12} {'mode':<10} {'pages/sec':>10}  output")
+    for r in results:
+        mode = "main-only" if r["main_only"] else "full"
+        match = "✅ identical" if r["identical"] else f"❌ {r['mismatches']} differ"
+        print(f"{r['backend']:<12} {mode:<10} {r['pages_per_sec']:>10.1f}  {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 
-import requests
-import concurrent.futures
 import argparse
 
-TEST_URL = "http://httpbin.org/ip"
+from scrapedocs.sessions import session_pool
+from scrapedocs.proxy_validator import ProxyCache, parse_proxy_line, validate_proxies
+
+TEST_URL = "http://httpbin.org/get"
 TIMEOUT = 5
 
 def fetch_proxies_from_api(api_url, limit=None, verbose=False):
     print(f"📡 Fetching proxies from: {api_url}")
     try:
-        res = requests.get(api_url, timeout=10)
+        res = session_pool.get(api_url, timeout=10)
         res.raise_for_status()
         proxies = res.text.strip().splitlines()
         if limit:
@@ -21,20 +22,13 @@ def fetch_proxies_from_api(api_url, limit=None, verbose=False):
         print(f"❌ Failed to fetch proxies: {e}")
         return []
 
-def test_proxy(proxy_url, proxy_type, verbose=False):
-    proxy_schema = f"{proxy_type}://"
-    proxy_dict = {"http": proxy_schema + proxy_url, "https": proxy_schema + proxy_url}
-    try:
-        response = requests.get(TEST_URL, proxies=proxy_dict, timeout=TIMEOUT)
-        if response.status_code == 200:
-            ip = response.json().get("origin")
-            if verbose:
-                print(f"✅ {proxy_url} → {ip}")
-            return proxy_url
-    except Exception:
-        if verbose:
-            print(f"❌ {proxy_url}")
-    return None
+def report(proxy_url, result, verbose=False):
+    if not verbose:
+        return
+    if result:
+        print(f"✅ {proxy_url} → {result['latency']:.2f}s ({result['anonymity']})")
+    else:
+        print(f"❌ {proxy_url}")
 
 def main():
     parser = argparse.ArgumentParser(description="Check and validate proxies from a live API.")
@@ -43,6 +37,9 @@ def main():
     parser.add_argument("--save", help="Save working proxies to a file (e.g., proxies_valid.txt)")
     parser.add_argument("--proxy-type", choices=["http", "socks4", "socks5"], default="http",
                         help="Type of proxies to test (default: http)")
+    parser.add_argument("--concurrency", type=int, default=500, help="Max proxies checked at once (default: 500)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT, help="Per-proxy timeout in seconds")
+    parser.add_argument("--deadline", type=float, default=60, help="Hard limit in seconds for the whole check")
     parser.add_argument("--verbose", action="store_true", help="Show results for each proxy")
 
     args = parser.parse_args()
@@ -52,16 +49,26 @@ def main():
         print("🚫 No proxies to check.")
         return
 
-    print(f"🚀 Validating {len(proxies)} {args.proxy_type.upper()} proxies...\n")
-    working = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(test_proxy, proxy, args.proxy_type, args.verbose): proxy for proxy in proxies}
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                working.append(result)
+    candidates = []
+    for line in proxies:
+        line_type, address = parse_proxy_line(line, args.proxy_type)
+        if line_type == args.proxy_type:
+            candidates.append(address)
+
+    print(f"🚀 Validating {len(candidates)} {args.proxy_type.upper()} proxies...\n")
+    results = validate_proxies(
+        candidates,
+        args.proxy_type,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        deadline=args.deadline,
+        test_url=TEST_URL,
+        on_result=lambda p, r: report(p, r, args.verbose),
+    )
+    working = [r["address"] for r in results]
 
-    print(f"\n✅ {len(working)} working proxies found.")
+    ProxyCache().save(args.proxy_type, args.api, results)
+    print(f"\n✅ {len(working)} working proxies found (cached for scrape-docs / spa-scrape).")
 
     if args.save:
         with open(args.save, "w") as f:
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 
-import requests
-import concurrent.futures
 import argparse
 
-TEST_URL = "http://httpbin.org/ip"
+from scrapedocs.sessions import session_pool
+from scrapedocs.proxy_validator import ProxyCache, parse_proxy_line, validate_proxies
+
+TEST_URL = "http://httpbin.org/get"
 TIMEOUT = 5
 
 PROXY_TYPES = {
@@ -15,7 +16,7 @@ PROXY_TYPES = {
 
 def fetch_proxies_from_api(api_url, limit=None, verbose=False):
     try:
-        res = requests.get(api_url, timeout=10)
+        res = session_pool.get(api_url, timeout=10)
         res.raise_for_status()
         proxies = res.text.strip().splitlines()
         if limit:
@@ -27,32 +28,34 @@ def fetch_proxies_from_api(api_url, limit=None, verbose=False):
         print(f"❌ Failed to fetch proxies from {api_url}: {e}")
         return []
 
-def test_proxy(proxy_url, proxy_type, verbose=False):
-    proxy_schema = f"{proxy_type}://"
-    proxy_dict = {"http": proxy_schema + proxy_url, "https": proxy_schema + proxy_url}
-    try:
-        response = requests.get(TEST_URL, proxies=proxy_dict, timeout=TIMEOUT)
-        if response.status_code == 200:
-            ip = response.json().get("origin")
-            if verbose:
-                print(f"✅ {proxy_type.upper()}: {proxy_url} → {ip}")
-            return proxy_url
-    except Exception:
-        if verbose:
-            print(f"❌ {proxy_type.upper()}: {proxy_url}")
-    return None
-
-def check_group(api_url, proxy_type, limit=None, verbose=False):
+def check_group(api_url, proxy_type, limit=None, verbose=False, concurrency=500, deadline=60):
     print(f"\n🔎 Checking {PROXY_TYPES[proxy_type]} proxies...")
     proxies = fetch_proxies_from_api(api_url, limit, verbose)
-    working = []
+    candidates = []
+    for line in proxies:
+        line_type, address = parse_proxy_line(line, proxy_type)
+        if line_type == proxy_type:
+            candidates.append(address)
+
+    def report(proxy_url, result):
+        if not verbose:
+            return
+        if result:
+            print(f"✅ {proxy_type.upper()}: {proxy_url} → {result['latency']:.2f}s ({result['anonymity']})")
+        else:
+            print(f"❌ {proxy_type.upper()}: {proxy_url}")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(test_proxy, p, proxy_type, verbose): p for p in proxies}
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                working.append(result)
+    results = validate_proxies(
+        candidates,
+        proxy_type,
+        concurrency=concurrency,
+        timeout=TIMEOUT,
+        deadline=deadline,
+        test_url=TEST_URL,
+        on_result=report,
+    )
+    ProxyCache().save(proxy_type, api_url, results)
+    working = [r["address"] for r in results]
 
     print(f"✅ {len(working)} working {proxy_type.upper()} proxies\n")
     return working
@@ -63,6 +66,8 @@ def main():
     parser.add_argument("--socks4-api", help="URL for SOCKS4 proxies")
     parser.add_argument("--socks5-api", help="URL for SOCKS5 proxies")
     parser.add_argument("--limit", type=int, help="Max proxies per type")
+    parser.add_argument("--concurrency", type=int, default=500, help="Max proxies checked at once per type")
+    parser.add_argument("--deadline", type=float, default=60, help="Hard limit in seconds for each type's check")
     parser.add_argument("--verbose", action="store_true", help="Show per-proxy logs")
     parser.add_argument("--save", action="store_true", help="Save working proxies to separate files")
 
@@ -71,13 +76,16 @@ def main():
     all_results = {}
 
     if args.http_api:
-        all_results['http'] = check_group(args.http_api, "http", args.limit, args.verbose)
+        all_results['http'] = check_group(args.http_api, "http", args.limit, args.verbose,
+                                          concurrency=args.concurrency, deadline=args.deadline)
 
     if args.socks4_api:
-        all_results['socks4'] = check_group(args.socks4_api, "socks4", args.limit, args.verbose)
+        all_results['socks4'] = check_group(args.socks4_api, "socks4", args.limit, args.verbose,
+                                            concurrency=args.concurrency, deadline=args.deadline)
 
     if args.socks5_api:
-        all_results['socks5'] = check_group(args.socks5_api, "socks5", args.limit, args.verbose)
+        all_results['socks5'] = check_group(args.socks5_api, "socks5", args.limit, args.verbose,
+                                            concurrency=args.concurrency, deadline=args.deadline)
 
     if args.save:
         for proxy_type, proxies in all_results.items():
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+"""
+fixture_site.py
+
+Serve a synthetic docs site from localhost for offline benchmarks.
+
+Pages are generated up front from a seed, so every run of the same
+configuration serves byte-identical HTML. Each page links to ``fanout`` other
+pages and carries ``weight`` sections of prose, lists, code and tables inside
+<main>, wrapped in the usual site chrome (header nav, sidebar, footer, scripts
+and inline SVG icons). Responses can be delayed by ``latency`` seconds and a
+share of them (``error_rate``) answered with an error status (503 by default)
+instead. The site also serves robots.txt and sitemap.xml.
+
+Usage:
+    python -m scrapedocs.tools.fixture_site --pages 500 --fanout 8 --port 8000
+    python -m scrapedocs.tools.fixture_site --pages 200 --latency 0.05 --error-rate 0.02
+"""
+
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+WORDS = ("component render state hook prop query cache schema route layout "
+         "server client build deploy config token stream buffer index page").split()
+ICON = '<svg viewBox="0 0 24 24"><path d="M12 2L2 7l10 5 10-5-10-5z"/></svg>'
+
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def page_path(index):
+    return "/" if index == 0 else f"/docs/page-{index}"
+
+
+def generate_page(rng, index, pages, fanout=5, weight=8, chrome_links=30):
+    """Build the HTML for page ``index`` of a ``pages``-page site.
+
+    Also used by bench_parsers, which wants heavier pages (more sections and
+    sidebar links) to parse.
+    """
+    targets = [(index + 1) % pages] + [rng.randrange(pages) for _ in range(max(fanout - 1, 0))]
+    links = "".join(f'<li><a href="{page_path(t)}">Page {t}</a></li>' for t in targets[:fanout])
+    sidebar = "".join(f'<li><a href="{page_path(t)}">Topic {t}</a></li>' for t in range(min(pages, chrome_links)))
+    body = []
+    for s in range(weight):
+        body.append(f'<h2 id="s{s}">Section {s}<a class="hash-link" href="#s{s}">#</a></h2>')
+        body.append("<p>" + " ".join(_sentence(rng) for _ in range(4)) + f" {ICON}</p>")
+        body.append("<ul>" + "".join(f"<li><code>{rng.choice(WORDS)}()</code> {_sentence(rng, 6)}</li>"
+                                     for _ in range(3)) + "</ul>")
+        body.append("<pre><code>" + "\n".join(f"const {w} = use{w.capitalize()}();"
+                                               for w in rng.sample(WORDS, 4)) + "</code></pre>")
+        if s % 4 == 0:
+            body.append("<table><tr><th>Prop</th><th>Type</th></tr>" +
+                        "".join(f"<tr><td>{w}</td><td>string</td></tr>" for w in rng.sample(WORDS, 3)) +
+                        "</table>")
+    return (
+        f"<!DOCTYPE html><html><head><title>Page {index}</title>"
+        f"<script>window.__DATA__ = {list(range(200))};</script><style>.a{{color:red}}</style></head>"
+        f"<body><header>{ICON * 5}<nav><ul>{sidebar}</ul></nav></header>"
+        f"<main><h1>Page {index}</h1>{''.join(body)}<h2>See also</h2><ul>{links}</ul>"
+        f'<footer class="theme-doc-footer"><a class="theme-edit-this-page" href="#">{ICON}Edit this page</a></footer>'
+        f"</main><footer><ul>{sidebar}</ul></footer><script src=\"/app.js\"></script></body></html>"
+    )
+
+
+def generate_site(pages=100, fanout=5, weight=8, seed=1):
+    """Return ``{path: html}`` for a whole synthetic site."""
+    rng = random.Random(seed)
+    return {page_path(i): generate_page(rng, i, pages, fanout=fanout, weight=weight) for i in range(pages)}
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FixtureSite:
+    """A synthetic docs site served over HTTP on 127.0.0.1.
+
+    Use as a context manager, or call ``start()`` / ``stop()``. ``url`` is the
+    site root once started; ``requests`` and ``errors`` count what was served.
+    """
+
+    def __init__(self, pages=100, fanout=5, weight=8, latency=0.0, error_rate=0.0, error_status=503,
+                 seed=1, port=0):
+        self.pages = {path: html.encode("utf-8") for path, html in
+                      generate_site(pages, fanout=fanout, weight=weight, seed=seed).items()}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.port = port
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self.url = None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="text/html; charset=utf-8"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?")[0].split("#")[0]
+                if path == "/robots.txt":
+                    self._send(200, f"User-agent: *\nSitemap: {site.url}/sitemap.xml\n".encode(), "text/plain")
+                    return
+                if path == "/sitemap.xml":
+                    urls = "".join(f"<url><loc>{site.url}{p}</loc></url>" for p in site.pages)
+                    body = ("<?xml version='1.0' encoding='UTF-8'?><urlset "
+                            f"xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>{urls}</urlset>")
+                    self._send(200, body.encode(), "application/xml")
+                    return
+                body = site.pages.get(path if path == "/" else path.rstrip("/"))
+                with site._lock:
+                    site.requests += 1
+                    fail = body is not None and site._rng.random() < site.error_rate
+                    if fail:
+                        site.errors += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                if body is None:
+                    self._send(404)
+                elif fail:
+                    self._send(site.error_status)
+                else:
+                    self._send(200, body)
+
+        return Handler
+
+    def start(self):
+        self._server = _Server(("127.0.0.1", self.port), self._handler())
+        self.port = self._server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic docs site for offline scraper benchmarks.")
+    parser.add_argument("--pages", type=int, default=100, help="Number of pages in the site")
+    parser.add_argument("--fanout", type=int, default=5, help="Links from each page to other pages")
+    parser.add_argument("--weight", type=int, default=8, help="Content sections per page (page size)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to delay every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of page requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for injected errors")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generated content")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, fanout=args.fanout, weight=args.weight, latency=args.latency,
+                       error_rate=args.error_rate, error_status=args.error_status, seed=args.seed, port=args.port).start()
+    # The first line is machine-readable so a parent process can find the port.
+    print(site.url, flush=True)
+    print(f"🧪 Serving {args.pages} synthetic pages at {site.url} (Ctrl-C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()